@@ -0,0 +1,18 @@
+"""
+Benchmark Suite for Genesis Humanoid Learning
+
+Reproducible performance measurements of the simulation loop and of the
+project's own libraries, with JSON results and baseline comparison.
+"""
+
+__version__ = "0.1.0"
+__author__ = "Genesis Humanoid Learning Project"
+
+from .throughput import bench_config, sweep_configs, run_benchmark, compare_results
+
+__all__ = [
+    'bench_config',
+    'sweep_configs',
+    'run_benchmark',
+    'compare_results'
+]
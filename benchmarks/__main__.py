@@ -0,0 +1,24 @@
+"""
+Command line entry point: python -m benchmarks <command> [options]
+"""
+
+import sys
+
+from . import grounding, throughput
+
+
+COMMANDS = {
+    'throughput': throughput.main,
+    'grounding': grounding.main,
+}
+
+
+def main():
+    if len(sys.argv) < 2 or sys.argv[1] not in COMMANDS:
+        print(f"Usage: python -m benchmarks {{{','.join(COMMANDS)}}} [options]")
+        sys.exit(2)
+    COMMANDS[sys.argv[1]](sys.argv[2:])
+
+
+if __name__ == "__main__":
+    main()
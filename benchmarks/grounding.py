@@ -0,0 +1,342 @@
+"""
+Micro-benchmarks for robot grounding and foot detection.
+
+Times RobotGroundingCalculator construction, get_grounding_height and foot
+position reads for every G1 variant at several n_envs, broken down into
+detector, link reads and host syncs, and checks that the grounding height
+agrees between the Genesis calculator and offline URDF kinematics.
+
+The offline mode needs no Genesis and times the URDF-only path (parsing,
+detection and batched forward kinematics) instead.
+"""
+
+import argparse
+import glob
+import json
+import os
+import sys
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+
+from sim_profiling.startup import PROJECT_ROOT, config_key
+
+from .throughput import BENCH_VERSION, environment_info, latency_stats, run_isolated, save_results
+
+
+G1_DIR = os.path.join(PROJECT_ROOT, "assets", "robots", "g1")
+DEFAULT_RESULTS_PATH = os.path.join(PROJECT_ROOT, "benchmarks", "results", "grounding.json")
+DEFAULT_N_ENVS = [1, 64, 1024, 4096]
+
+# Heights from different methods must agree within this distance (meters)
+HEIGHT_TOLERANCE = 1e-3
+
+# Ordered phases reported for scene benchmarks
+SCENE_PHASES = [
+    'detector', 'construct', 'link_reads', 'host_syncs',
+    'grounding_height', 'foot_positions', 'offline_fk',
+]
+OFFLINE_PHASES = ['parse', 'detector', 'offline_fk', 'offline_fk_collision']
+
+
+def g1_urdfs(directory: str = G1_DIR) -> List[str]:
+    """
+    All distinct G1 URDF files (symlinked aliases are skipped).
+
+    Args:
+        directory: Directory to scan
+
+    Returns:
+        Sorted list of URDF paths
+    """
+    return sorted(path for path in glob.glob(os.path.join(directory, "*.urdf"))
+                  if not os.path.islink(path))
+
+
+def grounding_config(urdf_path: str, n_envs: int = 1, backend: str = "cpu",
+                     repeats: int = 50, safety_margin: float = 0.03,
+                     offline: bool = False) -> Dict[str, Any]:
+    """
+    Build a grounding benchmark configuration dictionary.
+
+    Args:
+        urdf_path: Robot URDF
+        n_envs: Number of parallel environments (0 builds without batching)
+        backend: Genesis backend name
+        repeats: Timed repetitions per phase
+        safety_margin: Grounding safety margin in meters
+        offline: Benchmark the URDF-only path instead of a Genesis scene
+
+    Returns:
+        JSON-serializable configuration
+    """
+    return {
+        'benchmark': 'grounding',
+        'urdf': os.path.abspath(urdf_path),
+        'n_envs': n_envs,
+        'backend': backend,
+        'repeats': repeats,
+        'safety_margin': safety_margin,
+        'offline': offline,
+    }
+
+
+def time_phase(fn: Callable[[], Any], repeats: int,
+               synchronize: Callable[[], None] = lambda: None) -> Dict[str, float]:
+    """
+    Time a callable repeatedly after one untimed warm-up call.
+
+    Args:
+        fn: Function to time
+        repeats: Timed calls
+        synchronize: Called after fn inside the timed region (device sync)
+
+    Returns:
+        latency_stats of the timed calls
+    """
+    fn()
+    synchronize()
+    samples = []
+    for _ in range(repeats):
+        start = time.perf_counter_ns()
+        fn()
+        synchronize()
+        samples.append(time.perf_counter_ns() - start)
+    return latency_stats(samples)
+
+
+def _agreement(heights: Dict[str, float], reference: str, compared: List[str]) -> Dict[str, Any]:
+    deviation = max(abs(heights[name] - heights[reference]) for name in compared)
+    return {'reference': reference, 'compared': compared,
+            'max_deviation': deviation, 'agree': deviation <= HEIGHT_TOLERANCE}
+
+
+def _no_feet_result(config: Dict[str, Any], phases: Dict[str, Any]) -> Dict[str, Any]:
+    # Variants without legs (e.g. dual-arm) use the calculator's fixed fallback height
+    return {
+        'version': BENCH_VERSION,
+        'key': config_key(config),
+        'config': config,
+        'foot_links': [],
+        'phases': phases,
+        'heights': {},
+        'agreement': {'agree': True, 'max_deviation': 0.0, 'skipped': 'no foot links'},
+        'environment': environment_info(),
+    }
+
+
+def run_offline_benchmark(config: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Time the URDF-only grounding path in this process.
+
+    Args:
+        config: Configuration from grounding_config with offline=True
+
+    Returns:
+        Dictionary with per-phase statistics, heights and agreement check
+    """
+    from robot_grounding import FootDetector, parse_urdf
+    from robot_grounding.kinematics import KinematicChain, collision_lowest_z, offline_grounding_height
+
+    repeats = config['repeats']
+    margin = config['safety_margin']
+    model = parse_urdf(config['urdf'])
+    chain = KinematicChain(model)
+    foot_names = [link.name for link in FootDetector.detect_foot_links(model)]
+    q = np.zeros((max(config['n_envs'], 1), chain.n_dofs))
+
+    phases = {
+        'parse': time_phase(lambda: parse_urdf(config['urdf']), repeats),
+        'detector': time_phase(lambda: FootDetector.detect_foot_links(model), repeats),
+    }
+    if not foot_names:
+        return _no_feet_result(config, phases)
+
+    def fk_heights():
+        positions = chain.link_positions(foot_names, q)
+        return margin - positions[..., 2].min(axis=-1)
+
+    def fk_collision_heights():
+        frames = chain.forward(q)
+        lowest = np.minimum.reduce([collision_lowest_z(model, frames, name) for name in foot_names])
+        return margin - lowest
+
+    phases['offline_fk'] = time_phase(fk_heights, repeats)
+    phases['offline_fk_collision'] = time_phase(fk_collision_heights, repeats)
+
+    batched = fk_heights()
+    heights = {
+        'offline_origin': offline_grounding_height(model, margin),
+        'offline_batched': float(batched.max()),
+        'offline_collision': offline_grounding_height(model, margin, use_collision_geometry=True),
+    }
+    agreement = _agreement(heights, 'offline_origin', ['offline_batched'])
+    agreement['batch_spread'] = float(batched.max() - batched.min())
+
+    return {
+        'version': BENCH_VERSION,
+        'key': config_key(config),
+        'config': config,
+        'foot_links': foot_names,
+        'phases': phases,
+        'heights': heights,
+        'agreement': agreement,
+        'environment': environment_info(),
+    }
+
+
+def run_scene_benchmark(config: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Build a Genesis scene in this process and time the grounding phases.
+
+    link_reads launches the per-link position queries without converting
+    them; host_syncs is the .item() conversion get_lowest_z_position
+    performs on the results, so together they split the cost of a read.
+
+    Args:
+        config: Configuration from grounding_config
+
+    Returns:
+        Dictionary with per-phase statistics, heights and agreement check
+    """
+    import genesis as gs
+    import torch
+
+    from robot_grounding import FootDetector, RobotGroundingCalculator, parse_urdf
+    from robot_grounding.kinematics import KinematicChain, offline_grounding_height
+
+    gs.init(backend=getattr(gs, config['backend']), logging_level="warning")
+    scene = gs.Scene(show_viewer=False)
+    scene.add_entity(gs.morphs.Plane())
+    robot = scene.add_entity(gs.morphs.URDF(file=config['urdf'], pos=(0, 0, 1.0)))
+    if config['n_envs'] > 0:
+        scene.build(n_envs=config['n_envs'])
+    else:
+        scene.build()
+
+    synchronize = torch.cuda.synchronize if str(gs.device).startswith('cuda') else (lambda: None)
+    repeats = config['repeats']
+    margin = config['safety_margin']
+
+    calculator = RobotGroundingCalculator(robot, verbose=False)
+    feet = calculator.foot_links
+    if not feet:
+        return _no_feet_result(config, {
+            'detector': time_phase(lambda: FootDetector.detect_foot_links(robot), repeats),
+            'construct': time_phase(lambda: RobotGroundingCalculator(robot, verbose=False), repeats),
+        })
+    positions = [link.get_pos() for link in feet]
+
+    def host_syncs():
+        return [(pos[2] if pos.ndim == 1 else pos[0, 2]).item() for pos in positions]
+
+    model = parse_urdf(config['urdf'])
+    chain = KinematicChain(model)
+    foot_names = [link.name for link in feet]
+    q = torch.zeros((max(config['n_envs'], 1), chain.n_dofs), device=gs.device)
+
+    phases = {
+        'detector': time_phase(lambda: FootDetector.detect_foot_links(robot), repeats),
+        'construct': time_phase(lambda: RobotGroundingCalculator(robot, verbose=False), repeats),
+        'link_reads': time_phase(lambda: [link.get_pos() for link in feet], repeats, synchronize),
+        'host_syncs': time_phase(host_syncs, repeats),
+        'grounding_height': time_phase(lambda: calculator.get_grounding_height(margin), repeats),
+        'foot_positions': time_phase(calculator.get_current_foot_positions, repeats),
+        'offline_fk': time_phase(lambda: chain.link_positions(foot_names, q), repeats, synchronize),
+    }
+
+    # Per-env heights: the calculator only reads env 0, every env starts in the same pose
+    feet_z = torch.stack([pos.reshape(-1, 3)[:, 2] for pos in positions]).min(dim=0).values
+    env_heights = robot.get_pos().reshape(-1, 3)[:, 2] - (feet_z - margin)
+    heights = {
+        'calculator': calculator.get_grounding_height(margin),
+        'offline_origin': offline_grounding_height(model, margin),
+        'offline_collision': offline_grounding_height(model, margin, use_collision_geometry=True),
+        'all_envs_min': env_heights.min().item(),
+        'all_envs_max': env_heights.max().item(),
+    }
+    agreement = _agreement(heights, 'calculator', ['offline_origin', 'all_envs_min', 'all_envs_max'])
+
+    return {
+        'version': BENCH_VERSION,
+        'key': config_key(config),
+        'config': config,
+        'foot_links': foot_names,
+        'phases': phases,
+        'heights': heights,
+        'agreement': agreement,
+        'environment': environment_info(),
+    }
+
+
+def print_result(result: Dict[str, Any]):
+    """Print the phase breakdown and height agreement of one configuration."""
+    config = result['config']
+    mode = "offline" if config['offline'] else config['backend']
+    print(f"{result['key']} {os.path.basename(config['urdf'])} n_envs={config['n_envs']} ({mode})")
+    for name in OFFLINE_PHASES if config['offline'] else SCENE_PHASES:
+        if name not in result['phases']:
+            continue
+        stats = result['phases'][name]
+        print(f"  {name:<20} p50 {stats['p50_ms']:9.3f} ms  p99 {stats['p99_ms']:9.3f} ms")
+    agreement = result['agreement']
+    if 'skipped' in agreement:
+        print(f"  height check skipped: {agreement['skipped']}")
+        return
+    heights = ", ".join(f"{name}={value:.4f}" for name, value in result['heights'].items())
+    state = "agree" if agreement['agree'] else "MISMATCH"
+    print(f"  heights: {heights}")
+    print(f"  {state} (max deviation {agreement['max_deviation'] * 1000:.3f} mm)")
+
+
+def print_scaling(results: List[Dict[str, Any]]):
+    """Print p50 of each phase against n_envs, per robot variant."""
+    by_urdf = {}
+    for result in results:
+        by_urdf.setdefault(result['config']['urdf'], []).append(result)
+    for urdf, rows in by_urdf.items():
+        rows.sort(key=lambda r: r['config']['n_envs'])
+        phases = list(rows[0]['phases'])
+        print(f"Scaling (p50 ms) for {os.path.basename(urdf)}:")
+        print(f"  {'n_envs':<20}" + "".join(f"{r['config']['n_envs']:>10}" for r in rows))
+        for name in phases:
+            print(f"  {name:<20}" + "".join(f"{r['phases'][name]['p50_ms']:10.3f}" for r in rows))
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks grounding",
+                                     description="Benchmark grounding and foot detection")
+    parser.add_argument("--urdf", nargs="+", default=None, help="URDFs (default: all G1 variants)")
+    parser.add_argument("--n-envs", type=int, nargs="+", default=DEFAULT_N_ENVS)
+    parser.add_argument("--backend", default="cpu")
+    parser.add_argument("--repeats", type=int, default=50)
+    parser.add_argument("--safety-margin", type=float, default=0.03)
+    parser.add_argument("--offline", action="store_true", help="URDF-only path, no Genesis")
+    parser.add_argument("--output", default=DEFAULT_RESULTS_PATH)
+    parser.add_argument("--child", default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.child:
+        # Runs inside the fresh interpreter started by run_isolated
+        print(json.dumps(run_scene_benchmark(json.loads(args.child))))
+        return
+
+    configs = [
+        grounding_config(urdf, n_envs, args.backend, args.repeats, args.safety_margin, args.offline)
+        for urdf in (args.urdf or g1_urdfs()) for n_envs in args.n_envs
+    ]
+
+    results = []
+    for config in configs:
+        result = run_offline_benchmark(config) if args.offline else run_isolated(config, "grounding")
+        results.append(result)
+        print_result(result)
+
+    print_scaling(results)
+    save_results(results, args.output)
+    print(f"Results written to {args.output}")
+
+    if not all(result['agreement']['agree'] for result in results):
+        print("Grounding heights disagree between methods", file=sys.stderr)
+        sys.exit(1)
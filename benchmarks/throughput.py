@@ -0,0 +1,426 @@
+"""
+Throughput benchmark for the simulation hot loop.
+
+Runs the standard G1 scene under a sweep of n_envs, dt/substeps, rigid
+solver settings and rendering, each configuration in a fresh process.
+Warm-up steps are excluded; every measured step is timed individually so
+mean, p50 and p99 latency and env-steps/s can be reported, saved to JSON
+and compared against a baseline.
+"""
+
+import argparse
+import hashlib
+import itertools
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from sim_profiling.startup import DEFAULT_URDF, PROJECT_ROOT
+
+
+DEFAULT_RESULTS_PATH = os.path.join(PROJECT_ROOT, "benchmarks", "results", "throughput.json")
+
+# Bump when measurement methodology changes; results of different versions are not compared
+BENCH_VERSION = 2
+
+# Relative slowdown that counts as a regression in compare mode
+DEFAULT_THRESHOLD = 0.10
+
+# Settings that identify a configuration across checkouts and machines
+KEY_SETTINGS = ('n_envs', 'dt', 'substeps', 'solver', 'iterations', 'tolerance', 'render', 'backend')
+
+
+def bench_config(urdf_path: str = DEFAULT_URDF, n_envs: int = 1, dt: float = 0.01,
+                 substeps: int = 10, solver: str = "Newton", iterations: int = 100,
+                 tolerance: float = 1e-5, render: bool = False, backend: str = "cpu",
+                 warmup_steps: int = 20, steps: int = 200) -> Dict[str, Any]:
+    """
+    Build a benchmark configuration dictionary.
+
+    Args:
+        urdf_path: Robot URDF
+        n_envs: Number of parallel environments (0 builds without batching)
+        dt: Simulation timestep
+        substeps: Physics substeps per step
+        solver: Rigid constraint solver name ('Newton' or 'CG')
+        iterations: Maximum constraint solver iterations
+        tolerance: Constraint solver tolerance
+        render: Render an offscreen camera every step
+        backend: Genesis backend name
+        warmup_steps: Steps run before timing starts
+        steps: Timed steps
+
+    Returns:
+        JSON-serializable configuration
+    """
+    return {
+        'urdf': os.path.abspath(urdf_path),
+        'n_envs': n_envs,
+        'dt': dt,
+        'substeps': substeps,
+        'solver': solver,
+        'iterations': iterations,
+        'tolerance': tolerance,
+        'render': render,
+        'backend': backend,
+        'warmup_steps': warmup_steps,
+        'steps': steps,
+    }
+
+
+def bench_key(config: Dict[str, Any]) -> str:
+    """
+    Short identifier of a configuration that does not depend on where it ran.
+
+    The URDF enters by file name only, so results recorded in another
+    checkout or CI workspace match.
+
+    Args:
+        config: Configuration from bench_config
+
+    Returns:
+        Hex digest prefix
+    """
+    payload = {key: config[key] for key in KEY_SETTINGS}
+    payload['urdf'] = os.path.basename(config['urdf'])
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode()).hexdigest()[:12]
+
+
+def sweep_configs(urdf_path: str = DEFAULT_URDF, n_envs: List[int] = (1,),
+                  timesteps: List[tuple] = ((0.01, 10),), solvers: List[str] = ("Newton",),
+                  iterations: List[int] = (100,), render: List[bool] = (False,),
+                  **kwargs) -> List[Dict[str, Any]]:
+    """
+    Cartesian product of benchmark settings.
+
+    Args:
+        urdf_path: Robot URDF
+        n_envs: Environment counts
+        timesteps: (dt, substeps) pairs
+        solvers: Constraint solver names
+        iterations: Constraint solver iteration limits
+        render: Rendering on/off values
+        **kwargs: Fixed bench_config arguments
+
+    Returns:
+        List of configurations
+    """
+    return [
+        bench_config(urdf_path, n, dt, substeps, solver, iters, render=r, **kwargs)
+        for n, (dt, substeps), solver, iters, r
+        in itertools.product(n_envs, timesteps, solvers, iterations, render)
+    ]
+
+
+def latency_stats(samples_ns: List[int]) -> Dict[str, float]:
+    """
+    Statistics of repeated timings.
+
+    Args:
+        samples_ns: Wall-clock durations in nanoseconds
+
+    Returns:
+        Dictionary with mean/p50/p99/min/max/std in milliseconds
+    """
+    ms = np.asarray(samples_ns, dtype=np.float64) / 1e6
+    return {
+        'mean_ms': float(ms.mean()),
+        'p50_ms': float(np.percentile(ms, 50)),
+        'p99_ms': float(np.percentile(ms, 99)),
+        'min_ms': float(ms.min()),
+        'max_ms': float(ms.max()),
+        'std_ms': float(ms.std()),
+    }
+
+
+def summarize_latencies(samples_ns: List[int], n_envs: int) -> Dict[str, float]:
+    """
+    Latency statistics of timed steps.
+
+    Args:
+        samples_ns: Per-step wall-clock durations in nanoseconds
+        n_envs: Environments advanced per step
+
+    Returns:
+        latency_stats extended with env_steps_per_s
+    """
+    stats = latency_stats(samples_ns)
+    stats['env_steps_per_s'] = max(n_envs, 1) * len(samples_ns) / (sum(samples_ns) / 1e9)
+    return stats
+
+
+def environment_info() -> Dict[str, Any]:
+    """Versions and machine information stored with every result."""
+    info = {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+    }
+    for module_name in ('genesis', 'torch', 'numpy'):
+        module = sys.modules.get(module_name)
+        if module is not None:
+            info[f'{module_name}_version'] = getattr(module, '__version__', 'unknown')
+    return info
+
+
+def run_benchmark(config: Dict[str, Any], verbose: bool = False) -> Dict[str, Any]:
+    """
+    Build the scene in this process and time the step loop.
+
+    Each timed step issues a hold-position PD command and scene.step(), plus
+    a camera render if enabled, which is what a training loop pays per step.
+
+    Args:
+        config: Configuration from bench_config
+        verbose: Whether to print progress
+
+    Returns:
+        Dictionary with the configuration, latency statistics and environment info
+    """
+    import genesis as gs
+    import torch
+
+    gs.init(backend=getattr(gs, config['backend']), logging_level="warning")
+
+    scene = gs.Scene(
+        sim_options=gs.options.SimOptions(dt=config['dt'], substeps=config['substeps']),
+        rigid_options=gs.options.RigidOptions(
+            constraint_solver=getattr(gs.constraint_solver, config['solver']),
+            iterations=config['iterations'],
+            tolerance=config['tolerance'],
+        ),
+        show_viewer=False,
+    )
+    scene.add_entity(gs.morphs.Plane())
+    robot = scene.add_entity(gs.morphs.URDF(file=config['urdf'], pos=(0, 0, 0.8)))
+    camera = None
+    if config['render']:
+        camera = scene.add_camera(res=(320, 240), pos=(3.0, -3.0, 2.0),
+                                  lookat=(0.0, 0.0, 0.6), fov=40, GUI=False)
+
+    if config['n_envs'] > 0:
+        scene.build(n_envs=config['n_envs'])
+    else:
+        scene.build()
+
+    targets = robot.get_dofs_position().clone()
+    synchronize = torch.cuda.synchronize if str(gs.device).startswith('cuda') else (lambda: None)
+
+    def step():
+        robot.control_dofs_position(targets)
+        scene.step()
+        if camera is not None:
+            camera.render()
+
+    for _ in range(config['warmup_steps']):
+        step()
+    synchronize()
+
+    samples = []
+    for i in range(config['steps']):
+        start = time.perf_counter_ns()
+        step()
+        synchronize()
+        samples.append(time.perf_counter_ns() - start)
+        if verbose and (i + 1) % 100 == 0:
+            print(f"  {i + 1}/{config['steps']} steps", file=sys.stderr)
+
+    return {
+        'version': BENCH_VERSION,
+        'key': bench_key(config),
+        'config': config,
+        'stats': summarize_latencies(samples, config['n_envs']),
+        'environment': environment_info(),
+    }
+
+
+def run_isolated(config: Dict[str, Any], command: str = "throughput",
+                 timeout: float = 3600.0) -> Dict[str, Any]:
+    """
+    Run one benchmark configuration in a fresh Python process.
+
+    Args:
+        config: Benchmark configuration
+        command: Benchmark command whose --child mode runs the configuration
+        timeout: Seconds before the child is killed
+
+    Returns:
+        JSON result printed by the child
+    """
+    env = dict(os.environ)
+    env['PYTHONPATH'] = os.pathsep.join(filter(None, [PROJECT_ROOT, env.get('PYTHONPATH')]))
+    output = subprocess.run(
+        [sys.executable, "-m", "benchmarks", command, "--child", json.dumps(config)],
+        cwd=PROJECT_ROOT, env=env, capture_output=True, text=True, timeout=timeout, check=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def git_revision() -> Optional[str]:
+    """Current git commit of the project, if available."""
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], cwd=PROJECT_ROOT,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def save_results(results: List[Dict[str, Any]], path: str) -> Dict[str, Any]:
+    """
+    Write benchmark results to a JSON file (atomically).
+
+    Args:
+        results: Results from run_benchmark
+        path: Output file
+
+    Returns:
+        The written document
+    """
+    document = {
+        'version': BENCH_VERSION,
+        'timestamp': time.time(),
+        'git_revision': git_revision(),
+        'results': {result['key']: result for result in results},
+    }
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(document, f, indent=1)
+    os.replace(tmp_path, path)
+    return document
+
+
+def compare_results(current: Dict[str, Any], baseline: Dict[str, Any],
+                    threshold: float = DEFAULT_THRESHOLD) -> List[Dict[str, Any]]:
+    """
+    Compare two result documents configuration by configuration.
+
+    A configuration regresses when its p50 or mean step latency grows by
+    more than `threshold` (relative). p99 is reported but not gated, since
+    single outliers make it noisy on shared machines.
+
+    Args:
+        current: Document from save_results
+        baseline: Baseline document from save_results
+        threshold: Allowed relative slowdown
+
+    Returns:
+        One row per configuration
+
+    Raises:
+        ValueError: If the versions differ, a current configuration has no
+            baseline result, or nothing was compared
+    """
+    if current.get('version') != baseline.get('version'):
+        raise ValueError(f"Cannot compare benchmark versions "
+                         f"{current.get('version')} and {baseline.get('version')}")
+    missing = [describe(result['config']) for key, result in current['results'].items()
+               if key not in baseline['results']]
+    if missing:
+        raise ValueError("Configurations missing from the baseline: " + "; ".join(missing))
+    if not current['results']:
+        raise ValueError("No configurations to compare")
+
+    rows = []
+    for key, result in current['results'].items():
+        new, old = result['stats'], baseline['results'][key]['stats']
+        change = {metric: new[metric] / old[metric] - 1.0
+                  for metric in ('mean_ms', 'p50_ms', 'p99_ms')}
+        rows.append({
+            'key': key,
+            'config': result['config'],
+            'change': change,
+            'env_steps_per_s': (old['env_steps_per_s'], new['env_steps_per_s']),
+            'regression': change['p50_ms'] > threshold or change['mean_ms'] > threshold,
+        })
+    return rows
+
+
+def describe(config: Dict[str, Any]) -> str:
+    """One-line description of a configuration."""
+    return (f"n_envs={config['n_envs']:<5} dt={config['dt']:<6} substeps={config['substeps']:<3} "
+            f"{config['solver']}/{config['iterations']:<4} render={'on' if config['render'] else 'off'}")
+
+
+def print_result(result: Dict[str, Any]):
+    """Print the statistics of one configuration."""
+    stats = result['stats']
+    print(f"{result['key']} {describe(result['config'])}  "
+          f"mean {stats['mean_ms']:7.2f} ms  p50 {stats['p50_ms']:7.2f} ms  "
+          f"p99 {stats['p99_ms']:7.2f} ms  {stats['env_steps_per_s']:10.1f} env-steps/s")
+
+
+def print_comparison(rows: List[Dict[str, Any]], threshold: float):
+    """Print a comparison table."""
+    print(f"Comparison against baseline (threshold {threshold * 100:.0f}%):")
+    for row in rows:
+        change = row['change']
+        old, new = row['env_steps_per_s']
+        flag = "REGRESSION" if row['regression'] else "ok"
+        print(f"  {row['key']} {describe(row['config'])}  "
+              f"mean {change['mean_ms'] * 100:+6.1f}%  p50 {change['p50_ms'] * 100:+6.1f}%  "
+              f"p99 {change['p99_ms'] * 100:+6.1f}%  {old:.0f} -> {new:.0f} env-steps/s  {flag}")
+
+
+def _timestep(value: str) -> tuple:
+    dt, substeps = value.split(":")
+    return float(dt), int(substeps)
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks throughput",
+                                     description="Benchmark simulation step throughput")
+    parser.add_argument("--urdf", default=DEFAULT_URDF)
+    parser.add_argument("--n-envs", type=int, nargs="+", default=[1, 64, 256])
+    parser.add_argument("--timestep", type=_timestep, nargs="+", default=[(0.01, 10)],
+                        metavar="DT:SUBSTEPS")
+    parser.add_argument("--solver", nargs="+", default=["Newton"], choices=["Newton", "CG"])
+    parser.add_argument("--iterations", type=int, nargs="+", default=[100])
+    parser.add_argument("--render", choices=["off", "on", "both"], default="off")
+    parser.add_argument("--backend", default="cpu")
+    parser.add_argument("--warmup-steps", type=int, default=20)
+    parser.add_argument("--steps", type=int, default=200)
+    parser.add_argument("--output", default=DEFAULT_RESULTS_PATH)
+    parser.add_argument("--compare", default=None, metavar="BASELINE",
+                        help="Baseline JSON; exit with status 1 on regression")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD)
+    parser.add_argument("--child", default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.child:
+        # Runs inside the fresh interpreter started by run_isolated
+        print(json.dumps(run_benchmark(json.loads(args.child), verbose=True)))
+        return
+
+    render = {'off': [False], 'on': [True], 'both': [False, True]}[args.render]
+    configs = sweep_configs(args.urdf, args.n_envs, args.timestep, args.solver, args.iterations,
+                            render, backend=args.backend, warmup_steps=args.warmup_steps,
+                            steps=args.steps)
+
+    print(f"Running {len(configs)} throughput configurations on {args.backend}")
+    results = []
+    for config in configs:
+        result = run_isolated(config)
+        results.append(result)
+        print_result(result)
+
+    document = save_results(results, args.output)
+    print(f"Results written to {args.output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        try:
+            rows = compare_results(document, baseline, args.threshold)
+        except ValueError as e:
+            print(f"Comparison failed: {e}")
+            sys.exit(1)
+        print_comparison(rows, args.threshold)
+        if any(row['regression'] for row in rows):
+            sys.exit(1)
@@ -0,0 +1,50 @@
+"""
+Humanoid Learning for Genesis
+
+Provides batched reinforcement learning for humanoid robots: a G1
+locomotion environment with a vectorized curriculum, an on-device PPO
+trainer with running observation normalization, asynchronous
+checkpointing, a batched policy inference engine for the control loop,
+sharded transition datasets for offline learning, a reference motion
+library for imitation, and a parallel evaluation runner.
+"""
+
+__version__ = "0.1.0"
+__author__ = "Genesis Humanoid Learning Project"
+
+from .env import G1Env
+from .curriculum import Curriculum, DEFAULT_CURRICULUM_TERMS
+from .storage import RolloutStorage, PinnedRolloutBuffer, compute_gae
+from .checkpoint import CheckpointManager
+from .normalizer import RunningNormalizer
+from .ppo import ActorCritic, PPO, PPOTrainer
+from .inference import PolicyRunner, export_policy, load_actor, pin_cpu_threads
+from .dataset import ShardWriter, ShardedDataset, make_loader
+from .motion import MotionLibrary, save_clip
+from .evaluate import evaluation_jobs, run_evaluation, summarize
+
+__all__ = [
+    'G1Env',
+    'Curriculum',
+    'DEFAULT_CURRICULUM_TERMS',
+    'RolloutStorage',
+    'PinnedRolloutBuffer',
+    'compute_gae',
+    'ActorCritic',
+    'PPO',
+    'PPOTrainer',
+    'CheckpointManager',
+    'RunningNormalizer',
+    'PolicyRunner',
+    'export_policy',
+    'load_actor',
+    'pin_cpu_threads',
+    'ShardWriter',
+    'ShardedDataset',
+    'make_loader',
+    'MotionLibrary',
+    'save_clip',
+    'evaluation_jobs',
+    'run_evaluation',
+    'summarize'
+]
@@ -0,0 +1,26 @@
+"""
+Command line entry point: python -m humanoid_learning <command> [options]
+"""
+
+import sys
+
+from . import dataset, evaluate, inference, ppo
+
+
+COMMANDS = {
+    'train': ppo.main,
+    'infer': inference.main,
+    'dataset': dataset.main,
+    'evaluate': evaluate.main,
+}
+
+
+def main():
+    if len(sys.argv) < 2 or sys.argv[1] not in COMMANDS:
+        print(f"Usage: python -m humanoid_learning {{{','.join(COMMANDS)}}} [options]")
+        sys.exit(2)
+    COMMANDS[sys.argv[1]](sys.argv[2:])
+
+
+if __name__ == "__main__":
+    main()
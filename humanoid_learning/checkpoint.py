@@ -0,0 +1,243 @@
+"""
+Asynchronous checkpointing of training and simulator state.
+
+CheckpointManager.save copies the policy/optimizer state and an optional
+environment snapshot into host memory (one device sync) and returns; a
+background thread serializes the copy with torch.save, renames it into
+place atomically, updates the manifest and applies the retention
+policy. Training only waits when the writer falls more than max_pending
+checkpoints behind.
+"""
+
+import glob
+import json
+import os
+import queue
+import re
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+import torch
+
+from sim_tools.snapshot import SceneSnapshot
+
+
+MANIFEST_NAME = "checkpoints.json"
+
+
+def to_host(obj: Any) -> Any:
+    """
+    Copy every tensor in a nested structure to host memory.
+
+    Device tensors are copied asynchronously into pinned memory and
+    synchronized once; host tensors are cloned so later in-place updates
+    by the trainer do not leak into the checkpoint.
+
+    Args:
+        obj: Tensors, dicts, lists, tuples and plain values
+
+    Returns:
+        Structure of the same shape with CPU tensors
+    """
+    synced = []
+
+    def copy(value):
+        if isinstance(value, torch.Tensor):
+            value = value.detach()
+            if value.device.type == 'cpu':
+                return value.clone()
+            synced.append(value.device)
+            return value.to('cpu', non_blocking=True)
+        if isinstance(value, SceneSnapshot):
+            return SceneSnapshot.from_state_dict(copy(value.state_dict()))
+        if isinstance(value, dict):
+            return {key: copy(item) for key, item in value.items()}
+        if isinstance(value, (list, tuple)):
+            return type(value)(copy(item) for item in value)
+        return value
+
+    result = copy(obj)
+    for device in set(synced):
+        if device.type == 'cuda':
+            torch.cuda.synchronize(device)
+    return result
+
+
+class CheckpointManager:
+    """
+    Non-blocking checkpoint writer with retention and resume.
+
+    Usage:
+        manager = CheckpointManager("runs/g1_walk", keep_last=5, keep_every=500)
+        manager.save(iteration, trainer.state_dict(), env_state=env.snapshot())
+        ...
+        manager.close()
+
+        state = manager.resume(trainer, env)    # latest checkpoint
+    """
+
+    def __init__(self, directory: str, keep_last: int = 5, keep_every: Optional[int] = None,
+                 prefix: str = "checkpoint", max_pending: int = 1, verbose: bool = True):
+        """
+        Initialize the manager and start the writer thread.
+
+        Args:
+            directory: Checkpoint directory
+            keep_last: Most recent checkpoints kept
+            keep_every: Also keep checkpoints whose step is a multiple of this
+            prefix: File name prefix ('<prefix>_<step>.pt')
+            max_pending: Checkpoints held in memory while the writer is busy;
+                save() blocks beyond that
+            verbose: Whether to print when a checkpoint is written
+        """
+        self.directory = directory
+        self.keep_last = keep_last
+        self.keep_every = keep_every
+        self.prefix = prefix
+        self.verbose = verbose
+        self._queue = queue.Queue(maxsize=max_pending)
+        self._error = None
+        self._lock = threading.Lock()
+        self._thread = threading.Thread(target=self._writer, name="checkpoint-writer", daemon=True)
+        self._thread.start()
+
+    def path(self, step: int) -> str:
+        """Checkpoint path of a step."""
+        return os.path.join(self.directory, f"{self.prefix}_{step}.pt")
+
+    def _writer(self):
+        while True:
+            item = self._queue.get()
+            try:
+                if item is None:
+                    return
+                step, state = item
+                start = time.perf_counter()
+                path = self.path(step)
+                os.makedirs(self.directory, exist_ok=True)
+                tmp_path = path + ".tmp"
+                torch.save(state, tmp_path)
+                os.replace(tmp_path, path)
+                self._update_manifest(step)
+                if self.verbose:
+                    print(f"Checkpoint {path} written in {time.perf_counter() - start:.2f}s")
+            except Exception as e:
+                with self._lock:
+                    self._error = e
+            finally:
+                self._queue.task_done()
+
+    def _raise_error(self):
+        with self._lock:
+            error, self._error = self._error, None
+        if error is not None:
+            raise RuntimeError("Background checkpoint write failed") from error
+
+    def steps(self) -> List[int]:
+        """Steps of the checkpoints on disk, oldest first."""
+        pattern = re.compile(re.escape(self.prefix) + r"_(\d+)\.pt$")
+        steps = []
+        for path in glob.glob(os.path.join(self.directory, f"{self.prefix}_*.pt")):
+            match = pattern.search(os.path.basename(path))
+            if match:
+                steps.append(int(match.group(1)))
+        return sorted(steps)
+
+    def _update_manifest(self, latest: int):
+        """Apply the retention policy and record the latest checkpoint."""
+        steps = self.steps()
+        keep = set(steps[-self.keep_last:]) if self.keep_last else set(steps)
+        if self.keep_every:
+            keep.update(step for step in steps if step % self.keep_every == 0)
+        keep.add(latest)
+        for step in steps:
+            if step not in keep:
+                os.remove(self.path(step))
+
+        manifest_path = os.path.join(self.directory, MANIFEST_NAME)
+        tmp_path = manifest_path + ".tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump({'latest': os.path.basename(self.path(latest)), 'latest_step': latest,
+                       'checkpoints': [os.path.basename(self.path(s)) for s in sorted(keep)]}, f, indent=1)
+        os.replace(tmp_path, manifest_path)
+
+    def save(self, step: int, state: Dict[str, Any], env_state: Optional[SceneSnapshot] = None):
+        """
+        Snapshot state into host memory and queue it for writing.
+
+        Args:
+            step: Training step or iteration (used in the file name)
+            state: Trainer state, e.g. PPOTrainer.state_dict()
+            env_state: Optional environment snapshot, e.g. G1Env.snapshot()
+        """
+        self._raise_error()
+        payload = {'step': step, 'trainer': state}
+        if env_state is not None:
+            payload['env'] = env_state.state_dict()
+        self._queue.put((step, to_host(payload)))
+
+    def wait(self):
+        """Block until every queued checkpoint is on disk."""
+        self._queue.join()
+        self._raise_error()
+
+    def close(self):
+        """Write pending checkpoints and stop the writer thread."""
+        if self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join()
+        self._raise_error()
+
+    def latest(self) -> Optional[str]:
+        """Path of the most recent checkpoint, or None."""
+        manifest_path = os.path.join(self.directory, MANIFEST_NAME)
+        if os.path.exists(manifest_path):
+            with open(manifest_path) as f:
+                path = os.path.join(self.directory, json.load(f)['latest'])
+            if os.path.exists(path):
+                return path
+        steps = self.steps()
+        return self.path(steps[-1]) if steps else None
+
+    def load(self, path: Optional[str] = None, map_location='cpu') -> Dict[str, Any]:
+        """
+        Read a checkpoint.
+
+        Args:
+            path: Checkpoint file (default: the latest)
+            map_location: Device for the loaded tensors
+
+        Returns:
+            Dictionary with 'step', 'trainer' and optionally 'env'
+        """
+        path = path or self.latest()
+        if path is None:
+            raise FileNotFoundError(f"No checkpoints in {self.directory}")
+        return torch.load(path, map_location=map_location, weights_only=False)
+
+    def resume(self, trainer, env=None, path: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Restore a trainer and, if the checkpoint has one, the environment state.
+
+        Args:
+            trainer: Object with load_state_dict (e.g. PPOTrainer)
+            env: Object with restore(SceneSnapshot) (e.g. G1Env), optional
+            path: Checkpoint file (default: the latest)
+
+        Returns:
+            The loaded checkpoint
+        """
+        checkpoint = self.load(path, map_location=getattr(trainer, 'device', 'cpu'))
+        trainer.load_state_dict(checkpoint['trainer'])
+        if env is not None and 'env' in checkpoint:
+            snapshot = SceneSnapshot.from_state_dict(checkpoint['env'])
+            env.restore(snapshot.to(env.device))
+        return checkpoint
+
+    def __enter__(self) -> 'CheckpointManager':
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
@@ -0,0 +1,163 @@
+"""
+Vectorized curriculum over per-env difficulty levels.
+
+Every env holds one integer level per curriculum term (terrain
+roughness, push strength, command speed, ...) in an (n_envs, n_terms)
+tensor. Levels map to values through a (num_levels, n_terms) table.
+Promotion and demotion of all envs whose episodes ended is one masked
+tensor update, and new values only take effect for envs that are
+resetting, so running episodes keep the difficulty they started with.
+"""
+
+from typing import Dict, Optional, Sequence, Tuple, Union
+
+import numpy as np
+import torch
+
+
+# Value range per term, from level 0 to the top level
+DEFAULT_CURRICULUM_TERMS = {
+    'terrain_roughness': (0.0, 0.10),  # Peak-to-peak height noise (m)
+    'push_strength': (0.0, 1.0),       # Maximum horizontal push velocity (m/s)
+    'command_speed': (0.3, 1.0),       # Fraction of the command ranges
+}
+
+
+class Curriculum:
+    """
+    Per-env difficulty levels with batched promotion and demotion.
+
+    Usage:
+        curriculum = Curriculum(env.n_envs, device=env.device)
+        ...
+        curriculum.update(dones, score)   # score in [0, 1] per env
+        curriculum.apply(dones)           # new values for resetting envs
+        push = curriculum.value('push_strength')
+    """
+
+    def __init__(self, n_envs: int, terms: Optional[Dict[str, Tuple[float, float]]] = None,
+                 num_levels: int = 10, max_init_level: int = 0, promote_threshold: float = 0.8,
+                 demote_threshold: float = 0.4, device='cpu'):
+        """
+        Initialize the levels.
+
+        Args:
+            n_envs: Number of parallel environments
+            terms: Value range (level 0, top level) per term
+                (default: DEFAULT_CURRICULUM_TERMS)
+            num_levels: Levels per term
+            max_init_level: Envs start at a uniform random level up to this one
+            promote_threshold: Episode score at or above which an env moves up
+            demote_threshold: Episode score below which an env moves down
+            device: Device of the level tensors
+        """
+        terms = terms if terms is not None else DEFAULT_CURRICULUM_TERMS
+        if num_levels < 2:
+            raise ValueError("A curriculum needs at least 2 levels")
+        self.names = list(terms)
+        self.n_envs = n_envs
+        self.num_levels = num_levels
+        self.promote_threshold = promote_threshold
+        self.demote_threshold = demote_threshold
+        self.device = torch.device(device)
+
+        ranges = torch.tensor([terms[name] for name in self.names], dtype=torch.float32, device=self.device)
+        fraction = torch.linspace(0.0, 1.0, num_levels, device=self.device)[:, None]
+        self.table = ranges[:, 0] + (ranges[:, 1] - ranges[:, 0]) * fraction
+        self._term_idx = torch.arange(len(self.names), device=self.device)
+
+        self.levels = torch.randint(0, max_init_level + 1, (n_envs, len(self.names)), device=self.device)
+        self.values = self.table[self.levels, self._term_idx]
+
+    def index(self, name: str) -> int:
+        """Column of a term in levels and values."""
+        return self.names.index(name)
+
+    def value(self, name: str) -> torch.Tensor:
+        """Applied value of a term per env (n_envs,)."""
+        return self.values[:, self.index(name)]
+
+    def level(self, name: str) -> torch.Tensor:
+        """Current level of a term per env (n_envs,)."""
+        return self.levels[:, self.index(name)]
+
+    def update(self, mask: torch.Tensor, score: Union[torch.Tensor, Dict[str, torch.Tensor]]):
+        """
+        Promote or demote the envs selected by mask from their episode scores.
+
+        Args:
+            mask: Bool tensor (n_envs,), usually the envs whose episodes ended
+            score: Episode score per env (n_envs,) used for every term, or a
+                dict of per-term scores (terms without a score stay put)
+        """
+        if isinstance(score, dict):
+            nan = torch.full((self.n_envs,), float('nan'), device=self.device)
+            score = torch.stack([score.get(name, nan) for name in self.names], dim=-1)
+        elif score.dim() == 1:
+            score = score[:, None]
+        # NaN scores compare False both ways and leave the level unchanged
+        step = (score >= self.promote_threshold).long() - (score < self.demote_threshold).long()
+        self.levels.add_(step * mask[:, None]).clamp_(0, self.num_levels - 1)
+
+    def apply(self, mask: torch.Tensor):
+        """
+        Make the current levels take effect for the envs selected by mask.
+
+        Args:
+            mask: Bool tensor (n_envs,), the envs being reset
+        """
+        self.values = torch.where(mask[:, None], self.table[self.levels, self._term_idx], self.values)
+
+    def mean_levels(self) -> Dict[str, torch.Tensor]:
+        """Mean level per term as device scalars (no host sync)."""
+        means = self.levels.float().mean(0)
+        return {name: means[i] for i, name in enumerate(self.names)}
+
+    def state_dict(self) -> Dict[str, torch.Tensor]:
+        return {'levels': self.levels, 'values': self.values}
+
+    def load_state_dict(self, state: Dict[str, torch.Tensor]):
+        self.levels.copy_(state['levels'])
+        self.values.copy_(state['values'])
+
+
+def roughness_heightfield(roughness: Sequence[float], tile_size: float = 8.0, tiles_per_level: int = 4,
+                          horizontal_scale: float = 0.1, vertical_scale: float = 0.005,
+                          spawn_radius: float = 0.5, seed: int = 0):
+    """
+    Heightfield with one row of random rough tiles per curriculum level.
+
+    Level i occupies the i-th tile row along x and has uniform height
+    noise of peak-to-peak roughness[i]. The spawn height of each tile is
+    the highest point within spawn_radius of its center.
+
+    Args:
+        roughness: Peak-to-peak height noise per level (m)
+        tile_size: Tile edge length (m)
+        tiles_per_level: Tiles per level along y
+        horizontal_scale: Heightfield cell size (m)
+        vertical_scale: Height unit of the heightfield (m)
+        spawn_radius: Radius around the tile center considered for spawning (m)
+        seed: Random seed
+
+    Returns:
+        Tuple of (height_field, origins). height_field is an int16 array
+        in vertical_scale units with its origin at (0, 0). origins is a
+        (num_levels, tiles_per_level, 3) float32 array of tile centers
+        with the spawn height as z.
+    """
+    rng = np.random.default_rng(seed)
+    cells = int(round(tile_size / horizontal_scale))
+    num_levels = len(roughness)
+    height_field = np.zeros((num_levels * cells, tiles_per_level * cells), dtype=np.int16)
+    origins = np.zeros((num_levels, tiles_per_level, 3), dtype=np.float32)
+    r = max(1, int(round(spawn_radius / horizontal_scale)))
+    c = cells // 2
+    for i, amplitude in enumerate(roughness):
+        half = int(round(0.5 * amplitude / vertical_scale))
+        for j in range(tiles_per_level):
+            tile = rng.integers(-half, half + 1, size=(cells, cells)) if half > 0 else np.zeros((cells, cells))
+            height_field[i * cells:(i + 1) * cells, j * cells:(j + 1) * cells] = tile
+            origins[i, j] = ((i + 0.5) * tile_size, (j + 0.5) * tile_size,
+                             tile[c - r:c + r + 1, c - r:c + r + 1].max() * vertical_scale)
+    return height_field, origins
@@ -0,0 +1,362 @@
+"""
+Sharded transition datasets for offline and imitation learning.
+
+ShardWriter streams (obs, action, reward, done, info) batches from a
+batched environment into fixed-size shards. Each shard is a directory
+with one .npy file per field, and a manifest describes the fields and
+shards. ShardedDataset memory-maps the shards and yields shuffled
+minibatches from worker processes. Each worker only keeps a few shard
+index permutations and one batch in RAM; the page cache holds the rest.
+"""
+
+import argparse
+import json
+import os
+import shutil
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence
+
+import numpy as np
+import torch
+
+
+MANIFEST_NAME = "manifest.json"
+DATASET_VERSION = 1
+
+
+def _to_numpy(value) -> np.ndarray:
+    if isinstance(value, torch.Tensor):
+        return value.detach().cpu().numpy()
+    return np.asarray(value)
+
+
+def _flatten_infos(infos: Dict[str, Any], n_rows: int, prefix: str = "info/") -> Dict[str, Any]:
+    """Per-env entries of a (nested) infos dict, keyed 'info/<path>'."""
+    flat = {}
+    for key, value in infos.items():
+        if isinstance(value, dict):
+            flat.update(_flatten_infos(value, n_rows, f"{prefix}{key}/"))
+        elif hasattr(value, 'shape') and len(value.shape) >= 1 and value.shape[0] == n_rows:
+            flat[prefix + key] = value
+    return flat
+
+
+class ShardWriter:
+    """
+    Stream batched transitions into fixed-size .npy shards.
+
+    Usage:
+        with ShardWriter("datasets/g1_walk", shard_size=1 << 20) as writer:
+            for _ in range(n_steps):
+                actions = policy(obs)
+                next_obs, rewards, dones, infos = env.step(actions)
+                writer.add(obs, actions, rewards, dones, infos)
+                obs = next_obs
+    """
+
+    def __init__(self, directory: str, shard_size: int = 1 << 20,
+                 info_keys: Optional[Sequence[str]] = ('time_outs',), overwrite: bool = False):
+        """
+        Initialize the writer (buffers are allocated on the first add).
+
+        Args:
+            directory: Output directory
+            shard_size: Transitions per shard
+            info_keys: infos entries to store (nested keys joined with '/'),
+                None for every per-env entry
+            overwrite: Replace an existing dataset in directory (only its
+                manifest and shards are removed)
+
+        Raises:
+            FileExistsError: If a dataset exists and overwrite is False, or if
+                overwrite is set for a non-empty directory without a manifest
+        """
+        manifest = os.path.join(directory, MANIFEST_NAME)
+        if os.path.exists(manifest) and not overwrite:
+            raise FileExistsError(f"Dataset already exists: {directory}")
+        if overwrite and os.path.isdir(directory):
+            if not os.path.exists(manifest) and os.listdir(directory):
+                raise FileExistsError(f"Not a dataset (no {MANIFEST_NAME}), refusing to overwrite: {directory}")
+            for name in os.listdir(directory):
+                path = os.path.join(directory, name)
+                if name.startswith("shard_") and os.path.isdir(path):
+                    shutil.rmtree(path)
+                elif name in (MANIFEST_NAME, MANIFEST_NAME + ".tmp"):
+                    os.remove(path)
+        os.makedirs(directory, exist_ok=True)
+
+        self.directory = directory
+        self.shard_size = shard_size
+        self.info_keys = None if info_keys is None else {f"info/{key}" for key in info_keys}
+        self.fields: Dict[str, Dict[str, Any]] = {}
+        self.shards: List[Dict[str, Any]] = []
+        self.buffers: Dict[str, np.ndarray] = {}
+        self.fill = 0
+        self.total = 0
+
+    def _allocate(self, batch: Dict[str, np.ndarray]):
+        for name, value in batch.items():
+            self.fields[name] = {'dtype': value.dtype.str, 'shape': list(value.shape[1:])}
+            self.buffers[name] = np.empty((self.shard_size,) + value.shape[1:], dtype=value.dtype)
+
+    def add(self, obs, actions, rewards, dones, infos: Optional[Dict[str, Any]] = None,
+            next_obs=None):
+        """
+        Append one step of a batched environment (one transition per env).
+
+        Args:
+            obs: Observations the actions were taken from (n_envs, obs_dim)
+            actions: Actions (n_envs, action_dim)
+            rewards: Rewards (n_envs,)
+            dones: Episode ends (n_envs,)
+            infos: Env infos; per-env entries selected by info_keys are stored
+            next_obs: Optional observations after the step (n_envs, obs_dim)
+        """
+        n_rows = obs.shape[0]
+        batch = {'obs': obs, 'action': actions, 'reward': rewards, 'done': dones}
+        if next_obs is not None:
+            batch['next_obs'] = next_obs
+        for key, value in _flatten_infos(infos or {}, n_rows).items():
+            if self.info_keys is None or key in self.info_keys:
+                batch[key] = value
+        batch = {name: _to_numpy(value) for name, value in batch.items()}
+
+        if not self.fields:
+            self._allocate(batch)
+        elif batch.keys() != self.fields.keys():
+            raise ValueError(f"Fields changed: {sorted(batch)} != {sorted(self.fields)}")
+
+        start = 0
+        while start < n_rows:
+            count = min(n_rows - start, self.shard_size - self.fill)
+            for name, value in batch.items():
+                self.buffers[name][self.fill:self.fill + count] = value[start:start + count]
+            self.fill += count
+            start += count
+            if self.fill == self.shard_size:
+                self.flush()
+
+    def flush(self):
+        """Write the buffered transitions as a shard (possibly smaller than shard_size)."""
+        if self.fill == 0:
+            return
+        name = f"shard_{len(self.shards):06d}"
+        tmp_dir = os.path.join(self.directory, name + ".tmp")
+        os.makedirs(tmp_dir, exist_ok=True)
+        for field, buffer in self.buffers.items():
+            np.save(os.path.join(tmp_dir, field.replace('/', '__') + ".npy"), buffer[:self.fill])
+        os.replace(tmp_dir, os.path.join(self.directory, name))
+
+        self.shards.append({'name': name, 'size': self.fill})
+        self.total += self.fill
+        self.fill = 0
+        self._write_manifest()
+
+    def _write_manifest(self):
+        path = os.path.join(self.directory, MANIFEST_NAME)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump({'version': DATASET_VERSION, 'shard_size': self.shard_size, 'total': self.total,
+                       'fields': self.fields, 'shards': self.shards}, f, indent=1)
+        os.replace(tmp_path, path)
+
+    def close(self):
+        """Write the last partial shard."""
+        self.flush()
+
+    def __enter__(self) -> 'ShardWriter':
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+
+def load_manifest(directory: str) -> Dict[str, Any]:
+    """Read and check a dataset manifest."""
+    with open(os.path.join(directory, MANIFEST_NAME)) as f:
+        manifest = json.load(f)
+    if manifest.get('version') != DATASET_VERSION:
+        raise ValueError(f"Unsupported dataset version: {manifest.get('version')}")
+    return manifest
+
+
+def open_shard(directory: str, shard: Dict[str, Any], fields: Sequence[str]) -> Dict[str, np.ndarray]:
+    """Memory-map the fields of one shard."""
+    return {field: np.load(os.path.join(directory, shard['name'], field.replace('/', '__') + ".npy"),
+                           mmap_mode='r')
+            for field in fields}
+
+
+class ShardedDataset(torch.utils.data.IterableDataset):
+    """
+    Streaming reader of a ShardWriter dataset yielding shuffled minibatches.
+
+    Shards are split between DataLoader workers (and optionally between
+    distributed ranks). Each worker visits its shards in random order,
+    keeps `open_shards` of them memory-mapped at once and draws every
+    minibatch from a random open shard. Row indices within a batch are
+    sorted before the gather so reads stay close to sequential.
+    """
+
+    def __init__(self, directory: str, batch_size: int = 4096, fields: Optional[Sequence[str]] = None,
+                 open_shards: int = 4, shuffle: bool = True, drop_last: bool = True,
+                 seed: int = 0, rank: int = 0, world_size: int = 1):
+        """
+        Initialize the reader.
+
+        Args:
+            directory: Dataset directory
+            batch_size: Transitions per minibatch
+            fields: Fields to read (default: all)
+            open_shards: Shards memory-mapped at once per worker (mixing window)
+            shuffle: Shuffle shards and rows
+            drop_last: Drop each shard's final partial batch
+            seed: Base random seed (combined with the epoch)
+            rank: Distributed rank
+            world_size: Number of distributed ranks
+        """
+        super().__init__()
+        self.directory = directory
+        self.manifest = load_manifest(directory)
+        self.fields = list(fields or self.manifest['fields'])
+        self.batch_size = batch_size
+        self.open_shards = open_shards
+        self.shuffle = shuffle
+        self.drop_last = drop_last
+        self.seed = seed
+        self.rank = rank
+        self.world_size = world_size
+        self.epoch = 0
+
+    def set_epoch(self, epoch: int):
+        """Change the shuffle order (call before each epoch)."""
+        self.epoch = epoch
+
+    def __len__(self) -> int:
+        """Minibatches per epoch over all workers of this rank."""
+        shards = self.manifest['shards'][self.rank::self.world_size]
+        if self.drop_last:
+            return sum(shard['size'] // self.batch_size for shard in shards)
+        return sum(-(-shard['size'] // self.batch_size) for shard in shards)
+
+    def _batches(self, shard: Dict[str, Any], rng: np.random.Generator) -> Iterator[Dict[str, torch.Tensor]]:
+        arrays = open_shard(self.directory, shard, self.fields)
+        size = shard['size']
+        order = rng.permutation(size) if self.shuffle else np.arange(size)
+        end = size - size % self.batch_size if self.drop_last else size
+        for start in range(0, end, self.batch_size):
+            rows = np.sort(order[start:start + self.batch_size])
+            yield {field: torch.from_numpy(np.ascontiguousarray(array[rows]))
+                   for field, array in arrays.items()}
+
+    def __iter__(self) -> Iterator[Dict[str, torch.Tensor]]:
+        worker = torch.utils.data.get_worker_info()
+        worker_id, n_workers = (worker.id, worker.num_workers) if worker else (0, 1)
+        shards = self.manifest['shards'][self.rank::self.world_size][worker_id::n_workers]
+
+        rng = np.random.default_rng([self.seed, self.epoch, self.rank, worker_id])
+        if self.shuffle:
+            shards = [shards[i] for i in rng.permutation(len(shards))]
+
+        pending = iter(shards)
+        active = []
+        while True:
+            while len(active) < self.open_shards:
+                shard = next(pending, None)
+                if shard is None:
+                    break
+                active.append(self._batches(shard, rng))
+            if not active:
+                return
+            i = int(rng.integers(len(active))) if self.shuffle else 0
+            batch = next(active[i], None)
+            if batch is None:
+                active.pop(i)
+            else:
+                yield batch
+
+
+def make_loader(directory: str, batch_size: int = 4096, num_workers: int = 4,
+                pin_memory: bool = True, **kwargs) -> torch.utils.data.DataLoader:
+    """
+    DataLoader over a ShardedDataset (batches are formed by the dataset).
+
+    Args:
+        directory: Dataset directory
+        batch_size: Transitions per minibatch
+        num_workers: Reader processes
+        pin_memory: Pin batches for fast copies to the GPU
+        **kwargs: Further ShardedDataset arguments
+
+    Returns:
+        DataLoader yielding dicts of tensors
+    """
+    dataset = ShardedDataset(directory, batch_size, **kwargs)
+    return torch.utils.data.DataLoader(
+        dataset, batch_size=None, num_workers=num_workers,
+        pin_memory=pin_memory and torch.cuda.is_available(),
+        persistent_workers=num_workers > 0, prefetch_factor=2 if num_workers > 0 else None,
+    )
+
+
+def record(env, policy: Callable[[torch.Tensor], torch.Tensor], n_steps: int,
+           writer: ShardWriter, store_next_obs: bool = False):
+    """
+    Roll out a policy in a batched environment and write every transition.
+
+    Args:
+        env: Environment with reset() and step() (e.g. G1Env)
+        policy: Function from observations to actions
+        n_steps: Steps per env
+        writer: Destination
+        store_next_obs: Also store the observations after each step
+    """
+    obs = env.reset().clone()
+    with torch.no_grad():
+        for _ in range(n_steps):
+            actions = policy(obs)
+            next_obs, rewards, dones, infos = env.step(actions)
+            writer.add(obs, actions, rewards, dones, infos, next_obs if store_next_obs else None)
+            obs.copy_(next_obs)
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(prog="python -m humanoid_learning dataset",
+                                     description="Record or inspect sharded transition datasets")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    rec = commands.add_parser("record", help="Record transitions of a policy in G1Env")
+    rec.add_argument("output")
+    rec.add_argument("--policy", default=None, help="Policy checkpoint or TorchScript (default: zero actions)")
+    rec.add_argument("--n-envs", type=int, default=4096)
+    rec.add_argument("--steps", type=int, default=1000)
+    rec.add_argument("--shard-size", type=int, default=1 << 20)
+    rec.add_argument("--backend", default="gpu")
+    rec.add_argument("--next-obs", action="store_true", help="Also store next observations")
+    rec.add_argument("--overwrite", action="store_true")
+
+    info = commands.add_parser("info", help="Print a dataset manifest summary")
+    info.add_argument("directory")
+
+    args = parser.parse_args(argv)
+
+    if args.command == "info":
+        manifest = load_manifest(args.directory)
+        print(f"{args.directory}: {manifest['total']} transitions in {len(manifest['shards'])} shards")
+        for name, spec in manifest['fields'].items():
+            print(f"  {name:<24} {np.dtype(spec['dtype']).name:<8} {tuple(spec['shape'])}")
+        return
+
+    from .env import G1Env
+    from .inference import load_actor
+
+    env = G1Env(n_envs=args.n_envs, backend=args.backend)
+    if args.policy:
+        policy = load_actor(args.policy).to(env.device).eval()
+    else:
+        zeros = torch.zeros(env.n_envs, env.num_actions, device=env.device)
+        policy = lambda obs: zeros
+
+    with ShardWriter(args.output, args.shard_size, overwrite=args.overwrite) as writer:
+        record(env, policy, args.steps, writer, args.next_obs)
+    print(f"Wrote {writer.total} transitions in {len(writer.shards)} shards to {args.output}")
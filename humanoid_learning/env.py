@@ -0,0 +1,397 @@
+"""
+Batched G1 locomotion environment.
+
+One Genesis scene holds n_envs copies of the robot. Observations,
+rewards, terminations and resets are computed with tensor ops on the
+simulation device. Resets are written as masked updates over all envs,
+so a step never reads data back to the host. An optional Curriculum
+scales terrain roughness, pushes and command speed per env; new levels
+take effect as envs reset.
+"""
+
+import os
+from typing import Any, Dict, Optional, Tuple
+
+import torch
+
+from robot_grounding.urdf import parse_urdf
+from sim_tools.controller import JointController
+from sim_tools.snapshot import SceneSnapshot
+
+from .curriculum import Curriculum, roughness_heightfield
+
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_URDF = os.path.join(PROJECT_ROOT, "assets", "robots", "g1", "g1.urdf")
+
+# Reward term weights (per second; multiplied by dt)
+DEFAULT_REWARD_SCALES = {
+    'tracking_lin_vel': 1.0,
+    'tracking_ang_vel': 0.5,
+    'lin_vel_z': -2.0,
+    'ang_vel_xy': -0.05,
+    'base_height': -10.0,
+    'action_rate': -0.01,
+    'dof_vel': -1e-4,
+    'alive': 0.5,
+}
+
+# Command ranges: forward speed, lateral speed (m/s), yaw rate (rad/s)
+DEFAULT_COMMAND_RANGES = {
+    'lin_vel_x': (-0.5, 1.0),
+    'lin_vel_y': (-0.3, 0.3),
+    'ang_vel_yaw': (-0.5, 0.5),
+}
+
+
+def quat_rotate_inverse(quat: torch.Tensor, vec: torch.Tensor) -> torch.Tensor:
+    """
+    Rotate vectors by the inverse of (w, x, y, z) quaternions.
+
+    Args:
+        quat: Quaternions (..., 4)
+        vec: Vectors (..., 3)
+
+    Returns:
+        Rotated vectors (..., 3)
+    """
+    w = quat[..., :1]
+    xyz = quat[..., 1:]
+    t = 2.0 * torch.cross(xyz, vec, dim=-1)
+    return vec - w * t + torch.cross(xyz, t, dim=-1)
+
+
+class G1Env:
+    """
+    Velocity-tracking locomotion task for a batch of G1 robots.
+
+    Actions are position target offsets from the default pose, scaled by
+    action_scale and tracked by the Genesis PD controller. Episodes end
+    when the base drops below min_base_height, the robot tilts past
+    max_tilt, or the episode times out (reported separately in
+    infos['time_outs'] so the learner can bootstrap).
+    """
+
+    def __init__(self, n_envs: int = 4096, urdf_path: str = DEFAULT_URDF, dt: float = 0.01,
+                 substeps: int = 4, backend: str = "gpu", episode_length_s: float = 20.0,
+                 action_scale: float = 0.25, kp: float = 100.0, kv: float = 2.0,
+                 default_dof_pos: Optional[Dict[str, float]] = None,
+                 reward_scales: Optional[Dict[str, float]] = None,
+                 command_ranges: Optional[Dict[str, Tuple[float, float]]] = None,
+                 safety_margin: float = 0.03, min_base_height: float = 0.3,
+                 max_tilt: float = 1.0,
+                 curriculum: Optional[Dict[str, Tuple[float, float]]] = None,
+                 curriculum_levels: int = 10, push_interval_s: float = 8.0,
+                 control_mode: str = 'position', motor_saturation: bool = False,
+                 show_viewer: bool = False, verbose: bool = True):
+        """
+        Build the scene and reset every environment.
+
+        Args:
+            n_envs: Number of parallel environments
+            urdf_path: Robot URDF
+            dt: Control and simulation timestep
+            substeps: Physics substeps per step
+            backend: Genesis backend name ('gpu', 'cpu', ...), used if
+                Genesis is not initialized yet
+            episode_length_s: Episode time limit in seconds
+            action_scale: Scale from actions to position offsets (rad)
+            kp: PD position gain of every actuated joint
+            kv: PD velocity gain of every actuated joint
+            default_dof_pos: Default joint positions by joint name (others 0)
+            reward_scales: Reward term weights (see DEFAULT_REWARD_SCALES)
+            command_ranges: Command sampling ranges (see DEFAULT_COMMAND_RANGES)
+            safety_margin: Grounding margin used for the reset height
+            min_base_height: Base height below which an episode terminates
+            max_tilt: Base tilt angle (rad) beyond which an episode terminates
+            curriculum: Value range per curriculum term (see
+                DEFAULT_CURRICULUM_TERMS); 'terrain_roughness' replaces the
+                plane with rough tiles, one row per level, 'push_strength'
+                enables pushes and 'command_speed' scales the command ranges
+            curriculum_levels: Levels per curriculum term
+            push_interval_s: Interval between pushes in seconds
+            control_mode: 'position' (targets clamped to the URDF joint
+                ranges, Genesis PD) or 'torque' (PD torques computed once per
+                control step, bounded by the URDF effort limits)
+            motor_saturation: Reduce the torque limit along a linear
+                torque-speed curve (torque mode)
+            show_viewer: Whether to open the Genesis viewer
+            verbose: Whether to print setup information
+        """
+        import genesis as gs
+        from robot_grounding import RobotGroundingCalculator
+
+        if not getattr(gs, '_initialized', False):
+            gs.init(backend=getattr(gs, backend), logging_level="warning")
+
+        self.n_envs = n_envs
+        self.dt = dt
+        self.max_episode_length = int(round(episode_length_s / dt))
+        self.action_scale = action_scale
+        self.reward_scales = {name: scale * dt for name, scale in
+                              (reward_scales or DEFAULT_REWARD_SCALES).items() if scale != 0}
+        self.command_ranges = command_ranges or DEFAULT_COMMAND_RANGES
+        self.min_base_height = min_base_height
+        self.max_tilt_cos = float(torch.cos(torch.tensor(max_tilt)))
+        curriculum = curriculum or {}
+        self.push_interval = int(round(push_interval_s / dt)) if 'push_strength' in curriculum else 0
+        self.common_step_counter = 0
+
+        self.scene = gs.Scene(
+            sim_options=gs.options.SimOptions(dt=dt, substeps=substeps),
+            rigid_options=gs.options.RigidOptions(enable_self_collision=False, enable_joint_limit=True),
+            viewer_options=gs.options.ViewerOptions(max_FPS=int(1 / dt)),
+            show_viewer=show_viewer,
+        )
+        terrain_origins = None
+        if 'terrain_roughness' in curriculum:
+            low, high = curriculum['terrain_roughness']
+            roughness = [low + (high - low) * i / (curriculum_levels - 1) for i in range(curriculum_levels)]
+            height_field, terrain_origins = roughness_heightfield(roughness, horizontal_scale=0.1,
+                                                                 vertical_scale=0.005)
+            self.scene.add_entity(gs.morphs.Terrain(pos=(0.0, 0.0, 0.0), height_field=height_field,
+                                                    horizontal_scale=0.1, vertical_scale=0.005))
+        else:
+            self.scene.add_entity(gs.morphs.Plane())
+        self.robot = self.scene.add_entity(gs.morphs.URDF(file=urdf_path, pos=(0, 0, 1.0)))
+        self.scene.build(n_envs=n_envs, env_spacing=(1.0, 1.0))
+        self.device = gs.device
+        self.curriculum = (Curriculum(n_envs, curriculum, curriculum_levels, device=self.device)
+                           if curriculum else None)
+        self.terrain_origins = (torch.as_tensor(terrain_origins, device=self.device)
+                                if terrain_origins is not None else None)
+
+        model = parse_urdf(urdf_path)
+        self.dof_names = [joint.name for joint in model.dof_joints]
+        self.dofs_idx = [self.robot.get_joint(name).dof_idx_local for name in self.dof_names]
+        self.qs_idx = [self.robot.get_joint(name).q_idx_local for name in self.dof_names]
+        self.num_actions = len(self.dofs_idx)
+        self.num_obs = 12 + 3 * self.num_actions
+
+        self.controller = JointController(urdf_path, self.dof_names, kp, kv, mode=control_mode,
+                                          saturation=motor_saturation, device=self.device)
+        self.controller.configure(self.robot, self.dofs_idx)
+
+        defaults = default_dof_pos or {}
+        self.default_dof_pos = torch.tensor([defaults.get(name, 0.0) for name in self.dof_names],
+                                            dtype=torch.float32, device=self.device)
+
+        # Reset height above the spawn point from the grounding library, computed once at the default pose
+        self.robot.set_dofs_position(self.default_dof_pos.repeat(n_envs, 1), self.dofs_idx)
+        height = RobotGroundingCalculator(self.robot, verbose=False).get_grounding_height(safety_margin)
+        self.base_init_pos = torch.tensor([0.0, 0.0, height], device=self.device)
+        self.base_init_quat = torch.tensor([1.0, 0.0, 0.0, 0.0], device=self.device)
+        self.target_base_height = height - safety_margin
+
+        self._allocate()
+        self.reset()
+
+        if verbose:
+            print(f"G1Env: {n_envs} envs, {self.num_actions} actions, {self.num_obs} observations, "
+                  f"reset height {height:.3f} m")
+
+    def _allocate(self):
+        """Preallocate the per-env state buffers."""
+        n, device = self.n_envs, self.device
+        zeros = lambda *shape: torch.zeros(shape, dtype=torch.float32, device=device)
+        self.obs_buf = zeros(n, self.num_obs)
+        self.rew_buf = zeros(n)
+        self.reset_buf = torch.ones(n, dtype=torch.bool, device=device)
+        self.time_out_buf = torch.zeros(n, dtype=torch.bool, device=device)
+        self.episode_length_buf = torch.zeros(n, dtype=torch.long, device=device)
+        self.actions = zeros(n, self.num_actions)
+        self.last_actions = zeros(n, self.num_actions)
+        self.commands = zeros(n, 3)
+        # (3, 2) sampling ranges, built once so resets do not copy them to the device
+        self.command_range_buf = torch.tensor([self.command_ranges['lin_vel_x'], self.command_ranges['lin_vel_y'],
+                                               self.command_ranges['ang_vel_yaw']], device=device)
+        self.episode_sums = {name: zeros(n) for name in self.reward_scales}
+        self.gravity = torch.tensor([0.0, 0.0, -1.0], device=device).expand(n, 3)
+        self.spawn_pos = zeros(n, 3)
+
+    def _sample_commands(self, mask: torch.Tensor):
+        ranges = self.command_range_buf
+        sampled = ranges[:, 0] + (ranges[:, 1] - ranges[:, 0]) * torch.rand(self.n_envs, 3, device=self.device)
+        if self.curriculum is not None and 'command_speed' in self.curriculum.names:
+            sampled *= self.curriculum.value('command_speed')[:, None]
+        self.commands = torch.where(mask[:, None], sampled, self.commands)
+
+    def reset_mask(self, mask: torch.Tensor):
+        """
+        Reset the environments selected by a boolean mask.
+
+        The robot state of every env is rewritten, with the current state
+        kept where mask is False, so no env indices are read back. With a
+        curriculum, the reset envs take on their current levels and spawn
+        on a random tile of their terrain level.
+
+        Args:
+            mask: Bool tensor (n_envs,)
+        """
+        m = mask[:, None]
+        if self.curriculum is not None:
+            self.curriculum.apply(mask)
+        if self.terrain_origins is not None:
+            levels = self.curriculum.level('terrain_roughness')
+            tiles = torch.randint(0, self.terrain_origins.shape[1], (self.n_envs,), device=self.device)
+            self.spawn_pos = torch.where(m, self.terrain_origins[levels, tiles], self.spawn_pos)
+
+        qpos = self.robot.get_qpos()
+        dofs_vel = self.robot.get_dofs_velocity()
+        init_qpos = qpos.clone()
+        init_qpos[:, :3] = self.spawn_pos + self.base_init_pos
+        init_qpos[:, 3:7] = self.base_init_quat
+        init_qpos[:, self.qs_idx] = self.default_dof_pos
+        self.robot.set_qpos(torch.where(m, init_qpos, qpos))
+        self.robot.set_dofs_velocity(torch.where(m, torch.zeros_like(dofs_vel), dofs_vel))
+
+        self.episode_length_buf.masked_fill_(mask, 0)
+        self.actions.masked_fill_(m, 0.0)
+        self.last_actions.masked_fill_(m, 0.0)
+        for value in self.episode_sums.values():
+            value.masked_fill_(mask, 0.0)
+        self._sample_commands(mask)
+
+    def snapshot(self) -> SceneSnapshot:
+        """
+        Capture the robot state and episode buffers of every env.
+
+        Returns:
+            SceneSnapshot with the episode lengths, commands, actions, spawn
+            points and curriculum levels as extras
+        """
+        extras = {
+            'episode_length': self.episode_length_buf,
+            'commands': self.commands,
+            'actions': self.actions,
+            'last_actions': self.last_actions,
+            'spawn_pos': self.spawn_pos,
+        }
+        if self.curriculum is not None:
+            extras.update({'curriculum_' + name: value for name, value in self.curriculum.state_dict().items()})
+        return SceneSnapshot.capture({'robot': self.robot}, include_gains=False, extras=extras)
+
+    def restore(self, snapshot: SceneSnapshot):
+        """
+        Restore every env from a snapshot taken with the same n_envs.
+
+        Args:
+            snapshot: Result of snapshot()
+        """
+        extras = snapshot.restore({'robot': self.robot},
+                                  source_idx=torch.arange(self.n_envs, device=self.device))
+        self.episode_length_buf.copy_(extras['episode_length'])
+        self.commands.copy_(extras['commands'])
+        self.actions.copy_(extras['actions'])
+        self.last_actions.copy_(extras['last_actions'])
+        if 'spawn_pos' in extras:
+            self.spawn_pos.copy_(extras['spawn_pos'])
+        if self.curriculum is not None and 'curriculum_levels' in extras:
+            self.curriculum.load_state_dict({'levels': extras['curriculum_levels'],
+                                             'values': extras['curriculum_values']})
+        self._compute_observations()
+
+    def get_observations(self) -> torch.Tensor:
+        """Current observations (the env's buffer, updated in place by step)."""
+        return self.obs_buf
+
+    def reset(self) -> torch.Tensor:
+        """Reset all environments and return the observations."""
+        self.reset_mask(torch.ones(self.n_envs, dtype=torch.bool, device=self.device))
+        self._compute_observations()
+        return self.obs_buf
+
+    def _compute_observations(self):
+        quat = self.robot.get_quat()
+        self.base_lin_vel = quat_rotate_inverse(quat, self.robot.get_vel())
+        self.base_ang_vel = quat_rotate_inverse(quat, self.robot.get_ang())
+        self.projected_gravity = quat_rotate_inverse(quat, self.gravity)
+        self.base_height = self.robot.get_pos()[:, 2] - self.spawn_pos[:, 2]
+        self.dof_pos = self.robot.get_dofs_position(self.dofs_idx)
+        self.dof_vel = self.robot.get_dofs_velocity(self.dofs_idx)
+        torch.cat([
+            self.base_lin_vel * 2.0,
+            self.base_ang_vel * 0.25,
+            self.projected_gravity,
+            self.commands,
+            self.dof_pos - self.default_dof_pos,
+            self.dof_vel * 0.05,
+            self.actions,
+        ], dim=-1, out=self.obs_buf)
+
+    def _compute_rewards(self):
+        terms = {
+            'tracking_lin_vel': torch.exp(
+                -((self.commands[:, :2] - self.base_lin_vel[:, :2]) ** 2).sum(-1) / 0.25),
+            'tracking_ang_vel': torch.exp(-(self.commands[:, 2] - self.base_ang_vel[:, 2]) ** 2 / 0.25),
+            'lin_vel_z': self.base_lin_vel[:, 2] ** 2,
+            'ang_vel_xy': (self.base_ang_vel[:, :2] ** 2).sum(-1),
+            'base_height': (self.base_height - self.target_base_height) ** 2,
+            'action_rate': ((self.actions - self.last_actions) ** 2).sum(-1),
+            'dof_vel': (self.dof_vel ** 2).sum(-1),
+            'alive': torch.ones_like(self.rew_buf),
+        }
+        self.rew_buf.zero_()
+        for name, scale in self.reward_scales.items():
+            value = terms[name] * scale
+            self.rew_buf += value
+            self.episode_sums[name] += value
+
+    def _curriculum_score(self) -> torch.Tensor:
+        """Episode score in [0, 1]: velocity tracking relative to a perfect full-length episode."""
+        if 'tracking_lin_vel' in self.episode_sums:
+            best = self.reward_scales['tracking_lin_vel'] * self.max_episode_length
+            return self.episode_sums['tracking_lin_vel'] / best
+        return self.episode_length_buf.float() / self.max_episode_length
+
+    def _push(self):
+        """Kick every base horizontally by up to its curriculum push strength."""
+        dofs_vel = self.robot.get_dofs_velocity()
+        kick = torch.rand(self.n_envs, 2, device=self.device) * 2.0 - 1.0
+        dofs_vel[:, :2] += kick * self.curriculum.value('push_strength')[:, None]
+        self.robot.set_dofs_velocity(dofs_vel)
+
+    def step(self, actions: torch.Tensor) -> Tuple[torch.Tensor, torch.Tensor, torch.Tensor, Dict[str, Any]]:
+        """
+        Apply actions, advance the simulation and reset finished envs.
+
+        Args:
+            actions: Actions (n_envs, num_actions) on the env device
+
+        Returns:
+            Tuple of (observations, rewards, dones, infos). infos holds
+            'time_outs' (bool per env) and 'episode' (per-term reward sums
+            of the episodes that ended this step, zero elsewhere), and with
+            a curriculum 'curriculum' (mean level per term). All are device
+            tensors.
+        """
+        self.last_actions.copy_(self.actions)
+        self.actions.copy_(actions.clamp(-100.0, 100.0))
+        targets = self.default_dof_pos + self.action_scale * self.actions
+        self.controller.apply(self.robot, targets, self.dofs_idx, self.dof_pos, self.dof_vel)
+        self.scene.step()
+        self.episode_length_buf += 1
+        self.common_step_counter += 1
+        if self.push_interval and self.common_step_counter % self.push_interval == 0:
+            self._push()
+
+        self._compute_observations()
+        self._compute_rewards()
+
+        self.time_out_buf = self.episode_length_buf >= self.max_episode_length
+        fell = (self.base_height < self.min_base_height) | (-self.projected_gravity[:, 2] < self.max_tilt_cos)
+        self.reset_buf = fell | self.time_out_buf
+
+        infos = {
+            'time_outs': self.time_out_buf,
+            'episode': {name: torch.where(self.reset_buf, value, torch.zeros_like(value))
+                        for name, value in self.episode_sums.items()},
+            'episode_length': torch.where(self.reset_buf, self.episode_length_buf,
+                                          torch.zeros_like(self.episode_length_buf)),
+        }
+        if self.curriculum is not None:
+            self.curriculum.update(self.reset_buf, self._curriculum_score())
+            infos['curriculum'] = self.curriculum.mean_levels()
+        self.reset_mask(self.reset_buf)
+        self._compute_observations()
+        return self.obs_buf, self.rew_buf, self.reset_buf, infos
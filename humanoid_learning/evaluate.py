@@ -0,0 +1,436 @@
+"""
+Parallel policy evaluation across robot variants, seeds and terrains.
+
+An evaluation matrix of (policy, robot variant, seed, terrain) jobs is
+grouped by scene (robot and terrain) and fanned out over a pool of fresh
+headless CPU-backend processes. Each process builds one batched G1Env,
+runs every job of its group over n_envs episodes at a time and streams
+one JSON line per finished episode back to the parent. The parent appends
+each job's episodes to a JSONL file together with its 'done' marker once
+the job finishes, skips jobs completed by an earlier (interrupted) run,
+and aggregates each cell into means with confidence intervals.
+"""
+
+import argparse
+import json
+import math
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import torch
+
+from robot_assets.registry import RobotRegistry, write_json_atomic
+
+from .env import DEFAULT_URDF, PROJECT_ROOT
+from .ppo import DEFAULT_RUNS_DIR
+
+
+DEFAULT_OUTPUT_PATH = os.path.join(DEFAULT_RUNS_DIR, "eval", "episodes.jsonl")
+
+# Prefix of the child's result lines, so simulator logging on stdout is ignored
+RECORD_PREFIX = "EVAL "
+
+CELL_KEYS = ('policy', 'robot', 'terrain')
+
+
+def job_id(job: Dict[str, Any]) -> str:
+    """Stable identifier of an evaluation job."""
+    return f"{job['policy']}|{job['robot']}|{job['terrain']}|{job['seed']}"
+
+
+def evaluation_jobs(policies: Sequence[str], robots: Sequence[str], seeds: Sequence[int],
+                    terrains: Sequence[float] = (0.0,)) -> List[Dict[str, Any]]:
+    """
+    Cross product of an evaluation matrix.
+
+    Args:
+        policies: Policy files (TorchScript or training checkpoints)
+        robots: Registry variant names or URDF paths
+        seeds: Random seeds
+        terrains: Terrain roughness in meters (0 for a flat plane)
+
+    Returns:
+        List of job dictionaries
+    """
+    return [{'policy': policy, 'robot': robot, 'terrain': float(terrain), 'seed': int(seed)}
+            for robot in robots for terrain in terrains for policy in policies for seed in seeds]
+
+
+def group_jobs(jobs: List[Dict[str, Any]], max_jobs: int = 16) -> List[List[Dict[str, Any]]]:
+    """
+    Group jobs that share a scene (robot and terrain), at most max_jobs per group.
+
+    Each group runs in one process, so the scene is built once per group.
+    """
+    by_scene: Dict[tuple, List[Dict[str, Any]]] = {}
+    for job in jobs:
+        by_scene.setdefault((job['robot'], job['terrain']), []).append(job)
+    return [scene_jobs[i:i + max_jobs] for scene_jobs in by_scene.values()
+            for i in range(0, len(scene_jobs), max_jobs)]
+
+
+def resolve_urdf(robot: str) -> str:
+    """URDF path of a registry variant name or a path."""
+    if robot.endswith(".urdf") or os.path.exists(robot):
+        return robot
+    return RobotRegistry().urdf_path(robot)
+
+
+@torch.no_grad()
+def evaluate_policy(env, policy: Callable[[torch.Tensor], torch.Tensor], n_episodes: int,
+                    seed: int = 0) -> Iterator[Dict[str, Any]]:
+    """
+    Run exactly n_episodes episodes in a batched environment.
+
+    Episodes run in rounds of n_envs; only the first episode of each env
+    in a round is recorded, so short (failed) episodes are not
+    over-represented.
+
+    Args:
+        env: Environment with the G1Env interface
+        policy: Function from observations to actions
+        n_episodes: Episodes to record
+        seed: Random seed (commands, resets and terrain tiles)
+
+    Yields:
+        Per-episode metrics: return, length_s, fell and the per-term reward sums
+    """
+    torch.manual_seed(seed)
+    remaining = n_episodes
+    while remaining > 0:
+        obs = env.reset()
+        active = torch.arange(env.n_envs, device=env.device) < remaining
+        episode_return = torch.zeros(env.n_envs, device=env.device)
+        while bool(active.any()):
+            obs, rewards, dones, infos = env.step(policy(obs))
+            episode_return += rewards
+            finished = dones & active
+            active &= ~dones
+            if not bool(finished.any()):
+                continue
+            idx = finished.nonzero().flatten()
+            names = list(infos.get('episode', {}))
+            columns = torch.stack([
+                episode_return[idx],
+                infos['episode_length'][idx].float() * env.dt,
+                (~infos['time_outs'][idx]).float(),
+            ] + [infos['episode'][name][idx] for name in names], dim=-1).tolist()
+            for row in columns:
+                record = {'return': row[0], 'length_s': row[1], 'fell': bool(row[2])}
+                record.update(zip(names, row[3:]))
+                yield record
+            episode_return.masked_fill_(dones, 0.0)
+        remaining -= env.n_envs
+
+
+def run_group(group: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+    """
+    Evaluate the jobs of one group in this process (one scene).
+
+    Args:
+        group: Dictionary with 'jobs' (sharing robot and terrain) and the
+            evaluation settings n_envs, n_episodes, episode_length_s,
+            dt, substeps and threads
+
+    Yields:
+        Episode records and a {'done': True} record after each job
+    """
+    from .env import G1Env
+    from .inference import load_actor, pin_cpu_threads
+
+    pin_cpu_threads(group.get('threads', 1))
+
+    first = group['jobs'][0]
+    terrain = first['terrain']
+    env = G1Env(n_envs=group['n_envs'], urdf_path=resolve_urdf(first['robot']), dt=group['dt'],
+                substeps=group['substeps'], backend="cpu", episode_length_s=group['episode_length_s'],
+                curriculum={'terrain_roughness': (terrain, terrain)} if terrain > 0 else None,
+                curriculum_levels=2, verbose=False)
+    actors = {}
+    for job in group['jobs']:
+        if job['policy'] not in actors:
+            actors[job['policy']] = load_actor(job['policy']).eval()
+        start = time.perf_counter()
+        for record in evaluate_policy(env, actors[job['policy']], group['n_episodes'], job['seed']):
+            yield dict(job, **record)
+        yield dict(job, done=True, wall_time=time.perf_counter() - start)
+
+
+def run_group_isolated(group: Dict[str, Any], on_record: Callable[[Dict[str, Any]], None],
+                       timeout: float = 6 * 3600.0):
+    """
+    Run a group in a fresh Python process, streaming its records.
+
+    Args:
+        group: Group as passed to run_group
+        on_record: Called from this thread for every record as it arrives
+        timeout: Seconds before the child is killed
+    """
+    env = dict(os.environ)
+    env['PYTHONPATH'] = os.pathsep.join(filter(None, [PROJECT_ROOT, env.get('PYTHONPATH')]))
+    # stderr goes to a file so a chatty child cannot block on a full pipe
+    with tempfile.TemporaryFile(mode='w+') as stderr:
+        process = subprocess.Popen(
+            [sys.executable, "-m", "humanoid_learning", "evaluate", "--child", json.dumps(group)],
+            cwd=PROJECT_ROOT, env=env, stdout=subprocess.PIPE, stderr=stderr, text=True,
+        )
+        timer = threading.Timer(timeout, process.kill)
+        timer.start()
+        try:
+            for line in process.stdout:
+                if line.startswith(RECORD_PREFIX):
+                    on_record(json.loads(line[len(RECORD_PREFIX):]))
+            if process.wait() != 0:
+                stderr.seek(0)
+                raise RuntimeError(f"Evaluation child failed ({process.returncode}): "
+                                   f"{stderr.read().strip()[-2000:]}")
+        finally:
+            timer.cancel()
+            if process.poll() is None:
+                process.kill()
+
+
+def read_episodes(path: str) -> Tuple[set, List[Dict[str, Any]]]:
+    """
+    Read the completed jobs and their episodes from an episodes file.
+
+    Only the episodes written directly before a job's 'done' record
+    count. Records left by an interrupted or failed attempt, and lines
+    cut off by a crash, are ignored, so a retried job is not counted twice.
+
+    Args:
+        path: Episodes file written by run_evaluation
+
+    Returns:
+        Tuple of (ids of completed jobs, episode records of those jobs)
+    """
+    done, episodes = set(), []
+    block_id, block = None, []
+    if not os.path.exists(path):
+        return done, episodes
+    with open(path) as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                block_id, block = None, []
+                continue
+            record_id = job_id(record)
+            if record.get('done'):
+                if record_id == block_id and record_id not in done:
+                    episodes.extend(block)
+                done.add(record_id)
+                block_id, block = None, []
+            else:
+                if record_id != block_id:
+                    block_id, block = record_id, []
+                block.append(record)
+    return done, episodes
+
+
+def completed_jobs(path: str) -> set:
+    """Ids of the jobs with a 'done' record in an episodes file."""
+    return read_episodes(path)[0]
+
+
+def run_evaluation(jobs: List[Dict[str, Any]], output: str = DEFAULT_OUTPUT_PATH,
+                   workers: Optional[int] = None, n_envs: int = 64, n_episodes: int = 128,
+                   episode_length_s: float = 20.0, dt: float = 0.01, substeps: int = 4,
+                   threads: int = 1, max_jobs_per_group: int = 16, verbose: bool = True) -> str:
+    """
+    Run an evaluation matrix over a process pool.
+
+    Episodes are buffered per job and appended to the output JSONL file
+    together with the job's 'done' record; jobs already completed in that
+    file are skipped, so an interrupted run resumes where it stopped.
+
+    Args:
+        jobs: Jobs from evaluation_jobs
+        output: Episodes file (JSON lines)
+        workers: Parallel processes (default: CPU count / threads)
+        n_envs: Environments per scene
+        n_episodes: Episodes per job
+        episode_length_s: Episode time limit
+        dt: Control timestep
+        substeps: Physics substeps
+        threads: Torch threads per process
+        max_jobs_per_group: Jobs per process
+        verbose: Whether to print progress
+
+    Returns:
+        The output path
+    """
+    done = completed_jobs(output)
+    pending_jobs = [job for job in jobs if job_id(job) not in done]
+    workers = workers or max(1, (os.cpu_count() or 1) // threads)
+    settings = {'n_envs': n_envs, 'n_episodes': n_episodes, 'episode_length_s': episode_length_s,
+                'dt': dt, 'substeps': substeps, 'threads': threads}
+    groups = [dict(settings, jobs=group) for group in group_jobs(pending_jobs, max_jobs_per_group)]
+    if verbose:
+        print(f"{len(jobs)} jobs ({len(jobs) - len(pending_jobs)} already done), "
+              f"{len(groups)} processes on {workers} workers")
+
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    lock = threading.Lock()
+    progress = {'jobs': 0, 'episodes': 0}
+    start = time.perf_counter()
+
+    buffered: Dict[str, List[str]] = {}
+    # A line cut off by an earlier crash must not swallow the next record
+    if os.path.exists(output) and os.path.getsize(output) > 0:
+        with open(output, 'rb') as f:
+            f.seek(-1, os.SEEK_END)
+            if f.read(1) != b"\n":
+                with open(output, 'a') as g:
+                    g.write("\n")
+
+    with open(output, 'a') as f:
+        def on_record(record):
+            with lock:
+                lines = buffered.setdefault(job_id(record), [])
+                lines.append(json.dumps(record) + "\n")
+                if record.get('done'):
+                    # A job's episodes and its done marker are written together
+                    f.write("".join(buffered.pop(job_id(record))))
+                    f.flush()
+                    progress['jobs'] += 1
+                    if verbose:
+                        print(f"[{progress['jobs']}/{len(pending_jobs)}] {job_id(record)}: "
+                              f"{progress['episodes']} episodes, {time.perf_counter() - start:.0f}s")
+                else:
+                    progress['episodes'] += 1
+
+        failures = []
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            futures = {pool.submit(run_group_isolated, group, on_record): group for group in groups}
+            for future in as_completed(futures):
+                try:
+                    future.result()
+                except Exception as e:
+                    failures.append(e)
+                    if verbose:
+                        print(f"Group {job_id(futures[future]['jobs'][0])} failed: {e}")
+    if failures:
+        print(f"{len(failures)} of {len(groups)} groups failed; rerun to retry them")
+    return output
+
+
+def mean_interval(values: Sequence[float], confidence: float = 0.95) -> Dict[str, float]:
+    """Mean with a normal-approximation confidence interval."""
+    n = len(values)
+    mean = statistics.fmean(values) if n else float('nan')
+    if n < 2:
+        return {'mean': mean, 'low': float('nan'), 'high': float('nan')}
+    z = statistics.NormalDist().inv_cdf(0.5 + confidence / 2)
+    half = z * statistics.stdev(values) / math.sqrt(n)
+    return {'mean': mean, 'low': mean - half, 'high': mean + half}
+
+
+def rate_interval(successes: int, n: int, confidence: float = 0.95) -> Dict[str, float]:
+    """Proportion with a Wilson score interval (well behaved near 0 and 1)."""
+    if n == 0:
+        return {'mean': float('nan'), 'low': float('nan'), 'high': float('nan')}
+    z = statistics.NormalDist().inv_cdf(0.5 + confidence / 2)
+    p = successes / n
+    denominator = 1 + z * z / n
+    center = (p + z * z / (2 * n)) / denominator
+    half = z * math.sqrt(p * (1 - p) / n + z * z / (4 * n * n)) / denominator
+    return {'mean': p, 'low': center - half, 'high': center + half}
+
+
+def summarize(path: str, confidence: float = 0.95) -> List[Dict[str, Any]]:
+    """
+    Aggregate an episodes file per (policy, robot, terrain) cell over seeds.
+
+    Only episodes of completed jobs are counted (see read_episodes).
+
+    Args:
+        path: Episodes file written by run_evaluation
+        confidence: Confidence level of the intervals
+
+    Returns:
+        One row per cell with the episode count, number of seeds and
+        intervals for return, episode length and fall rate
+    """
+    cells: Dict[tuple, Dict[str, Any]] = {}
+    for record in read_episodes(path)[1]:
+        cell = cells.setdefault(tuple(record[key] for key in CELL_KEYS),
+                                {'return': [], 'length_s': [], 'fell': 0, 'seeds': set()})
+        cell['return'].append(record['return'])
+        cell['length_s'].append(record['length_s'])
+        cell['fell'] += record['fell']
+        cell['seeds'].add(record['seed'])
+
+    rows = []
+    for key, cell in sorted(cells.items()):
+        n = len(cell['return'])
+        row = dict(zip(CELL_KEYS, key))
+        row.update({
+            'episodes': n,
+            'seeds': len(cell['seeds']),
+            'return': mean_interval(cell['return'], confidence),
+            'length_s': mean_interval(cell['length_s'], confidence),
+            'fall_rate': rate_interval(cell['fell'], n, confidence),
+        })
+        rows.append(row)
+    return rows
+
+
+def print_summary(rows: List[Dict[str, Any]]):
+    """Print the per-cell summary table."""
+    print(f"{'policy':<28} {'robot':<24} {'terrain':>7} {'eps':>6} "
+          f"{'return [95% CI]':>26} {'length s':>9} {'fall rate [95% CI]':>22}")
+    for row in rows:
+        ret, fall = row['return'], row['fall_rate']
+        print(f"{os.path.basename(row['policy'])[:28]:<28} {os.path.basename(row['robot'])[:24]:<24} "
+              f"{row['terrain']:7.3f} {row['episodes']:6d} "
+              f"{ret['mean']:8.2f} [{ret['low']:7.2f}, {ret['high']:7.2f}] "
+              f"{row['length_s']['mean']:9.2f} "
+              f"{fall['mean']:6.3f} [{fall['low']:.3f}, {fall['high']:.3f}]")
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(prog="python -m humanoid_learning evaluate",
+                                     description="Evaluate policies across robot variants, seeds and terrains")
+    parser.add_argument("--policy", nargs="+", help="Policy files (TorchScript or checkpoints)")
+    parser.add_argument("--robot", nargs="+", default=[DEFAULT_URDF], help="Registry variants or URDF paths")
+    parser.add_argument("--seeds", type=int, default=5, help="Seeds 0..N-1 per cell")
+    parser.add_argument("--terrain", type=float, nargs="+", default=[0.0],
+                        help="Terrain roughness in meters (0 = flat)")
+    parser.add_argument("--n-envs", type=int, default=64, help="Environments per scene")
+    parser.add_argument("--episodes", type=int, default=128, help="Episodes per job")
+    parser.add_argument("--episode-length", type=float, default=20.0, help="Episode time limit (s)")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--threads", type=int, default=1, help="Torch threads per process")
+    parser.add_argument("--jobs-per-process", type=int, default=16)
+    parser.add_argument("--output", default=DEFAULT_OUTPUT_PATH, help="Episodes file (JSON lines)")
+    parser.add_argument("--summary-only", action="store_true", help="Summarize an existing episodes file")
+    parser.add_argument("--child", default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.child:
+        # Runs inside the fresh interpreter started by run_group_isolated
+        for record in run_group(json.loads(args.child)):
+            print(RECORD_PREFIX + json.dumps(record), flush=True)
+        return
+
+    if not args.summary_only:
+        if not args.policy:
+            parser.error("--policy is required")
+        jobs = evaluation_jobs([os.path.abspath(p) for p in args.policy], args.robot,
+                               range(args.seeds), args.terrain)
+        run_evaluation(jobs, args.output, args.workers, args.n_envs, args.episodes, args.episode_length,
+                       threads=args.threads, max_jobs_per_group=args.jobs_per_process)
+
+    rows = summarize(args.output)
+    print_summary(rows)
+    summary_path = os.path.splitext(args.output)[0] + "_summary.json"
+    write_json_atomic(summary_path, {'rows': rows})
+    print(f"Summary written to {summary_path}")
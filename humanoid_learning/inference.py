@@ -0,0 +1,280 @@
+"""
+Batched policy inference for the control loop.
+
+PolicyRunner runs a deterministic policy over all envs in one call,
+reading from and writing into preallocated observation and action
+buffers. The policy can be exported to TorchScript or compiled with
+torch.compile, and CPU inference can be pinned to a set of cores. Every
+call is timed into a LatencyHistogram so p50/p99 latency can be checked
+against the control step budget (10 ms at the samples' dt = 0.01).
+"""
+
+import argparse
+import os
+import time
+from typing import Any, Dict, List, Optional, Sequence
+
+import torch
+import torch.nn as nn
+
+from sim_profiling.step import LatencyHistogram, cuda_synchronize
+
+from .normalizer import RunningNormalizer
+
+
+MODES = ('eager', 'script', 'compile')
+
+# Control rate of the samples (dt = 0.01)
+DEFAULT_BUDGET_MS = 10.0
+
+
+def actor_from_state_dict(policy_state: Dict[str, torch.Tensor]) -> nn.Sequential:
+    """
+    Rebuild the deterministic actor of an ActorCritic from its state dict.
+
+    Layer sizes are read from the weight shapes, so checkpoints do not
+    need to record the architecture.
+
+    Args:
+        policy_state: ActorCritic.state_dict()
+
+    Returns:
+        Actor MLP with the weights loaded
+    """
+    weights = sorted(
+        (int(key.split('.')[1]), value) for key, value in policy_state.items()
+        if key.startswith('actor.') and key.endswith('.weight')
+    )
+    layers = []
+    for i, (_, weight) in enumerate(weights):
+        layers.append(nn.Linear(weight.shape[1], weight.shape[0]))
+        if i < len(weights) - 1:
+            layers.append(nn.ELU())
+    actor = nn.Sequential(*layers)
+    actor.load_state_dict({key[len('actor.'):]: value for key, value in policy_state.items()
+                           if key.startswith('actor.')})
+    return actor
+
+
+def load_actor(path: str) -> nn.Module:
+    """
+    Load a policy for inference.
+
+    Args:
+        path: TorchScript file written by export_policy, or a
+            PPOTrainer or CheckpointManager checkpoint
+
+    Returns:
+        Module mapping observations to actions, including the observation
+        normalizer if the checkpoint has one
+    """
+    try:
+        return torch.jit.load(path, map_location='cpu')
+    except RuntimeError:
+        state = torch.load(path, map_location='cpu', weights_only=False)
+        state = state.get('trainer', state)  # CheckpointManager checkpoints
+        actor = actor_from_state_dict(state.get('policy', state))
+        if 'obs_normalizer' in state:
+            normalizer = RunningNormalizer(state['obs_normalizer']['mean'].shape[0])
+            normalizer.load_state_dict(state['obs_normalizer'])
+            actor = nn.Sequential(normalizer, *actor)
+        return actor
+
+
+def export_policy(actor: nn.Module, obs_dim: int, path: str):
+    """
+    Export a deterministic actor to TorchScript (atomically).
+
+    Args:
+        actor: Module mapping observations to actions (e.g. ActorCritic.actor)
+        obs_dim: Observation size, used to trace the module
+        path: Output file
+    """
+    actor = actor.eval().cpu()
+    with torch.no_grad():
+        scripted = torch.jit.trace(actor, torch.zeros(1, obs_dim))
+    scripted = torch.jit.freeze(scripted)
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp_path = path + ".tmp"
+    torch.jit.save(scripted, tmp_path)
+    os.replace(tmp_path, path)
+
+
+def pin_cpu_threads(num_threads: Optional[int] = None, cpus: Optional[Sequence[int]] = None):
+    """
+    Restrict CPU inference to a thread count and a set of cores.
+
+    Args:
+        num_threads: Intra-op threads (default: number of cpus, if given)
+        cpus: Core indices for this process (Linux only)
+    """
+    if cpus is not None:
+        if not hasattr(os, 'sched_setaffinity'):
+            raise RuntimeError("CPU affinity is not supported on this platform")
+        os.sched_setaffinity(0, set(cpus))
+        if num_threads is None:
+            num_threads = len(cpus)
+    if num_threads is not None:
+        torch.set_num_threads(num_threads)
+
+
+class PolicyRunner:
+    """
+    Run a policy over all envs with preallocated buffers.
+
+    Usage:
+        runner = PolicyRunner(load_actor("policy.pt"), n_envs=4096, obs_dim=99, device='cuda')
+        for _ in range(n_steps):
+            actions = runner(obs)        # (n_envs, action_dim), reused every call
+            robot.control_dofs_position(targets + scale * actions, dofs_idx)
+        runner.print_latency()
+    """
+
+    def __init__(self, actor: nn.Module, n_envs: int, obs_dim: int, device='cpu',
+                 mode: str = 'script', dtype: torch.dtype = torch.float32,
+                 sync: bool = True, budget_ms: float = DEFAULT_BUDGET_MS):
+        """
+        Prepare the policy and allocate the buffers.
+
+        Args:
+            actor: Module mapping observations to actions
+            n_envs: Batch size of every call
+            obs_dim: Observation size
+            device: Inference device
+            mode: 'eager', 'script' (TorchScript, frozen) or 'compile' (torch.compile)
+            dtype: Inference dtype
+            sync: Synchronize the device around timed calls so latency
+                includes the asynchronous GPU work
+            budget_ms: Control step budget reported against p99 latency
+        """
+        if mode not in MODES:
+            raise ValueError(f"Unknown mode {mode!r}, expected one of {MODES}")
+        self.device = torch.device(device)
+        self.mode = mode
+        self.sync = sync and self.device.type == 'cuda'
+        self.budget_ms = budget_ms
+
+        self.obs = torch.zeros(n_envs, obs_dim, dtype=dtype, device=self.device)
+        module = actor.to(device=self.device, dtype=dtype).eval()
+        if mode == 'script' and not isinstance(module, torch.jit.ScriptModule):
+            with torch.no_grad():
+                module = torch.jit.freeze(torch.jit.trace(module, self.obs))
+        elif mode == 'compile':
+            module = torch.compile(module, mode='max-autotune-no-cudagraphs', dynamic=False)
+        self.module = module
+
+        # Allocated outside inference mode so callers may modify the actions in place
+        with torch.no_grad():
+            self.actions = torch.zeros_like(module(self.obs))
+        self.histogram = LatencyHistogram()
+
+    def warmup(self, n_calls: int = 10):
+        """Run untimed calls (compilation, allocator and kernel caches)."""
+        with torch.inference_mode():
+            for _ in range(n_calls):
+                self.actions.copy_(self.module(self.obs))
+        if self.sync:
+            cuda_synchronize()
+
+    @torch.inference_mode()
+    def __call__(self, obs: Optional[torch.Tensor] = None) -> torch.Tensor:
+        """
+        Compute actions for all envs.
+
+        Args:
+            obs: Observations (n_envs, obs_dim); None reuses self.obs,
+                which callers may fill in place
+
+        Returns:
+            The action buffer (overwritten by the next call)
+        """
+        if self.sync:
+            cuda_synchronize()
+        start = time.perf_counter_ns()
+        if obs is not None and obs.data_ptr() != self.obs.data_ptr():
+            self.obs.copy_(obs, non_blocking=True)
+        self.actions.copy_(self.module(self.obs))
+        if self.sync:
+            cuda_synchronize()
+        self.histogram.add(time.perf_counter_ns() - start)
+        return self.actions
+
+    def latency(self) -> Dict[str, Any]:
+        """Latency statistics in milliseconds and whether p99 fits the budget."""
+        stats = self.histogram.summary()
+        stats.update({
+            'mode': self.mode,
+            'device': str(self.device),
+            'n_envs': self.obs.shape[0],
+            'budget_ms': self.budget_ms,
+            'within_budget': stats['p99_ms'] <= self.budget_ms,
+        })
+        return stats
+
+    def print_latency(self):
+        """Print p50/p99 latency against the step budget."""
+        stats = self.latency()
+        status = "within" if stats['within_budget'] else "OVER"
+        print(f"Policy inference ({stats['mode']}, {stats['device']}, {stats['n_envs']} envs, "
+              f"{stats['count']} calls): p50 {stats['p50_ms']:.3f} ms, p99 {stats['p99_ms']:.3f} ms, "
+              f"max {stats['max_ms']:.3f} ms ({status} {stats['budget_ms']:.1f} ms budget)")
+
+
+def _cpu_list(value: str) -> List[int]:
+    cpus = []
+    for part in value.split(','):
+        if '-' in part:
+            lo, hi = part.split('-')
+            cpus.extend(range(int(lo), int(hi) + 1))
+        else:
+            cpus.append(int(part))
+    return cpus
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(prog="python -m humanoid_learning infer",
+                                     description="Export a policy and measure batched inference latency")
+    parser.add_argument("--policy", default=None,
+                        help="TorchScript file or training checkpoint (default: random G1-sized policy)")
+    parser.add_argument("--export", default=None, help="Write the policy as TorchScript to this path")
+    parser.add_argument("--n-envs", type=int, nargs="+", default=[1, 256, 4096])
+    parser.add_argument("--obs-dim", type=int, default=99, help="Observation size for a random policy")
+    parser.add_argument("--action-dim", type=int, default=29, help="Action size for a random policy")
+    parser.add_argument("--mode", nargs="+", default=['eager', 'script'], choices=MODES)
+    parser.add_argument("--device", default="cpu")
+    parser.add_argument("--threads", type=int, default=None, help="CPU intra-op threads")
+    parser.add_argument("--cpus", type=_cpu_list, default=None, help="Pin to cores, e.g. 0-7 or 0,2,4")
+    parser.add_argument("--calls", type=int, default=1000)
+    parser.add_argument("--budget-ms", type=float, default=DEFAULT_BUDGET_MS)
+    args = parser.parse_args(argv)
+
+    pin_cpu_threads(args.threads, args.cpus)
+
+    obs_dim = args.obs_dim
+    if args.policy:
+        actor = load_actor(args.policy)
+        # TorchScript modules hide their layers; use --obs-dim for those
+        first = next((m for m in actor.modules() if isinstance(m, nn.Linear)), None)
+        if first is not None:
+            obs_dim = first.in_features
+    else:
+        from .ppo import _mlp
+        actor = _mlp(args.obs_dim, (512, 256, 128), args.action_dim)
+
+    if args.export:
+        export_policy(actor, obs_dim, args.export)
+        print(f"Exported TorchScript policy to {args.export}")
+
+    print(f"torch threads: {torch.get_num_threads()}, budget {args.budget_ms} ms")
+    failed = False
+    for mode in args.mode:
+        for n_envs in args.n_envs:
+            runner = PolicyRunner(actor, n_envs, obs_dim, args.device, mode, budget_ms=args.budget_ms)
+            runner.warmup()
+            obs = torch.randn(n_envs, obs_dim, device=args.device)
+            for _ in range(args.calls):
+                runner(obs)
+            runner.print_latency()
+            failed |= not runner.latency()['within_budget']
+    if failed:
+        raise SystemExit(1)
@@ -0,0 +1,300 @@
+"""
+Reference motion library for imitation learning.
+
+Clips (e.g. retargeted mocap) are resampled to the simulation dt and
+packed into one contiguous tensor per quantity on the simulation device,
+with per-clip frame offsets. A batched (clip_id, time) query turns into
+index arithmetic, two gathers and a lerp (slerp for base orientation)
+over all envs at once, with no per-env Python work.
+
+Clip files are .npz archives with:
+    fps        scalar frame rate
+    dof_pos    (T, n_dofs) joint positions (rad)
+    dof_names  (n_dofs,) joint names (optional; columns are mapped to
+               the library's joint order by name)
+    root_pos   (T, 3) base position (optional)
+    root_rot   (T, 4) base orientation as (w, x, y, z) (optional)
+    loop       scalar, whether the clip loops (optional)
+"""
+
+import glob
+import os
+from typing import Dict, List, Optional, Sequence, Union
+
+import numpy as np
+import torch
+
+
+def quat_mul(a: torch.Tensor, b: torch.Tensor) -> torch.Tensor:
+    """Product of (w, x, y, z) quaternions (..., 4)."""
+    w1, x1, y1, z1 = a.unbind(-1)
+    w2, x2, y2, z2 = b.unbind(-1)
+    return torch.stack([
+        w1 * w2 - x1 * x2 - y1 * y2 - z1 * z2,
+        w1 * x2 + x1 * w2 + y1 * z2 - z1 * y2,
+        w1 * y2 - x1 * z2 + y1 * w2 + z1 * x2,
+        w1 * z2 + x1 * y2 - y1 * x2 + z1 * w2,
+    ], dim=-1)
+
+
+def quat_conjugate(q: torch.Tensor) -> torch.Tensor:
+    """Conjugate (inverse for unit quaternions) of (w, x, y, z) quaternions."""
+    return torch.cat([q[..., :1], -q[..., 1:]], dim=-1)
+
+
+def quat_slerp(q0: torch.Tensor, q1: torch.Tensor, t: torch.Tensor) -> torch.Tensor:
+    """
+    Spherical linear interpolation of (w, x, y, z) quaternions.
+
+    Args:
+        q0: Start quaternions (..., 4)
+        q1: End quaternions (..., 4)
+        t: Blend factors (..., 1)
+
+    Returns:
+        Unit quaternions (..., 4)
+    """
+    dot = (q0 * q1).sum(-1, keepdim=True)
+    q1 = torch.where(dot < 0, -q1, q1)
+    dot = dot.abs().clamp(max=1.0)
+    theta = torch.acos(dot)
+    sin_theta = torch.sin(theta)
+    # Nearly identical rotations fall back to lerp
+    small = sin_theta < 1e-6
+    safe_sin = torch.where(small, torch.ones_like(sin_theta), sin_theta)
+    w0 = torch.where(small, 1.0 - t, torch.sin((1.0 - t) * theta) / safe_sin)
+    w1 = torch.where(small, t, torch.sin(t * theta) / safe_sin)
+    q = w0 * q0 + w1 * q1
+    return q / q.norm(dim=-1, keepdim=True)
+
+
+def save_clip(path: str, fps: float, dof_pos: np.ndarray, dof_names: Optional[Sequence[str]] = None,
+              root_pos: Optional[np.ndarray] = None, root_rot: Optional[np.ndarray] = None,
+              loop: bool = False):
+    """
+    Write a clip in the library's .npz format (atomically).
+
+    Args:
+        path: Output file (.npz)
+        fps: Frame rate
+        dof_pos: Joint positions (T, n_dofs)
+        dof_names: Joint names of the dof_pos columns
+        root_pos: Base positions (T, 3)
+        root_rot: Base orientations (T, 4), (w, x, y, z)
+        loop: Whether the clip loops
+    """
+    arrays = {'fps': np.float64(fps), 'dof_pos': np.asarray(dof_pos, dtype=np.float32),
+              'loop': np.bool_(loop)}
+    if dof_names is not None:
+        arrays['dof_names'] = np.asarray(dof_names, dtype=str)
+    if root_pos is not None:
+        arrays['root_pos'] = np.asarray(root_pos, dtype=np.float32)
+    if root_rot is not None:
+        arrays['root_rot'] = np.asarray(root_rot, dtype=np.float32)
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp_path = path + ".tmp.npz"
+    np.savez(tmp_path, **arrays)
+    os.replace(tmp_path, path)
+
+
+def _resample(values: torch.Tensor, fps: float, dt: float, rotation: bool = False) -> torch.Tensor:
+    """Resample (T, ...) frames at fps to frames every dt, covering the same duration."""
+    n_frames = values.shape[0]
+    duration = (n_frames - 1) / fps
+    n_out = int(round(duration / dt)) + 1
+    f = torch.arange(n_out, dtype=torch.float64) * (dt * fps)
+    f = f.clamp(max=n_frames - 1)
+    i0 = f.floor().long().clamp(max=max(n_frames - 2, 0))
+    i1 = (i0 + 1).clamp(max=n_frames - 1)
+    t = (f - i0).to(values.dtype).view(-1, *([1] * (values.dim() - 1)))
+    if rotation:
+        return quat_slerp(values[i0], values[i1], t)
+    return torch.lerp(values[i0], values[i1], t)
+
+
+def _finite_difference(values: torch.Tensor, dt: float) -> torch.Tensor:
+    """Central differences over frames (one-sided at the ends)."""
+    if values.shape[0] < 2:
+        return torch.zeros_like(values)
+    return torch.from_numpy(np.gradient(values.numpy(), dt, axis=0)).to(values.dtype)
+
+
+def _angular_velocity(rot: torch.Tensor, dt: float) -> torch.Tensor:
+    """World-frame angular velocity of consecutive (w, x, y, z) orientations."""
+    ang_vel = torch.zeros(rot.shape[0], 3, dtype=rot.dtype)
+    if rot.shape[0] < 2:
+        return ang_vel
+    delta = quat_mul(rot[1:], quat_conjugate(rot[:-1]))
+    delta = torch.where(delta[:, :1] < 0, -delta, delta)
+    # Axis-angle of the frame-to-frame rotation
+    sin_half = delta[:, 1:].norm(dim=-1, keepdim=True)
+    angle = 2.0 * torch.atan2(sin_half, delta[:, :1])
+    axis = delta[:, 1:] / sin_half.clamp(min=1e-9)
+    ang_vel[:-1] = axis * angle / dt
+    ang_vel[-1] = ang_vel[-2]
+    return ang_vel
+
+
+class MotionLibrary:
+    """
+    Packed, on-device store of reference motion clips.
+
+    Usage:
+        motions = MotionLibrary("assets/motions/g1", env.dof_names, dt=env.dt, device=env.device)
+        clip_ids = motions.sample_clips(env.n_envs)
+        times = motions.sample_times(clip_ids)
+        ...
+        ref = motions.get(clip_ids, times + env.episode_length_buf * env.dt)
+        ref['dof_pos']    # (n_envs, n_dofs)
+    """
+
+    def __init__(self, clips: Union[str, Sequence[str]], dof_names: Sequence[str], dt: float,
+                 device='cpu', weights: Optional[Sequence[float]] = None, verbose: bool = True):
+        """
+        Load, resample and pack the clips.
+
+        Args:
+            clips: Clip files, or a directory of .npz clips
+            dof_names: Joint order of the library (e.g. G1Env.dof_names)
+            dt: Simulation (control) timestep to resample to
+            device: Device of the packed tensors
+            weights: Sampling weight per clip (default: uniform)
+            verbose: Whether to print a summary
+        """
+        if isinstance(clips, str):
+            clips = sorted(glob.glob(os.path.join(clips, "*.npz"))) if os.path.isdir(clips) else [clips]
+        if not clips:
+            raise ValueError("No motion clips given")
+
+        self.dof_names = list(dof_names)
+        self.dt = dt
+        self.device = torch.device(device)
+        self.clip_names: List[str] = []
+
+        fields = {name: [] for name in ('dof_pos', 'dof_vel', 'root_pos', 'root_rot',
+                                        'root_lin_vel', 'root_ang_vel')}
+        lengths, loops = [], []
+        for path in clips:
+            clip = self._load_clip(path)
+            for name, value in clip.items():
+                if name in fields:
+                    fields[name].append(value)
+            lengths.append(clip['dof_pos'].shape[0])
+            loops.append(clip['loop'])
+            self.clip_names.append(os.path.splitext(os.path.basename(path))[0])
+
+        # One contiguous (total_frames, ...) tensor per quantity
+        for name, values in fields.items():
+            setattr(self, name, torch.cat(values).to(self.device, torch.float32).contiguous())
+
+        lengths = torch.tensor(lengths, dtype=torch.long)
+        self.num_clips = len(lengths)
+        self.num_frames = lengths.to(self.device)
+        self.start = (torch.cumsum(lengths, 0) - lengths).to(self.device)
+        self.duration = ((lengths - 1) * dt).to(self.device, torch.float32)
+        self.loop = torch.tensor(loops, dtype=torch.bool, device=self.device)
+        weights = torch.ones(self.num_clips) if weights is None else torch.as_tensor(weights, dtype=torch.float32)
+        self.weights = (weights / weights.sum()).to(self.device)
+
+        if verbose:
+            print(f"MotionLibrary: {self.num_clips} clips, {int(lengths.sum())} frames at dt={dt}, "
+                  f"{float(self.duration.sum()):.1f} s total")
+
+    def _load_clip(self, path: str) -> Dict[str, torch.Tensor]:
+        """Read one clip, map its joints to dof_names and resample it to dt."""
+        data = np.load(path)
+        fps = float(data['fps'])
+        dof_pos = torch.from_numpy(data['dof_pos'].astype(np.float64))
+        n_frames = dof_pos.shape[0]
+        if n_frames < 2:
+            raise ValueError(f"Clip {path} needs at least 2 frames")
+
+        if 'dof_names' in data:
+            columns = {str(name): i for i, name in enumerate(data['dof_names'])}
+            missing = [name for name in self.dof_names if name not in columns]
+            if len(missing) == len(self.dof_names):
+                raise ValueError(f"Clip {path} has none of the library's joints")
+            mapped = torch.zeros(n_frames, len(self.dof_names), dtype=torch.float64)
+            for j, name in enumerate(self.dof_names):
+                if name in columns:
+                    mapped[:, j] = dof_pos[:, columns[name]]
+            dof_pos = mapped
+        elif dof_pos.shape[1] != len(self.dof_names):
+            raise ValueError(f"Clip {path} has {dof_pos.shape[1]} joints without names, "
+                             f"expected {len(self.dof_names)}")
+
+        root_pos = (torch.from_numpy(data['root_pos'].astype(np.float64)) if 'root_pos' in data
+                    else torch.zeros(n_frames, 3, dtype=torch.float64))
+        root_rot = (torch.from_numpy(data['root_rot'].astype(np.float64)) if 'root_rot' in data
+                    else torch.tensor([[1.0, 0.0, 0.0, 0.0]], dtype=torch.float64).repeat(n_frames, 1))
+        root_rot = root_rot / root_rot.norm(dim=-1, keepdim=True)
+
+        dof_pos = _resample(dof_pos, fps, self.dt)
+        root_pos = _resample(root_pos, fps, self.dt)
+        root_rot = _resample(root_rot, fps, self.dt, rotation=True)
+        return {
+            'dof_pos': dof_pos,
+            'dof_vel': _finite_difference(dof_pos, self.dt),
+            'root_pos': root_pos,
+            'root_rot': root_rot,
+            'root_lin_vel': _finite_difference(root_pos, self.dt),
+            'root_ang_vel': _angular_velocity(root_rot, self.dt),
+            'loop': bool(data['loop']) if 'loop' in data else False,
+        }
+
+    def sample_clips(self, n: int, generator: Optional[torch.Generator] = None) -> torch.Tensor:
+        """Draw n clip ids by weight (on the library device)."""
+        return torch.multinomial(self.weights, n, replacement=True, generator=generator)
+
+    def sample_times(self, clip_ids: torch.Tensor, truncate: float = 0.0,
+                     generator: Optional[torch.Generator] = None) -> torch.Tensor:
+        """
+        Draw uniform start times within the clips.
+
+        Args:
+            clip_ids: Clip ids (n,)
+            truncate: Seconds excluded at the end of each clip
+            generator: Optional random generator
+
+        Returns:
+            Times in seconds (n,)
+        """
+        span = (self.duration[clip_ids] - truncate).clamp(min=0.0)
+        return torch.rand(clip_ids.shape, device=self.device, generator=generator) * span
+
+    def frames(self, clip_ids: torch.Tensor, times: torch.Tensor):
+        """
+        Global frame indices and blend factors of (clip_id, time) queries.
+
+        Looping clips wrap around; others hold their last frame.
+
+        Returns:
+            Tuple of (index0, index1, blend), each (n,)
+        """
+        n_frames = self.num_frames[clip_ids]
+        last = (n_frames - 1).to(times.dtype)
+        f = times / self.dt
+        f = torch.where(self.loop[clip_ids], torch.remainder(f, last), f.clamp(0.0, None).minimum(last))
+        i0 = f.floor().long().minimum(n_frames - 2)
+        blend = f - i0
+        i0 = i0 + self.start[clip_ids]
+        return i0, i0 + 1, blend
+
+    def get(self, clip_ids: torch.Tensor, times: torch.Tensor) -> Dict[str, torch.Tensor]:
+        """
+        Interpolated reference state for a batch of (clip_id, time) queries.
+
+        Args:
+            clip_ids: Clip ids (n,), long, on the library device
+            times: Times in seconds (n,)
+
+        Returns:
+            Dictionary with dof_pos, dof_vel (n, n_dofs), root_pos,
+            root_lin_vel, root_ang_vel (n, 3) and root_rot (n, 4)
+        """
+        i0, i1, blend = self.frames(clip_ids, times)
+        t = blend.unsqueeze(-1)
+        state = {name: torch.lerp(getattr(self, name)[i0], getattr(self, name)[i1], t)
+                 for name in ('dof_pos', 'dof_vel', 'root_pos', 'root_lin_vel', 'root_ang_vel')}
+        state['root_rot'] = quat_slerp(self.root_rot[i0], self.root_rot[i1], t)
+        return state
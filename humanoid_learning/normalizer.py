@@ -0,0 +1,175 @@
+"""
+Running observation normalization.
+
+RunningNormalizer keeps the count, mean and variance of everything it
+has seen and updates them from whole (n_envs, obs_dim) batches. Each
+update combines the batch mean and variance with the running values
+using the parallel-variance formula (Chan et al.). The same formula
+merges statistics from separate workers exactly, so the merged values
+match one pass over all the data regardless of how it was sharded.
+Statistics are module buffers, so they are saved in state_dict() and
+exported with the policy.
+"""
+
+from typing import Dict, Iterable, Optional, Tuple, Union
+
+import torch
+import torch.nn as nn
+
+
+def combine_moments(count_a: torch.Tensor, mean_a: torch.Tensor, var_a: torch.Tensor,
+                    count_b: torch.Tensor, mean_b: torch.Tensor,
+                    var_b: torch.Tensor) -> Tuple[torch.Tensor, torch.Tensor, torch.Tensor]:
+    """
+    Combine the population moments of two disjoint sets of samples.
+
+    Args:
+        count_a: Samples in the first set (scalar tensor)
+        mean_a: Mean of the first set (dim,)
+        var_a: Population variance of the first set (dim,)
+        count_b: Samples in the second set (scalar tensor)
+        mean_b: Mean of the second set (dim,)
+        var_b: Population variance of the second set (dim,)
+
+    Returns:
+        Tuple of (count, mean, var) of the union
+    """
+    count = count_a + count_b
+    weight_b = count_b / count.clamp(min=1)
+    delta = mean_b - mean_a
+    mean = mean_a + delta * weight_b
+    m2 = var_a * count_a + var_b * count_b + delta.square() * count_a * weight_b
+    return count, mean, m2 / count.clamp(min=1)
+
+
+class RunningNormalizer(nn.Module):
+    """
+    Running mean/variance observation normalizer.
+
+    Usage:
+        normalizer = RunningNormalizer(env.num_obs).to(env.device)
+        normalizer.update(obs)          # one batched update per step
+        policy_input = normalizer(obs)
+        ...
+        normalizer.freeze()             # keep the statistics fixed
+    """
+
+    def __init__(self, dim: int, eps: float = 1e-8, clip: Optional[float] = 5.0,
+                 dtype: torch.dtype = torch.float64):
+        """
+        Initialize empty statistics.
+
+        Args:
+            dim: Observation size
+            eps: Added to the variance before the square root
+            clip: Clip normalized values to [-clip, clip] (None disables)
+            dtype: Type of the accumulated statistics
+        """
+        super().__init__()
+        self.eps = eps
+        self.clip = clip
+        self.frozen = False
+        self.register_buffer('count', torch.zeros((), dtype=dtype))
+        self.register_buffer('mean', torch.zeros(dim, dtype=dtype))
+        self.register_buffer('var', torch.ones(dim, dtype=dtype))
+
+    def forward(self, x: torch.Tensor) -> torch.Tensor:
+        """Normalize x (..., dim) with the current statistics."""
+        mean = self.mean.to(x.dtype)
+        std = (self.var + self.eps).sqrt().to(x.dtype)
+        y = (x - mean) / std
+        if self.clip is not None:
+            y = y.clamp(-self.clip, self.clip)
+        return y
+
+    def freeze(self):
+        """Stop updating the statistics."""
+        self.frozen = True
+
+    def unfreeze(self):
+        """Resume updating the statistics."""
+        self.frozen = False
+
+    @torch.no_grad()
+    def update(self, x: torch.Tensor, group=None):
+        """
+        Add a batch of samples to the statistics (no-op while frozen).
+
+        Args:
+            x: Samples (..., dim), e.g. (n_envs, obs_dim)
+            group: torch.distributed process group; if given, the batch
+                moments of all ranks are reduced exactly first, so every
+                rank applies the same update
+        """
+        if self.frozen:
+            return
+        x = x.reshape(-1, x.shape[-1]).to(self.mean.dtype)
+        count = torch.tensor(float(x.shape[0]), dtype=self.mean.dtype, device=x.device)
+        if x.shape[0] == 0:
+            # An empty batch (e.g. obs[dones] with no dones) has NaN moments.
+            # Other ranks may still have samples, so it joins the reduction
+            # with zero weight instead of returning.
+            if group is None:
+                return
+            mean, var = torch.zeros_like(self.mean), torch.zeros_like(self.var)
+        else:
+            var, mean = torch.var_mean(x, dim=0, correction=0)
+        if group is not None:
+            count, mean, var = self._all_reduce(count, mean, var, group)
+        self._add_moments(count, mean, var)
+
+    @staticmethod
+    def _all_reduce(count: torch.Tensor, mean: torch.Tensor, var: torch.Tensor, group):
+        """Exact moments of the union of every rank's batch."""
+        import torch.distributed as dist
+
+        sums = torch.cat([count[None], mean * count])
+        dist.all_reduce(sums, group=group)
+        # All ranks empty: zero moments of zero count leave the statistics unchanged
+        total, total_mean = sums[0], sums[1:] / sums[0].clamp(min=1)
+        m2 = var * count + (mean - total_mean).square() * count
+        dist.all_reduce(m2, group=group)
+        return total, total_mean, m2 / total.clamp(min=1)
+
+    def _add_moments(self, count: torch.Tensor, mean: torch.Tensor, var: torch.Tensor):
+        new_count, new_mean, new_var = combine_moments(self.count, self.mean, self.var, count, mean, var)
+        # Statistics keep their initial values until a sample arrives
+        seen = new_count > 0
+        self.count.copy_(new_count)
+        self.mean.copy_(torch.where(seen, new_mean, self.mean))
+        self.var.copy_(torch.where(seen, new_var, self.var))
+
+    @torch.no_grad()
+    def merge(self, other: Union['RunningNormalizer', Dict[str, torch.Tensor]]):
+        """
+        Add the statistics of another normalizer over disjoint samples.
+
+        Args:
+            other: Normalizer or its state_dict (e.g. from a worker process)
+        """
+        state = other.state_dict() if isinstance(other, RunningNormalizer) else other
+        self._add_moments(*(state[key].to(self.mean.device, self.mean.dtype)
+                            for key in ('count', 'mean', 'var')))
+
+    @classmethod
+    def merged(cls, normalizers: Iterable[Union['RunningNormalizer', Dict[str, torch.Tensor]]],
+               **kwargs) -> 'RunningNormalizer':
+        """
+        Normalizer with the combined statistics of several workers.
+
+        Args:
+            normalizers: Normalizers or state dicts over disjoint samples
+            **kwargs: Arguments of the new normalizer (eps, clip, dtype)
+
+        Returns:
+            New normalizer
+        """
+        result = None
+        for other in normalizers:
+            if result is None:
+                dim = (other.mean if isinstance(other, RunningNormalizer) else other['mean']).shape[0]
+                result = cls(dim, **kwargs)
+            result.merge(other)
+        if result is None:
+            raise ValueError("No normalizers to merge")
+        return result
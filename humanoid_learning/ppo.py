@@ -0,0 +1,450 @@
+"""
+Proximal policy optimization for batched environments.
+
+The policy, rollout storage and environment share one device. During a
+rollout nothing is read back to the host; episode statistics are
+accumulated in device tensors and converted once per iteration for
+logging.
+"""
+
+import argparse
+import copy
+import os
+import time
+from typing import Any, Dict, List, Optional, Sequence
+
+import torch
+import torch.nn as nn
+
+from .checkpoint import CheckpointManager
+from .normalizer import RunningNormalizer
+from .storage import PinnedRolloutBuffer, RolloutStorage
+
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_RUNS_DIR = os.path.join(PROJECT_ROOT, "humanoid_learning", "runs")
+
+DEFAULT_PPO_CONFIG = {
+    'num_steps': 24,
+    'num_epochs': 5,
+    'num_mini_batches': 4,
+    'gamma': 0.99,
+    'lam': 0.95,
+    'clip_param': 0.2,
+    'value_loss_coef': 1.0,
+    'entropy_coef': 0.01,
+    'learning_rate': 1e-3,
+    'max_grad_norm': 1.0,
+    'desired_kl': 0.01,
+    'schedule': 'adaptive',
+    'normalize_observations': False,
+}
+
+
+def _mlp(input_dim: int, hidden_dims: Sequence[int], output_dim: int) -> nn.Sequential:
+    layers = []
+    for hidden in hidden_dims:
+        layers += [nn.Linear(input_dim, hidden), nn.ELU()]
+        input_dim = hidden
+    layers.append(nn.Linear(input_dim, output_dim))
+    return nn.Sequential(*layers)
+
+
+class ActorCritic(nn.Module):
+    """Gaussian MLP policy with a separate MLP value function."""
+
+    def __init__(self, obs_dim: int, action_dim: int, actor_hidden: Sequence[int] = (512, 256, 128),
+                 critic_hidden: Sequence[int] = (512, 256, 128), init_std: float = 1.0):
+        """
+        Initialize the networks.
+
+        Args:
+            obs_dim: Observation size
+            action_dim: Action size
+            actor_hidden: Hidden layer sizes of the policy
+            critic_hidden: Hidden layer sizes of the value function
+            init_std: Initial action standard deviation
+        """
+        super().__init__()
+        self.actor = _mlp(obs_dim, actor_hidden, action_dim)
+        self.critic = _mlp(obs_dim, critic_hidden, 1)
+        self.log_std = nn.Parameter(torch.full((action_dim,), float(init_std)).log())
+
+    def distribution(self, obs: torch.Tensor) -> torch.distributions.Normal:
+        mu = self.actor(obs)
+        return torch.distributions.Normal(mu, self.log_std.exp().expand_as(mu))
+
+    def act(self, obs: torch.Tensor) -> Dict[str, torch.Tensor]:
+        """
+        Sample actions for a rollout.
+
+        Returns:
+            Dictionary with actions, log_probs, values, mu and sigma
+        """
+        dist = self.distribution(obs)
+        actions = dist.sample()
+        return {
+            'actions': actions,
+            'log_probs': dist.log_prob(actions).sum(-1),
+            'values': self.critic(obs).squeeze(-1),
+            'mu': dist.mean,
+            'sigma': dist.stddev,
+        }
+
+    def evaluate(self, obs: torch.Tensor, actions: torch.Tensor) -> Dict[str, torch.Tensor]:
+        """Log-probabilities, entropy and values of stored actions."""
+        dist = self.distribution(obs)
+        return {
+            'log_probs': dist.log_prob(actions).sum(-1),
+            'entropy': dist.entropy().sum(-1),
+            'values': self.critic(obs).squeeze(-1),
+            'mu': dist.mean,
+            'sigma': dist.stddev,
+        }
+
+    def act_inference(self, obs: torch.Tensor) -> torch.Tensor:
+        """Deterministic actions (the policy mean)."""
+        return self.actor(obs)
+
+
+class PPO:
+    """
+    Clipped-objective PPO update with an optional KL-adaptive learning rate.
+    """
+
+    def __init__(self, policy: ActorCritic, config: Optional[Dict[str, Any]] = None):
+        """
+        Initialize the optimizer.
+
+        Args:
+            policy: Actor-critic to train
+            config: Overrides of DEFAULT_PPO_CONFIG
+        """
+        self.policy = policy
+        self.config = dict(DEFAULT_PPO_CONFIG, **(config or {}))
+        self.learning_rate = self.config['learning_rate']
+        self.optimizer = torch.optim.Adam(policy.parameters(), lr=self.learning_rate)
+
+    def _kl(self, batch: Dict[str, torch.Tensor], mu: torch.Tensor, sigma: torch.Tensor) -> torch.Tensor:
+        old_mu, old_sigma = batch['mu'], batch['sigma']
+        kl = (torch.log(sigma / old_sigma)
+              + (old_sigma ** 2 + (old_mu - mu) ** 2) / (2.0 * sigma ** 2) - 0.5)
+        return kl.sum(-1).mean()
+
+    def update(self, storage: RolloutStorage) -> Dict[str, float]:
+        """
+        Run the PPO epochs over a filled rollout storage.
+
+        The adaptive learning rate reads the KL once per minibatch; the
+        loss statistics stay on device until the end of the update.
+
+        Args:
+            storage: Storage with returns and advantages computed
+
+        Returns:
+            Mean value loss, surrogate loss, entropy, KL and learning rate
+        """
+        cfg = self.config
+        totals = torch.zeros(4, device=storage.device)
+        n_updates = 0
+
+        for batch in storage.mini_batches(cfg['num_mini_batches'], cfg['num_epochs']):
+            out = self.policy.evaluate(batch['observations'], batch['actions'])
+
+            kl = self._kl(batch, out['mu'], out['sigma']).detach()
+            if cfg['schedule'] == 'adaptive' and cfg['desired_kl']:
+                kl_value = kl.item()
+                if kl_value > cfg['desired_kl'] * 2.0:
+                    self.learning_rate = max(1e-5, self.learning_rate / 1.5)
+                elif 0.0 < kl_value < cfg['desired_kl'] / 2.0:
+                    self.learning_rate = min(1e-2, self.learning_rate * 1.5)
+                for group in self.optimizer.param_groups:
+                    group['lr'] = self.learning_rate
+
+            ratio = torch.exp(out['log_probs'] - batch['log_probs'])
+            advantages = batch['advantages']
+            surrogate = -torch.min(
+                advantages * ratio,
+                advantages * ratio.clamp(1.0 - cfg['clip_param'], 1.0 + cfg['clip_param']),
+            ).mean()
+
+            values_clipped = batch['values'] + (out['values'] - batch['values']).clamp(
+                -cfg['clip_param'], cfg['clip_param'])
+            value_loss = torch.max((out['values'] - batch['returns']) ** 2,
+                                   (values_clipped - batch['returns']) ** 2).mean()
+            entropy = out['entropy'].mean()
+
+            loss = surrogate + cfg['value_loss_coef'] * value_loss - cfg['entropy_coef'] * entropy
+            self.optimizer.zero_grad(set_to_none=True)
+            loss.backward()
+            nn.utils.clip_grad_norm_(self.policy.parameters(), cfg['max_grad_norm'])
+            self.optimizer.step()
+
+            totals += torch.stack([value_loss.detach(), surrogate.detach(), entropy.detach(), kl])
+            n_updates += 1
+
+        value_loss, surrogate, entropy, kl = (totals / max(n_updates, 1)).tolist()
+        return {'value_loss': value_loss, 'surrogate_loss': surrogate, 'entropy': entropy,
+                'kl': kl, 'learning_rate': self.learning_rate}
+
+
+class PPOTrainer:
+    """
+    Collect rollouts from a batched environment and update the policy.
+
+    The environment must follow the G1Env interface: n_envs, num_obs,
+    num_actions, device, reset() -> obs and
+    step(actions) -> (obs, rewards, dones, infos) with device tensors.
+
+    By default the learner runs on the environment device. With a
+    different learner_device (e.g. a CPU simulation and a CUDA learner),
+    rollouts are collected by a copy of the policy on the environment
+    device into a PinnedRolloutBuffer and handed to the learner with
+    asynchronous copies once per iteration.
+    """
+
+    def __init__(self, env, config: Optional[Dict[str, Any]] = None,
+                 actor_hidden: Sequence[int] = (512, 256, 128),
+                 critic_hidden: Sequence[int] = (512, 256, 128),
+                 log_dir: Optional[str] = None, learner_device=None, verbose: bool = True):
+        """
+        Initialize the policy, algorithm and rollout storage.
+
+        Args:
+            env: Batched environment
+            config: Overrides of DEFAULT_PPO_CONFIG
+            actor_hidden: Hidden layer sizes of the policy
+            critic_hidden: Hidden layer sizes of the value function
+            log_dir: Directory for asynchronous checkpoints (None disables saving)
+            learner_device: Device of the learner (default: the env device)
+            verbose: Whether to print a line per logged iteration
+        """
+        self.env = env
+        self.env_device = torch.device(env.device)
+        self.device = torch.device(learner_device) if learner_device is not None else self.env_device
+        self.policy = ActorCritic(env.num_obs, env.num_actions, actor_hidden, critic_hidden).to(self.device)
+        self.algorithm = PPO(self.policy, config)
+        self.config = self.algorithm.config
+        shape = (self.config['num_steps'], env.n_envs, env.num_obs, env.num_actions)
+        self.storage = RolloutStorage(*shape, self.device)
+        self.log_dir = log_dir
+        self.checkpoints = CheckpointManager(log_dir, verbose=verbose) if log_dir else None
+        self.verbose = verbose
+        self.iteration = 0
+        # Observations to continue from (set after learn() or a resume with env state)
+        self._obs = None
+
+        if self.device == self.env_device:
+            self.rollout_policy = self.policy
+            self.rollout_storage = self.storage
+        else:
+            self.rollout_policy = copy.deepcopy(self.policy).to(self.env_device)
+            self.rollout_storage = PinnedRolloutBuffer(*shape)
+
+        # Episode statistics on the env device, read once per iteration
+        self._episode_reward = torch.zeros(env.n_envs, device=self.env_device)
+        self._episode_stats = torch.zeros(3, device=self.env_device)  # reward sum, length sum, count
+
+        # Updated during rollouts on the env device; the policy sees normalized observations
+        self.obs_normalizer = (RunningNormalizer(env.num_obs).to(self.env_device)
+                               if self.config['normalize_observations'] else None)
+
+    def _normalize(self, obs: torch.Tensor, update: bool = True) -> torch.Tensor:
+        if self.obs_normalizer is None:
+            return obs
+        if update:
+            self.obs_normalizer.update(obs)
+        return self.obs_normalizer(obs)
+
+    @torch.no_grad()
+    def _rollout(self, obs: torch.Tensor) -> torch.Tensor:
+        gamma = self.config['gamma']
+        policy, storage = self.rollout_policy, self.rollout_storage
+        for _ in range(self.config['num_steps']):
+            policy_obs = self._normalize(obs)
+            out = policy.act(policy_obs)
+            # Environments may update their observation buffer in place, so
+            # the observations are stored before stepping
+            storage.observations[storage.step].copy_(policy_obs)
+            obs, rewards, dones, infos = self.env.step(out['actions'])
+
+            self._episode_reward += rewards
+            # Bootstrap time-outs: the episode was cut, not finished
+            rewards = rewards + gamma * out['values'] * infos['time_outs'].to(rewards.dtype)
+            storage.add(None, out['actions'], rewards, dones, out['values'],
+                        out['log_probs'], out['mu'], out['sigma'])
+
+            done = dones.to(rewards.dtype)
+            self._episode_stats += torch.stack([
+                (self._episode_reward * done).sum(),
+                infos['episode_length'].to(rewards.dtype).sum(),
+                done.sum(),
+            ])
+            self._episode_reward *= 1.0 - done
+
+        last_values = policy.critic(self._normalize(obs, update=False)).squeeze(-1)
+        storage.compute_returns(last_values, gamma, self.config['lam'])
+        if storage is not self.storage:
+            storage.transfer(self.storage)
+        return obs.clone()
+
+    def _sync_rollout_policy(self):
+        """Copy the updated weights to the rollout policy (separate learner only)."""
+        if self.rollout_policy is not self.policy:
+            self.rollout_policy.load_state_dict(self.policy.state_dict())
+
+    def learn(self, num_iterations: int, log_interval: int = 1, save_interval: int = 100) -> Dict[str, float]:
+        """
+        Train for a number of iterations (one rollout and update each).
+
+        Args:
+            num_iterations: Iterations to run
+            log_interval: Iterations between printed statistics
+            save_interval: Iterations between checkpoints (if log_dir is set)
+
+        Returns:
+            Statistics of the last iteration
+        """
+        obs = self._obs if self._obs is not None else self.env.reset()
+        stats = {}
+        for _ in range(num_iterations):
+            start = time.perf_counter()
+            obs = self._rollout(obs)
+            collect_time = time.perf_counter() - start
+
+            stats = self.algorithm.update(self.storage)
+            self.storage.clear()
+            self.rollout_storage.clear()
+            self._sync_rollout_policy()
+            self.iteration += 1
+
+            reward_sum, length_sum, count = self._episode_stats.tolist()
+            self._episode_stats.zero_()
+            iteration_time = time.perf_counter() - start
+            stats.update({
+                'iteration': self.iteration,
+                'episodes': int(count),
+                'mean_episode_reward': reward_sum / count if count else float('nan'),
+                'mean_episode_length': length_sum / count if count else float('nan'),
+                'steps_per_second': self.config['num_steps'] * self.env.n_envs / iteration_time,
+                'collect_time': collect_time,
+                'learn_time': iteration_time - collect_time,
+            })
+            curriculum = getattr(self.env, 'curriculum', None)
+            if curriculum is not None:
+                levels = curriculum.levels.float().mean(0).tolist()
+                stats.update({f'curriculum/{name}': level for name, level in zip(curriculum.names, levels)})
+
+            if self.verbose and self.iteration % log_interval == 0:
+                print(f"[{self.iteration:5d}] reward {stats['mean_episode_reward']:8.3f}  "
+                      f"length {stats['mean_episode_length']:7.1f}  "
+                      f"value {stats['value_loss']:.4f}  kl {stats['kl']:.4f}  "
+                      f"lr {stats['learning_rate']:.1e}  {stats['steps_per_second']:9.0f} steps/s")
+            if self.checkpoints and self.iteration % save_interval == 0:
+                self.save_checkpoint()
+
+        self._obs = obs
+        if self.checkpoints:
+            if self.iteration % save_interval:
+                self.save_checkpoint()
+            self.checkpoints.wait()
+        return stats
+
+    def state_dict(self) -> Dict[str, Any]:
+        """Policy, optimizer, schedule and observation normalizer state."""
+        state = {
+            'policy': self.policy.state_dict(),
+            'optimizer': self.algorithm.optimizer.state_dict(),
+            'learning_rate': self.algorithm.learning_rate,
+            'iteration': self.iteration,
+            'config': self.config,
+        }
+        if self.obs_normalizer is not None:
+            state['obs_normalizer'] = self.obs_normalizer.state_dict()
+        return state
+
+    def load_state_dict(self, state: Dict[str, Any]):
+        """Restore state from state_dict output."""
+        self.policy.load_state_dict(state['policy'])
+        self.algorithm.optimizer.load_state_dict(state['optimizer'])
+        self.algorithm.learning_rate = state['learning_rate']
+        self.iteration = state['iteration']
+        if self.obs_normalizer is not None and 'obs_normalizer' in state:
+            self.obs_normalizer.load_state_dict(state['obs_normalizer'])
+        self._sync_rollout_policy()
+
+    def save_checkpoint(self):
+        """Queue a checkpoint of the trainer and env state; returns without waiting for disk."""
+        env_state = self.env.snapshot() if hasattr(self.env, 'snapshot') else None
+        self.checkpoints.save(self.iteration, self.state_dict(), env_state)
+
+    def resume(self, path: Optional[str] = None):
+        """
+        Continue from a checkpoint of the manager, restoring env state if saved.
+
+        Args:
+            path: Checkpoint file (default: the latest in log_dir)
+        """
+        checkpoint = self.checkpoints.resume(self, self.env, path)
+        if 'env' in checkpoint and hasattr(self.env, 'get_observations'):
+            self._obs = self.env.get_observations()
+
+    def save(self, path: str):
+        """Save a checkpoint synchronously (atomically)."""
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        tmp_path = path + ".tmp"
+        torch.save(self.state_dict(), tmp_path)
+        os.replace(tmp_path, path)
+
+    def load(self, path: str):
+        """Load a checkpoint written by save."""
+        self.load_state_dict(torch.load(path, map_location=self.device, weights_only=False))
+
+
+def main(argv: Optional[List[str]] = None):
+    from .curriculum import DEFAULT_CURRICULUM_TERMS
+    from .env import DEFAULT_URDF, G1Env
+
+    parser = argparse.ArgumentParser(prog="python -m humanoid_learning train",
+                                     description="Train a G1 locomotion policy with PPO")
+    parser.add_argument("--n-envs", type=int, default=4096)
+    parser.add_argument("--iterations", type=int, default=1500)
+    parser.add_argument("--num-steps", type=int, default=DEFAULT_PPO_CONFIG['num_steps'])
+    parser.add_argument("--learning-rate", type=float, default=DEFAULT_PPO_CONFIG['learning_rate'])
+    parser.add_argument("--urdf", default=DEFAULT_URDF)
+    parser.add_argument("--backend", default="gpu")
+    parser.add_argument("--learner-device", default=None,
+                        help="Run the learner on another device than the simulation (e.g. cuda with --backend cpu)")
+    parser.add_argument("--dt", type=float, default=0.01)
+    parser.add_argument("--substeps", type=int, default=4)
+    parser.add_argument("--save-interval", type=int, default=100)
+    parser.add_argument("--log-dir", default=None,
+                        help="Checkpoint directory (default: humanoid_learning/runs/<timestamp>)")
+    parser.add_argument("--resume", nargs="?", const="latest", default=None,
+                        help="Checkpoint to continue from (default: latest in --log-dir)")
+    parser.add_argument("--normalize-obs", action="store_true",
+                        help="Normalize observations with running statistics")
+    parser.add_argument("--curriculum", action="store_true",
+                        help="Train with the default terrain, push and command speed curriculum")
+    parser.add_argument("--show-viewer", action="store_true")
+    args = parser.parse_args(argv)
+
+    log_dir = args.log_dir
+    if log_dir is None and args.resume and args.resume != "latest":
+        log_dir = os.path.dirname(os.path.abspath(args.resume))
+    log_dir = log_dir or os.path.join(DEFAULT_RUNS_DIR, time.strftime("%Y%m%d_%H%M%S"))
+    env = G1Env(n_envs=args.n_envs, urdf_path=args.urdf, dt=args.dt, substeps=args.substeps,
+                backend=args.backend, show_viewer=args.show_viewer,
+                curriculum=DEFAULT_CURRICULUM_TERMS if args.curriculum else None)
+    trainer = PPOTrainer(env, {'num_steps': args.num_steps, 'learning_rate': args.learning_rate,
+                               'normalize_observations': args.normalize_obs},
+                         log_dir=log_dir, learner_device=args.learner_device)
+    if args.resume:
+        trainer.resume(None if args.resume == "latest" else args.resume)
+        print(f"Resumed from iteration {trainer.iteration}")
+
+    print(f"Training for {args.iterations} iterations, checkpoints in {log_dir}")
+    try:
+        trainer.learn(args.iterations, save_interval=args.save_interval)
+    finally:
+        trainer.checkpoints.close()
@@ -0,0 +1,257 @@
+"""
+Rollout storage for on-policy learning.
+
+All buffers are preallocated once with a fixed (num_steps, num_envs, ...)
+layout on the simulation device. Returns and advantages are computed with
+a reverse scan over time that is vectorized over environments, and
+minibatches are drawn with a permutation generated on the same device.
+"""
+
+from typing import Dict, Iterator, Optional, Tuple
+
+import torch
+
+
+def compute_gae(rewards: torch.Tensor, values: torch.Tensor, dones: torch.Tensor,
+                last_values: torch.Tensor, gamma: float = 0.99, lam: float = 0.95,
+                out: Optional[Tuple[torch.Tensor, torch.Tensor]] = None) -> Tuple[torch.Tensor, torch.Tensor]:
+    """
+    Generalized advantage estimation as a reverse scan over time.
+
+    All TD errors are computed in one batched op; the scan then carries
+    only the running sum, one fused multiply-add over all envs per time
+    step. No Python loop runs over environments, and with `out` the scan
+    writes into preallocated buffers.
+
+    Args:
+        rewards: Rewards (num_steps, num_envs)
+        values: Value estimates (num_steps, num_envs)
+        dones: Episode ends after each step (num_steps, num_envs), bool or float
+        last_values: Value estimates of the observations after the last step (num_envs,)
+        gamma: Discount factor
+        lam: GAE lambda
+        out: Optional (returns, advantages) buffers shaped like values
+
+    Returns:
+        Tuple of (returns, advantages), each (num_steps, num_envs)
+    """
+    returns, advantages = out if out is not None else (torch.empty_like(values), torch.empty_like(values))
+    not_done = 1.0 - dones.to(values.dtype)
+
+    # TD errors, using the returns buffer as scratch for the next values
+    deltas = returns
+    deltas[:-1].copy_(values[1:])
+    deltas[-1].copy_(last_values)
+    deltas.mul_(not_done).mul_(gamma).add_(rewards).sub_(values)
+    decay = not_done.mul_(gamma * lam)
+
+    advantages[-1].copy_(deltas[-1])
+    for t in range(values.shape[0] - 2, -1, -1):
+        torch.addcmul(deltas[t], decay[t], advantages[t + 1], out=advantages[t])
+    torch.add(advantages, values, out=returns)
+    return returns, advantages
+
+
+class RolloutStorage:
+    """
+    Preallocated on-device buffer of one rollout of a batched environment.
+
+    Usage:
+        storage = RolloutStorage(24, env.n_envs, env.num_obs, env.num_actions, env.device)
+        for _ in range(24):
+            storage.add(obs, actions, rewards, dones, values, log_probs, mu, sigma)
+        storage.compute_returns(last_values, gamma, lam)
+        for batch in storage.mini_batches(4, 5):
+            ...
+        storage.clear()
+    """
+
+    FIELDS = ('observations', 'actions', 'rewards', 'dones', 'values',
+              'log_probs', 'mu', 'sigma', 'returns', 'advantages')
+
+    def __init__(self, num_steps: int, num_envs: int, obs_dim: int, action_dim: int,
+                 device='cpu', dtype: torch.dtype = torch.float32, pin_memory: bool = False):
+        """
+        Allocate the buffers.
+
+        Args:
+            num_steps: Steps per env in one rollout
+            num_envs: Number of parallel environments
+            obs_dim: Observation size
+            action_dim: Action size
+            device: Device of the buffers (the simulation device)
+            dtype: Floating point type
+            pin_memory: Allocate page-locked host memory (CPU device only)
+        """
+        self.num_steps = num_steps
+        self.num_envs = num_envs
+        self.device = torch.device(device)
+        self.pin_memory = pin_memory
+
+        def empty(*shape):
+            return torch.zeros((num_steps, num_envs) + shape, dtype=dtype, device=self.device,
+                               pin_memory=pin_memory)
+
+        self.observations = empty(obs_dim)
+        self.actions = empty(action_dim)
+        self.rewards = empty()
+        self.dones = empty()
+        self.values = empty()
+        self.log_probs = empty()
+        self.mu = empty(action_dim)
+        self.sigma = empty(action_dim)
+        self.returns = empty()
+        self.advantages = empty()
+        self.step = 0
+
+    def add(self, observations: Optional[torch.Tensor], actions: torch.Tensor, rewards: torch.Tensor,
+            dones: torch.Tensor, values: torch.Tensor, log_probs: torch.Tensor,
+            mu: torch.Tensor, sigma: torch.Tensor):
+        """
+        Copy one step of transitions into the next slot.
+
+        Args:
+            observations: Observations the actions were taken from
+                (num_envs, obs_dim), or None if already written to
+                observations[step]
+            actions: Actions (num_envs, action_dim)
+            rewards: Rewards (num_envs,)
+            dones: Episode ends (num_envs,)
+            values: Value estimates (num_envs,)
+            log_probs: Action log-probabilities (num_envs,)
+            mu: Action means (num_envs, action_dim)
+            sigma: Action standard deviations (num_envs, action_dim)
+        """
+        if self.step >= self.num_steps:
+            raise IndexError("Rollout storage is full; call clear() first")
+        t = self.step
+        if observations is not None:
+            self.observations[t].copy_(observations)
+        self.actions[t].copy_(actions)
+        self.rewards[t].copy_(rewards)
+        self.dones[t].copy_(dones)
+        self.values[t].copy_(values)
+        self.log_probs[t].copy_(log_probs)
+        self.mu[t].copy_(mu)
+        self.sigma[t].copy_(sigma)
+        self.step += 1
+
+    def clear(self):
+        """Start a new rollout (buffers are reused, not reallocated)."""
+        self.step = 0
+
+    def compute_returns(self, last_values: torch.Tensor, gamma: float = 0.99, lam: float = 0.95,
+                        normalize_advantages: bool = True):
+        """
+        Fill returns and advantages for the stored rollout.
+
+        Args:
+            last_values: Value estimates after the last step (num_envs,)
+            gamma: Discount factor
+            lam: GAE lambda
+            normalize_advantages: Normalize advantages to zero mean and unit std
+        """
+        compute_gae(self.rewards, self.values, self.dones, last_values, gamma, lam,
+                    out=(self.returns, self.advantages))
+        if normalize_advantages:
+            std, mean = torch.std_mean(self.advantages)
+            self.advantages.sub_(mean).div_(std + 1e-8)
+
+    def mini_batches(self, num_mini_batches: int, num_epochs: int = 1) -> Iterator[Dict[str, torch.Tensor]]:
+        """
+        Yield shuffled minibatches of flattened transitions.
+
+        Args:
+            num_mini_batches: Minibatches per epoch
+            num_epochs: Passes over the rollout
+
+        Yields:
+            Dictionary of field name to tensor (batch, ...)
+        """
+        batch_size = self.num_steps * self.num_envs
+        mini_batch_size = batch_size // num_mini_batches
+        flat = {name: getattr(self, name).flatten(0, 1) for name in self.FIELDS}
+        for _ in range(num_epochs):
+            indices = torch.randperm(batch_size, device=self.device)
+            for i in range(num_mini_batches):
+                batch_idx = indices[i * mini_batch_size:(i + 1) * mini_batch_size]
+                yield {name: value[batch_idx] for name, value in flat.items()}
+
+
+class PinnedRolloutBuffer(RolloutStorage):
+    """
+    Host-side rollout buffer for a CPU simulation feeding a learner on
+    another device.
+
+    The buffers are page-locked (when CUDA is available) and allocated
+    once, so per-step writes are plain memcpys and the hand-off to the
+    learner is one asynchronous copy per field into a RolloutStorage on
+    the learner device.
+
+    Usage:
+        buffer = PinnedRolloutBuffer(24, env.n_envs, env.num_obs, env.num_actions)
+        learner_storage = RolloutStorage(24, env.n_envs, env.num_obs, env.num_actions, 'cuda')
+        ... buffer.add(...) per step on the CPU ...
+        buffer.compute_returns(last_values)
+        buffer.transfer(learner_storage)
+        ... learner update ...
+        buffer.clear()
+    """
+
+    def __init__(self, num_steps: int, num_envs: int, obs_dim: int, action_dim: int,
+                 dtype: torch.dtype = torch.float32, pin_memory: Optional[bool] = None):
+        """
+        Allocate the host buffers.
+
+        Args:
+            num_steps: Steps per env in one rollout
+            num_envs: Number of parallel environments
+            obs_dim: Observation size
+            action_dim: Action size
+            dtype: Floating point type
+            pin_memory: Page-lock the buffers (default: if CUDA is available)
+        """
+        if pin_memory is None:
+            pin_memory = torch.cuda.is_available()
+        super().__init__(num_steps, num_envs, obs_dim, action_dim, 'cpu', dtype, pin_memory)
+        self._transfer_done = None
+
+    def _wait_for_transfer(self):
+        """Block until the last asynchronous copy out of the buffers has finished."""
+        if self._transfer_done is not None:
+            self._transfer_done.synchronize()
+            self._transfer_done = None
+
+    def clear(self):
+        """
+        Start a new rollout once the last transfer out of the buffers is done.
+
+        Waiting here rather than in add() also covers slots written
+        directly (e.g. observations[step]) before the step is added.
+        """
+        self._wait_for_transfer()
+        super().clear()
+
+    def transfer(self, target: RolloutStorage, non_blocking: bool = True) -> RolloutStorage:
+        """
+        Copy the rollout, returns and advantages into learner-side storage.
+
+        The copies are asynchronous for a CUDA target and pinned buffers.
+        Work queued on the target device afterwards is ordered after the
+        copies, and clear() waits for them to finish before the buffers
+        are reused.
+
+        Args:
+            target: Preallocated storage on the learner device with the same shape
+            non_blocking: Issue asynchronous copies
+
+        Returns:
+            The target storage, marked as full
+        """
+        for name in self.FIELDS:
+            getattr(target, name).copy_(getattr(self, name), non_blocking=non_blocking)
+        target.step = self.step
+        if non_blocking and target.device.type == 'cuda':
+            self._transfer_done = torch.cuda.Event()
+            self._transfer_done.record(torch.cuda.current_stream(target.device))
+        return target
@@ -0,0 +1,18 @@
+"""
+Robot Asset Tools for Genesis
+
+Provides offline indexing and processing of robot model files so that
+variants can be inspected and selected without loading a scene.
+"""
+
+__version__ = "0.1.0"
+__author__ = "Genesis Humanoid Learning Project"
+
+from .registry import RobotRegistry
+from .urdf_merge import merge_robot_with_hands, load_merge_config
+
+__all__ = [
+    'RobotRegistry',
+    'merge_robot_with_hands',
+    'load_merge_config'
+]
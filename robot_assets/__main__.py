@@ -0,0 +1,25 @@
+"""
+Command line entry point: python -m robot_assets <command> [options]
+"""
+
+import sys
+
+from . import collision, registry, urdf_merge
+
+
+COMMANDS = {
+    'registry': registry.main,
+    'merge': urdf_merge.main,
+    'simplify': collision.main,
+}
+
+
+def main():
+    if len(sys.argv) < 2 or sys.argv[1] not in COMMANDS:
+        print(f"Usage: python -m robot_assets {{{','.join(COMMANDS)}}} [options]")
+        sys.exit(2)
+    COMMANDS[sys.argv[1]](sys.argv[2:])
+
+
+if __name__ == "__main__":
+    main()
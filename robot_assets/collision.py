@@ -0,0 +1,543 @@
+"""
+Primitive collision-model simplification for URDF robots.
+
+Fits spheres, capsules, cylinders or boxes to each link's collision mesh,
+keeps the cheapest primitive whose fit error stays within a user bound and
+writes a simplified URDF variant. A simple support-function cost model is
+used to estimate how much narrow-phase work the simplification saves.
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import xml.etree.ElementTree as ET
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from robot_grounding.kinematics import matrix_to_rpy, rpy_to_matrix
+from robot_grounding.urdf import resolve_mesh_path
+
+from .registry import DEFAULT_ASSETS_ROOT, file_sha256, write_json_atomic
+from .urdf_merge import _rewrite_mesh_paths, _write_tree_atomic
+
+
+DEFAULT_CACHE_DIR = os.path.join(DEFAULT_ASSETS_ROOT, ".cache", "simplified")
+
+# Bump when fitting or emission changes so stale cache entries are not reused
+SIMPLIFY_VERSION = 3
+
+# Primitive kinds tried for each mesh
+PRIMITIVE_KINDS = ('sphere', 'capsule', 'cylinder', 'box')
+
+# Relative narrow-phase cost of one URDF geometry (support points per GJK
+# query). Meshes cost one unit per convex hull vertex. Primitives are priced
+# by the geometries they are emitted as (see primitive_cost).
+GEOM_COST = {
+    'sphere': 1,
+    'cylinder': 4,
+    'box': 8,
+}
+
+
+def primitive_sdf(primitive: Dict, points: np.ndarray) -> np.ndarray:
+    """
+    Signed distance from points to a primitive surface.
+
+    Args:
+        primitive: Primitive dictionary from fit_primitive
+        points: (N, 3) points in the mesh frame
+
+    Returns:
+        (N,) signed distances (negative inside)
+    """
+    local = (points - primitive['center']) @ primitive['rotation']
+    kind = primitive['kind']
+
+    if kind == 'sphere':
+        return np.linalg.norm(local, axis=1) - primitive['radius']
+
+    if kind == 'box':
+        q = np.abs(local) - primitive['size'] / 2
+        outside = np.linalg.norm(np.maximum(q, 0.0), axis=1)
+        return outside + np.minimum(q.max(axis=1), 0.0)
+
+    half_length = primitive['length'] / 2
+    if kind == 'capsule':
+        z = np.clip(local[:, 2], -half_length, half_length)
+        closest = np.stack([np.zeros_like(z), np.zeros_like(z), z], axis=1)
+        return np.linalg.norm(local - closest, axis=1) - primitive['radius']
+
+    # Cylinder: 2D box distance in (radial, axial) coordinates
+    q = np.stack([
+        np.linalg.norm(local[:, :2], axis=1) - primitive['radius'],
+        np.abs(local[:, 2]) - half_length,
+    ], axis=1)
+    outside = np.linalg.norm(np.maximum(q, 0.0), axis=1)
+    return outside + np.minimum(q.max(axis=1), 0.0)
+
+
+def _principal_frame(points: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Center and principal axes of a point set.
+
+    Returns:
+        Tuple of (center, rotation) where rotation columns are sorted by
+        decreasing extent
+    """
+    center = points.mean(axis=0)
+    _, _, vt = np.linalg.svd(points - center, full_matrices=False)
+    rotation = vt.T
+    if np.linalg.det(rotation) < 0:
+        rotation[:, 2] *= -1
+    # Re-center on the bounding box in the principal frame
+    local = (points - center) @ rotation
+    center = center + rotation @ ((local.max(axis=0) + local.min(axis=0)) / 2)
+    return center, rotation
+
+
+def fit_primitive(points: np.ndarray, kind: str) -> Dict:
+    """
+    Fit an enclosing primitive to a point set.
+
+    Args:
+        points: (N, 3) mesh vertices in the mesh frame
+        kind: One of PRIMITIVE_KINDS
+
+    Returns:
+        Primitive dictionary with 'kind', 'center', 'rotation' and size fields
+    """
+    if kind == 'sphere':
+        center = (points.max(axis=0) + points.min(axis=0)) / 2
+        radius = np.linalg.norm(points - center, axis=1).max()
+        return {'kind': kind, 'center': center, 'rotation': np.eye(3), 'radius': float(radius)}
+
+    center, rotation = _principal_frame(points)
+    local = (points - center) @ rotation
+
+    if kind == 'box':
+        size = local.max(axis=0) - local.min(axis=0)
+        return {'kind': kind, 'center': center, 'rotation': rotation, 'size': size}
+
+    # Cylinder and capsule lie along the longest principal axis, which is
+    # moved onto local z (a cyclic permutation keeps the frame right-handed)
+    axis_rotation = np.stack([rotation[:, 1], rotation[:, 2], rotation[:, 0]], axis=1)
+    axial = local[:, 0]
+    radial = np.linalg.norm(local[:, 1:], axis=1)
+    radius = float(radial.max())
+    half_span = float((axial.max() - axial.min()) / 2)
+
+    if kind == 'cylinder':
+        return {'kind': kind, 'center': center, 'rotation': axis_rotation,
+                'radius': radius, 'length': 2 * half_span}
+
+    # Capsule: shorten the segment by the radius, then grow the radius to enclose
+    half_length = max(half_span - radius, 0.0)
+    z = np.clip(axial, -half_length, half_length)
+    radius = float(np.sqrt(radial ** 2 + (axial - z) ** 2).max())
+    return {'kind': 'capsule', 'center': center, 'rotation': axis_rotation,
+            'radius': radius, 'length': 2 * half_length}
+
+
+def fit_error(primitive: Dict, samples: np.ndarray, percentile: float = 95.0) -> float:
+    """
+    Fit error of a primitive against mesh surface samples.
+
+    Args:
+        primitive: Primitive dictionary
+        samples: (N, 3) surface sample points
+        percentile: Percentile of absolute surface distance reported
+
+    Returns:
+        Error in meters
+    """
+    return float(np.percentile(np.abs(primitive_sdf(primitive, samples)), percentile))
+
+
+def load_collision_mesh(path: str, scale: Sequence[float] = (1.0, 1.0, 1.0)):
+    """
+    Load a collision mesh with trimesh.
+
+    Args:
+        path: Mesh file path
+        scale: Per-axis scale from the URDF
+
+    Returns:
+        trimesh.Trimesh instance
+    """
+    import trimesh
+
+    mesh = trimesh.load(path, force='mesh')
+    mesh.apply_scale(np.asarray(scale, dtype=float))
+    return mesh
+
+
+def simplify_mesh(mesh, max_error: float, kinds: Sequence[str] = PRIMITIVE_KINDS) -> Dict:
+    """
+    Choose the cheapest primitive approximating a mesh within an error bound.
+
+    Args:
+        mesh: trimesh.Trimesh in the collision frame
+        max_error: Maximum allowed fit error in meters
+        kinds: Primitive kinds to consider
+
+    Returns:
+        Result dictionary with 'primitive' (or None if no fit qualifies),
+        'error' and the mesh's 'hull_vertices'
+    """
+    points = np.asarray(mesh.vertices, dtype=float)
+    samples = np.concatenate([points, np.asarray(mesh.triangles_center, dtype=float)])
+    hull_vertices = len(mesh.convex_hull.vertices)
+
+    candidates = []
+    for kind in kinds:
+        primitive = fit_primitive(points, kind)
+        error = fit_error(primitive, samples)
+        if error <= max_error:
+            candidates.append((primitive_cost(primitive), error, kind, primitive))
+
+    if not candidates:
+        return {'primitive': None, 'error': None, 'hull_vertices': hull_vertices}
+
+    cost, error, _, primitive = min(candidates, key=lambda c: (c[0], c[1]))
+    return {'primitive': primitive, 'error': error, 'hull_vertices': hull_vertices}
+
+
+def _collision_element(xyz: np.ndarray, rotation: np.ndarray, tag: str,
+                       attrib: Dict[str, str]):
+    """Build a <collision> element with a single primitive geometry."""
+    collision = ET.Element('collision')
+    collision.text = "\n      "
+    collision.tail = "\n    "
+    origin = ET.SubElement(collision, 'origin', {
+        'xyz': " ".join(f"{v:.6g}" for v in xyz),
+        'rpy': " ".join(f"{v:.6g}" for v in matrix_to_rpy(rotation)),
+    })
+    origin.tail = "\n      "
+    geometry = ET.SubElement(collision, 'geometry')
+    geometry.text = "\n        "
+    geometry.tail = "\n    "
+    shape = ET.SubElement(geometry, tag, attrib)
+    shape.tail = "\n      "
+    return collision
+
+
+def primitive_to_collisions(primitive: Dict, origin_xyz: Sequence[float],
+                            origin_rpy: Sequence[float]) -> List:
+    """
+    Convert a fitted primitive into URDF <collision> elements.
+
+    Capsules are emitted as a cylinder plus two end spheres, since URDF
+    has no capsule geometry. Capsules and cylinders of zero length become
+    a single sphere.
+
+    Args:
+        primitive: Primitive dictionary in the mesh frame
+        origin_xyz: Origin of the original collision element
+        origin_rpy: Orientation of the original collision element
+
+    Returns:
+        List of <collision> elements in the link frame
+    """
+    origin_rotation = rpy_to_matrix(origin_rpy)
+    center = np.asarray(origin_xyz) + origin_rotation @ primitive['center']
+    rotation = origin_rotation @ primitive['rotation']
+    kind = primitive['kind']
+
+    if kind == 'box':
+        return [_collision_element(center, rotation, 'box',
+                                   {'size': " ".join(f"{v:.6g}" for v in primitive['size'])})]
+    if kind == 'sphere' or primitive['length'] <= 0:
+        return [_collision_element(center, np.eye(3), 'sphere',
+                                   {'radius': f"{primitive['radius']:.6g}"})]
+
+    elements = [_collision_element(center, rotation, 'cylinder', {
+        'radius': f"{primitive['radius']:.6g}",
+        'length': f"{primitive['length']:.6g}",
+    })]
+    if kind == 'capsule':
+        axis = rotation[:, 2]
+        for sign in (-1.0, 1.0):
+            elements.append(_collision_element(
+                center + sign * axis * primitive['length'] / 2, np.eye(3), 'sphere',
+                {'radius': f"{primitive['radius']:.6g}"},
+            ))
+    return elements
+
+
+def _geometry_cost(collision) -> int:
+    """Cost of a primitive <collision> element under GEOM_COST."""
+    shape = collision.find('geometry')[0]
+    return GEOM_COST.get(shape.tag, GEOM_COST['box'])
+
+
+def primitive_cost(primitive: Dict) -> int:
+    """
+    Cost of a fitted primitive as emitted into the URDF.
+
+    A capsule becomes a cylinder plus two spheres, so it is priced as the
+    sum of those parts rather than as a single geometry.
+    """
+    return sum(_geometry_cost(element)
+               for element in primitive_to_collisions(primitive, (0.0, 0.0, 0.0), (0.0, 0.0, 0.0)))
+
+
+def estimate_pair_cost(link_costs: Dict[str, List[int]], adjacent: set) -> Tuple[int, int]:
+    """
+    Estimate narrow-phase cost over all self-collision link pairs.
+
+    Each geometry pair costs the sum of both geometries' support costs.
+    Links connected by a joint are skipped, matching the default
+    self-collision filtering of adjacent links.
+
+    Args:
+        link_costs: Mapping of link name to per-geometry costs
+        adjacent: Set of frozenset({parent, child}) link pairs
+
+    Returns:
+        Tuple of (number of link pairs, total estimated cost)
+    """
+    names = sorted(name for name, costs in link_costs.items() if costs)
+    n_pairs = 0
+    total = 0
+    for i, a in enumerate(names):
+        costs_a = link_costs[a]
+        for b in names[i + 1:]:
+            if frozenset((a, b)) in adjacent:
+                continue
+            costs_b = link_costs[b]
+            n_pairs += 1
+            total += len(costs_b) * sum(costs_a) + len(costs_a) * sum(costs_b)
+    return n_pairs, total
+
+
+def simplify_urdf_tree(urdf_path: str, output_dir: str, max_error: float = 0.01,
+                       link_filter: Optional[Sequence[str]] = None,
+                       kinds: Sequence[str] = PRIMITIVE_KINDS,
+                       verbose: bool = False) -> Tuple[ET.ElementTree, Dict]:
+    """
+    Replace mesh collisions in a URDF with fitted primitives.
+
+    Args:
+        urdf_path: Source URDF
+        output_dir: Directory the result will be written to (for mesh paths)
+        max_error: Maximum allowed fit error in meters
+        link_filter: Only simplify links whose name contains one of these substrings
+        kinds: Primitive kinds to consider
+        verbose: Whether to print per-link results
+
+    Returns:
+        Tuple of (simplified tree, report dictionary). The report lists one
+        entry per simplified mesh collision under each link name. Collisions
+        whose mesh file is missing are left unchanged and listed under
+        'missing_meshes'.
+    """
+    base_dir = os.path.dirname(os.path.abspath(urdf_path))
+    tree = ET.parse(urdf_path)
+    root = tree.getroot()
+
+    links_report = {}
+    missing_meshes = []
+    costs_before = {}
+    costs_after = {}
+
+    for link in root.findall('link'):
+        name = link.attrib.get('name', '')
+        selected = not link_filter or any(pattern in name for pattern in link_filter)
+        before = []
+        after = []
+
+        for collision in link.findall('collision'):
+            geometry = collision.find('geometry')
+            if geometry is None or len(geometry) == 0:
+                continue
+            shape = geometry[0]
+            if shape.tag != 'mesh':
+                before.append(_geometry_cost(collision))
+                after.append(before[-1])
+                continue
+
+            path = resolve_mesh_path(shape.attrib.get('filename', ''), base_dir)
+            scale = [float(v) for v in shape.attrib.get('scale', '1 1 1').split()]
+            if not os.path.exists(path):
+                # Unknown cost: leave the collision out of both estimates
+                missing_meshes.append({'link': name, 'path': path})
+                if verbose:
+                    print(f"  {name:<40} mesh file not found, skipped: {path}")
+                continue
+            mesh = load_collision_mesh(path, scale)
+            result = simplify_mesh(mesh, max_error, kinds) if selected else {
+                'primitive': None, 'error': None,
+                'hull_vertices': len(mesh.convex_hull.vertices),
+            }
+            before.append(result['hull_vertices'])
+
+            primitive = result['primitive']
+            if primitive is None:
+                after.append(result['hull_vertices'])
+                if selected:
+                    links_report.setdefault(name, []).append(
+                        {'kind': 'mesh', 'error': None, 'hull_vertices': result['hull_vertices']})
+                    if verbose:
+                        print(f"  {name:<40} mesh({result['hull_vertices']:>4} verts) -> "
+                              f"kept (no primitive within bound)")
+                continue
+
+            origin = collision.find('origin')
+            attrib = origin.attrib if origin is not None else {}
+            origin_xyz = [float(v) for v in attrib.get('xyz', '0 0 0').split()]
+            origin_rpy = [float(v) for v in attrib.get('rpy', '0 0 0').split()]
+
+            index = list(link).index(collision)
+            link.remove(collision)
+            elements = primitive_to_collisions(primitive, origin_xyz, origin_rpy)
+            for offset, element in enumerate(elements):
+                link.insert(index + offset, element)
+                after.append(_geometry_cost(element))
+
+            links_report.setdefault(name, []).append(
+                {'kind': primitive['kind'], 'error': result['error'],
+                 'hull_vertices': result['hull_vertices']})
+            if verbose:
+                print(f"  {name:<40} mesh({result['hull_vertices']:>4} verts) -> "
+                      f"{primitive['kind']:<8} error {result['error'] * 1000:.1f}mm")
+
+        costs_before[name] = before
+        costs_after[name] = after
+
+    adjacent = {
+        frozenset((joint.find('parent').attrib['link'], joint.find('child').attrib['link']))
+        for joint in root.findall('joint')
+    }
+    n_pairs, cost_before = estimate_pair_cost(costs_before, adjacent)
+    _, cost_after = estimate_pair_cost(costs_after, adjacent)
+
+    _rewrite_mesh_paths(root, base_dir, base_dir, output_dir)
+    root.attrib['name'] = root.attrib.get('name', '') + "_simplified"
+
+    report = {
+        'source': os.path.abspath(urdf_path),
+        'max_error': max_error,
+        'links': links_report,
+        'missing_meshes': missing_meshes,
+        'n_link_pairs': n_pairs,
+        'estimated_pair_cost_before': cost_before,
+        'estimated_pair_cost_after': cost_after,
+        'estimated_cost_reduction': 1.0 - cost_after / cost_before if cost_before else 0.0,
+    }
+    return tree, report
+
+
+def simplify_cache_key(urdf_path: str, max_error: float, link_filter: Optional[Sequence[str]],
+                       kinds: Sequence[str]) -> str:
+    """
+    Compute the content address of a simplification.
+
+    The key covers the URDF, every referenced collision mesh and all
+    fitting parameters.
+    """
+    base_dir = os.path.dirname(os.path.abspath(urdf_path))
+    meshes = {}
+    for collision in ET.parse(urdf_path).getroot().iter('collision'):
+        for mesh in collision.iter('mesh'):
+            path = resolve_mesh_path(mesh.attrib.get('filename', ''), base_dir)
+            if path not in meshes and os.path.exists(path):
+                meshes[path] = file_sha256(path)
+
+    payload = {
+        'version': SIMPLIFY_VERSION,
+        'urdf': file_sha256(urdf_path),
+        'meshes': sorted(meshes.values()),
+        'max_error': max_error,
+        'link_filter': sorted(link_filter or []),
+        'kinds': list(kinds),
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode()).hexdigest()
+
+
+def simplify_urdf(urdf_path: str, max_error: float = 0.01,
+                  link_filter: Optional[Sequence[str]] = None,
+                  kinds: Sequence[str] = PRIMITIVE_KINDS,
+                  cache_dir: str = DEFAULT_CACHE_DIR, force: bool = False,
+                  verbose: bool = False) -> Tuple[str, Dict]:
+    """
+    Write a simplified-collision variant of a URDF to the cache.
+
+    Args:
+        urdf_path: Source URDF
+        max_error: Maximum allowed fit error in meters
+        link_filter: Only simplify links whose name contains one of these substrings
+        kinds: Primitive kinds to consider
+        cache_dir: Root of the content-addressed cache
+        force: Regenerate even if a cached result exists
+        verbose: Whether to print per-link results
+
+    Returns:
+        Tuple of (path to simplified URDF, report dictionary)
+    """
+    key = simplify_cache_key(urdf_path, max_error, link_filter, kinds)
+    name = os.path.splitext(os.path.basename(urdf_path))[0] + "_simplified"
+    output_path = os.path.join(cache_dir, key[:16], f"{name}.urdf")
+    report_path = os.path.join(cache_dir, key[:16], f"{name}.report.json")
+
+    if not force and os.path.exists(output_path) and os.path.exists(report_path):
+        if verbose:
+            print(f"Using cached simplification: {output_path}")
+        with open(report_path) as f:
+            return output_path, json.load(f)
+
+    tree, report = simplify_urdf_tree(urdf_path, os.path.dirname(output_path), max_error,
+                                      link_filter, kinds, verbose)
+    _write_tree_atomic(tree, output_path)
+    write_json_atomic(report_path, report)
+    return output_path, report
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(prog="python -m robot_assets simplify",
+                                     description="Replace collision meshes with fitted primitives")
+    parser.add_argument("--urdf", default="g1", help="URDF path or registry variant name")
+    parser.add_argument("--max-error", type=float, default=0.01,
+                        help="Maximum fit error in meters (95th percentile surface distance)")
+    parser.add_argument("--links", default=None,
+                        help="Comma separated link name substrings to simplify (default: all)")
+    parser.add_argument("--kinds", default=",".join(PRIMITIVE_KINDS),
+                        help="Comma separated primitive kinds to try")
+    parser.add_argument("--cache-dir", default=DEFAULT_CACHE_DIR)
+    parser.add_argument("--force", action="store_true", help="Ignore cached results")
+    args = parser.parse_args(argv)
+
+    urdf_path = args.urdf
+    if not os.path.exists(urdf_path):
+        from .registry import RobotRegistry
+        urdf_path = RobotRegistry().urdf_path(args.urdf)
+
+    link_filter = args.links.split(",") if args.links else None
+    kinds = [kind for kind in args.kinds.split(",") if kind]
+    for kind in kinds:
+        if kind not in PRIMITIVE_KINDS:
+            parser.error(f"Unknown primitive kind '{kind}'")
+
+    print(f"Simplifying {os.path.basename(urdf_path)} (max error {args.max_error * 1000:.1f}mm)")
+    output_path, report = simplify_urdf(urdf_path, args.max_error, link_filter, kinds,
+                                        args.cache_dir, args.force, verbose=True)
+
+    collisions = [(name, info) for name, entries in report['links'].items() for info in entries]
+    kept = sorted({name for name, info in collisions if info['kind'] == 'mesh'})
+    simplified = sum(info['kind'] != 'mesh' for _, info in collisions)
+    print(f"\nSimplified {simplified}/{len(collisions)} mesh collisions")
+    if kept:
+        print(f"Kept meshes: {', '.join(kept)}")
+    if report['missing_meshes']:
+        print(f"Missing mesh files (skipped): "
+              f"{', '.join(entry['link'] for entry in report['missing_meshes'])}")
+    print(f"Self-collision link pairs: {report['n_link_pairs']}")
+    print(f"Estimated narrow-phase cost: {report['estimated_pair_cost_before']} -> "
+          f"{report['estimated_pair_cost_after']} "
+          f"({report['estimated_cost_reduction'] * 100:.1f}% reduction)")
+    print(output_path)
+
+
+if __name__ == "__main__":
+    main()
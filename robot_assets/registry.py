@@ -0,0 +1,363 @@
+"""
+Indexed registry of robot model variants.
+
+Scans the robot asset directory once, parses every URDF and stores the
+extracted metadata in a persistent JSON index. Entries are re-parsed only
+when the underlying file changes, so variants can be queried and selected
+without building a Genesis scene.
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import tempfile
+from typing import Any, Callable, Dict, List, Optional
+
+from robot_grounding.detector import FootDetector
+from robot_grounding.urdf import parse_urdf
+
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_ASSETS_ROOT = os.path.join(PROJECT_ROOT, "assets", "robots")
+INDEX_FILENAME = ".registry_index.json"
+INDEX_VERSION = 1
+
+
+def file_sha256(path: str, chunk_size: int = 1 << 20) -> str:
+    """
+    Compute the SHA-256 digest of a file.
+
+    Args:
+        path: File to hash
+        chunk_size: Read size in bytes
+
+    Returns:
+        Hex digest string
+    """
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def write_json_atomic(path: str, data: Any):
+    """
+    Write JSON to a file through a temporary file and atomic rename.
+
+    Args:
+        path: Destination path
+        data: JSON-serializable object
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(fd, 'w') as f:
+            json.dump(data, f, indent=1, sort_keys=True)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def is_hand_link(link_name: str) -> bool:
+    """
+    Check if a link name suggests it belongs to a hand.
+
+    Args:
+        link_name: Name of the link
+
+    Returns:
+        True if the name matches one of FootDetector.EXCLUDE_KEYWORDS
+    """
+    name_lower = link_name.lower()
+    return any(keyword in name_lower for keyword in FootDetector.EXCLUDE_KEYWORDS)
+
+
+def extract_metadata(urdf_path: str, assets_root: str) -> Dict[str, Any]:
+    """
+    Parse a URDF file and extract the metadata stored in the index.
+
+    Args:
+        urdf_path: Path to the URDF file
+        assets_root: Asset root used to make stored paths relative
+
+    Returns:
+        JSON-serializable metadata dictionary
+    """
+    model = parse_urdf(urdf_path)
+
+    end_links = [
+        link for link in model.links
+        if FootDetector.is_end_link(link, model.links)
+    ]
+    foot_links = [link.name for link in FootDetector.detect_foot_links(model)]
+    hand_links = [link.name for link in model.links if is_hand_link(link.name)]
+
+    mjcf_path = os.path.splitext(urdf_path)[0] + ".xml"
+    mesh_files = model.mesh_files()
+
+    return {
+        'robot_name': model.name,
+        'urdf': os.path.relpath(urdf_path, assets_root),
+        'mjcf': os.path.relpath(mjcf_path, assets_root) if os.path.exists(mjcf_path) else None,
+        'n_links': model.n_links,
+        'n_joints': model.n_joints,
+        'n_dofs': model.n_dofs,
+        'root_link': model.root_link.name if model.root_link else None,
+        'dof_names': [joint.name for joint in model.dof_joints],
+        'dof_limits': {
+            joint.name: joint.limit for joint in model.dof_joints if joint.limit
+        },
+        'end_links': [link.name for link in end_links],
+        'foot_links': foot_links,
+        'hand_links': hand_links,
+        'link_masses': {link.name: link.mass for link in model.links},
+        'total_mass': model.total_mass,
+        'mesh_files': [os.path.relpath(p, assets_root) for p in mesh_files],
+        'missing_meshes': [
+            os.path.relpath(p, assets_root) for p in mesh_files if not os.path.exists(p)
+        ],
+    }
+
+
+class RobotRegistry:
+    """
+    Persistent index of robot model variants found under an asset directory.
+
+    Each URDF file becomes a variant named after its file stem. Symlinked
+    files (such as `g1.urdf`) are registered as aliases of their target.
+    """
+
+    def __init__(self, assets_root: str = DEFAULT_ASSETS_ROOT,
+                 index_path: Optional[str] = None, verbose: bool = False):
+        """
+        Initialize the registry and load or build the index.
+
+        Args:
+            assets_root: Directory scanned recursively for URDF files
+            index_path: Location of the JSON index (default: inside assets_root)
+            verbose: Whether to print scan information
+        """
+        self.assets_root = os.path.abspath(assets_root)
+        self.index_path = index_path or os.path.join(self.assets_root, INDEX_FILENAME)
+        self.verbose = verbose
+
+        self._entries: Dict[str, Dict[str, Any]] = {}
+        self._aliases: Dict[str, str] = {}
+        self.refresh()
+
+    def _load_index(self) -> Dict[str, Any]:
+        """Load the stored index, ignoring missing or incompatible files."""
+        try:
+            with open(self.index_path) as f:
+                index = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        if index.get('version') != INDEX_VERSION:
+            return {}
+        return index.get('files', {})
+
+    def _scan_files(self) -> List[str]:
+        """Find all URDF files below the asset root in a stable order."""
+        found = []
+        for dirpath, dirnames, filenames in os.walk(self.assets_root):
+            # Skip hidden directories such as generated caches
+            dirnames[:] = sorted(d for d in dirnames if not d.startswith('.'))
+            for filename in sorted(filenames):
+                if filename.endswith('.urdf'):
+                    found.append(os.path.join(dirpath, filename))
+        return found
+
+    def refresh(self) -> int:
+        """
+        Rescan the asset root and update stale index entries.
+
+        An entry is reused while the file's mtime and size are unchanged.
+        Otherwise the file is hashed and re-parsed only if its content
+        differs from the indexed hash.
+
+        Returns:
+            Number of files that were (re-)parsed
+        """
+        stored = self._load_index()
+        files = {}
+        aliases = {}
+        n_parsed = 0
+
+        for path in self._scan_files():
+            rel_path = os.path.relpath(path, self.assets_root)
+            name = os.path.splitext(os.path.basename(path))[0]
+
+            if os.path.islink(path):
+                target = os.path.splitext(os.path.basename(os.path.realpath(path)))[0]
+                aliases[name] = target
+                continue
+
+            stat = os.stat(path)
+            entry = stored.get(rel_path)
+            if entry and entry['mtime_ns'] == stat.st_mtime_ns and entry['size'] == stat.st_size:
+                files[rel_path] = entry
+                continue
+
+            sha256 = file_sha256(path)
+            if entry is None or entry['sha256'] != sha256:
+                if self.verbose:
+                    print(f"  Indexing {rel_path}")
+                metadata = extract_metadata(path, self.assets_root)
+                metadata['name'] = name
+                n_parsed += 1
+            else:
+                metadata = entry['metadata']
+
+            files[rel_path] = {
+                'mtime_ns': stat.st_mtime_ns,
+                'size': stat.st_size,
+                'sha256': sha256,
+                'metadata': metadata,
+            }
+
+        self._entries = {entry['metadata']['name']: entry for entry in files.values()}
+        self._aliases = {
+            alias: target for alias, target in aliases.items() if target in self._entries
+        }
+
+        if files != stored:
+            write_json_atomic(self.index_path, {'version': INDEX_VERSION, 'files': files})
+
+        if self.verbose:
+            print(f"RobotRegistry: {len(self._entries)} variants "
+                  f"({n_parsed} parsed, {len(self._entries) - n_parsed} cached)")
+
+        return n_parsed
+
+    def names(self) -> List[str]:
+        """
+        Get all registered variant names.
+
+        Returns:
+            Sorted list of variant names (aliases excluded)
+        """
+        return sorted(self._entries)
+
+    @property
+    def aliases(self) -> Dict[str, str]:
+        """Mapping of alias name to variant name."""
+        return dict(self._aliases)
+
+    def resolve(self, name: str) -> str:
+        """
+        Resolve an alias or variant name to a variant name.
+
+        Args:
+            name: Variant name, alias or URDF file name
+
+        Returns:
+            Canonical variant name
+        """
+        name = os.path.splitext(os.path.basename(name))[0]
+        name = self._aliases.get(name, name)
+        if name not in self._entries:
+            raise KeyError(f"Unknown robot variant '{name}'")
+        return name
+
+    def get(self, name: str) -> Dict[str, Any]:
+        """
+        Get indexed metadata for a variant.
+
+        Args:
+            name: Variant name or alias
+
+        Returns:
+            Metadata dictionary
+        """
+        return self._entries[self.resolve(name)]['metadata']
+
+    def urdf_path(self, name: str) -> str:
+        """
+        Get the absolute URDF path of a variant.
+
+        Args:
+            name: Variant name or alias
+
+        Returns:
+            Absolute path to the URDF file
+        """
+        return os.path.join(self.assets_root, self.get(name)['urdf'])
+
+    def query(self, predicate: Callable[[Dict[str, Any]], bool]) -> List[str]:
+        """
+        Select variants whose metadata satisfies a predicate.
+
+        Args:
+            predicate: Function receiving the metadata dictionary
+
+        Returns:
+            Sorted list of matching variant names
+        """
+        return [name for name in self.names() if predicate(self._entries[name]['metadata'])]
+
+    def select(self, min_dofs: Optional[int] = None, max_dofs: Optional[int] = None,
+               has_feet: Optional[bool] = None, has_hands: Optional[bool] = None,
+               name_contains: Optional[str] = None) -> List[str]:
+        """
+        Select variants by common criteria.
+
+        Args:
+            min_dofs: Minimum number of DOFs
+            max_dofs: Maximum number of DOFs
+            has_feet: Require (True) or exclude (False) detected foot links
+            has_hands: Require (True) or exclude (False) hand links
+            name_contains: Substring that must appear in the variant name
+
+        Returns:
+            Sorted list of matching variant names
+        """
+        def predicate(meta):
+            if min_dofs is not None and meta['n_dofs'] < min_dofs:
+                return False
+            if max_dofs is not None and meta['n_dofs'] > max_dofs:
+                return False
+            if has_feet is not None and bool(meta['foot_links']) != has_feet:
+                return False
+            if has_hands is not None and bool(meta['hand_links']) != has_hands:
+                return False
+            if name_contains is not None and name_contains not in meta['name']:
+                return False
+            return True
+
+        return self.query(predicate)
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(prog="python -m robot_assets registry",
+                                     description="List indexed robot model variants")
+    parser.add_argument("--root", default=DEFAULT_ASSETS_ROOT, help="Robot asset directory")
+    parser.add_argument("--min-dofs", type=int, default=None)
+    parser.add_argument("--max-dofs", type=int, default=None)
+    parser.add_argument("--contains", default=None, help="Substring of the variant name")
+    parser.add_argument("--json", action="store_true", help="Print full metadata as JSON")
+    args = parser.parse_args(argv)
+
+    registry = RobotRegistry(args.root, verbose=not args.json)
+    names = registry.select(min_dofs=args.min_dofs, max_dofs=args.max_dofs,
+                            name_contains=args.contains)
+
+    if args.json:
+        print(json.dumps({name: registry.get(name) for name in names}, indent=2))
+        return
+
+    print(f"{'variant':<45} {'links':>5} {'dofs':>4} {'mass':>7}  feet")
+    for name in names:
+        meta = registry.get(name)
+        print(f"{name:<45} {meta['n_links']:>5} {meta['n_dofs']:>4} "
+              f"{meta['total_mass']:>7.2f}  {', '.join(meta['foot_links'])}")
+    for alias, target in sorted(registry.aliases.items()):
+        print(f"{alias} -> {target}")
+
+
+if __name__ == "__main__":
+    main()
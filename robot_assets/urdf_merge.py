@@ -0,0 +1,327 @@
+"""
+Programmatic URDF merging of the G1 body with Inspire hands.
+
+Scripted replacement for `assets/robots/g1/merge_g1_29dof_and_inspire_hand.ipynb`.
+The remove rules are read from `inspire_hand/config.yaml`; hand URDFs are
+attached through the stub link they share with the body (e.g.
+`left_wrist_yaw_link`). Merged files are written to a content-addressed
+cache so identical inputs are never regenerated.
+"""
+
+import argparse
+import ast
+import copy
+import hashlib
+import json
+import os
+import tempfile
+import xml.etree.ElementTree as ET
+from typing import Any, Dict, List, Optional
+
+from robot_grounding.urdf import resolve_mesh_path
+
+from .registry import DEFAULT_ASSETS_ROOT, file_sha256
+
+
+G1_DIR = os.path.join(DEFAULT_ASSETS_ROOT, "g1")
+DEFAULT_HAND_DIR = os.path.join(G1_DIR, "inspire_hand")
+DEFAULT_CONFIG_PATH = os.path.join(DEFAULT_HAND_DIR, "config.yaml")
+DEFAULT_CACHE_DIR = os.path.join(DEFAULT_ASSETS_ROOT, ".cache", "merged")
+
+# Bump when the merge logic changes so stale cache entries are not reused
+MERGE_VERSION = 1
+
+# Hand sides and their config key prefixes
+HAND_SIDES = {
+    'left': 'L_hand',
+    'right': 'R_hand',
+}
+
+
+def load_merge_config(path: str = DEFAULT_CONFIG_PATH) -> Dict[str, List[str]]:
+    """
+    Load the merge rules from a YAML config file.
+
+    PyYAML is used when available. Otherwise the flat `key: [items]`
+    layout used by `inspire_hand/config.yaml` is parsed directly.
+
+    Args:
+        path: Path to the config file
+
+    Returns:
+        Mapping of rule name to list of link/joint names
+    """
+    with open(path) as f:
+        text = f.read()
+
+    try:
+        import yaml
+        config = yaml.safe_load(text) or {}
+    except ImportError:
+        config = {}
+        for line in text.splitlines():
+            line = line.split('#', 1)[0].strip()
+            if not line or ':' not in line:
+                continue
+            key, value = line.split(':', 1)
+            config[key.strip()] = ast.literal_eval(value.strip())
+
+    return {key: list(value or []) for key, value in config.items()}
+
+
+def _remove_elements(root, tag: str, names: List[str], verbose: bool = False) -> List[str]:
+    """
+    Remove direct children with a given tag and name.
+
+    Args:
+        root: XML root element
+        tag: Element tag ('link' or 'joint')
+        names: Names to remove
+        verbose: Whether to print removed elements
+
+    Returns:
+        Names that were removed
+    """
+    removed = []
+    for element in list(root):
+        if element.tag == tag and element.attrib.get('name') in names:
+            root.remove(element)
+            removed.append(element.attrib['name'])
+            if verbose:
+                print(f"  Removed {tag} {element.attrib['name']}")
+    return removed
+
+
+def _rewrite_mesh_paths(root, source_dir: str, fallback_dir: str, output_dir: str):
+    """
+    Rewrite mesh references so they resolve from the output directory.
+
+    Args:
+        root: XML root element of the source URDF
+        source_dir: Directory of the source URDF
+        fallback_dir: Directory tried when a mesh is missing next to the source
+        output_dir: Directory the merged URDF will be written to
+    """
+    for mesh in root.iter('mesh'):
+        filename = mesh.attrib.get('filename')
+        if not filename:
+            continue
+        path = resolve_mesh_path(filename, source_dir)
+        if not os.path.exists(path):
+            candidate = resolve_mesh_path(filename, fallback_dir)
+            if os.path.exists(candidate):
+                path = candidate
+        mesh.attrib['filename'] = os.path.relpath(path, output_dir)
+
+
+def _validate_tree(root):
+    """
+    Check that the merged model is a consistent kinematic tree.
+
+    Args:
+        root: XML root element of the merged URDF
+
+    Raises:
+        ValueError: On duplicate names or joints referencing missing links
+    """
+    link_names = [el.attrib.get('name') for el in root.findall('link')]
+    joint_names = [el.attrib.get('name') for el in root.findall('joint')]
+
+    for kind, names in (('link', link_names), ('joint', joint_names)):
+        duplicates = sorted({n for n in names if names.count(n) > 1})
+        if duplicates:
+            raise ValueError(f"Duplicate {kind} names after merge: {duplicates}")
+
+    links = set(link_names)
+    children = set()
+    for joint in root.findall('joint'):
+        parent = joint.find('parent').attrib['link']
+        child = joint.find('child').attrib['link']
+        if parent not in links or child not in links:
+            raise ValueError(
+                f"Joint '{joint.attrib.get('name')}' references missing link "
+                f"({parent} -> {child})"
+            )
+        if child in children:
+            raise ValueError(f"Link '{child}' has more than one parent joint")
+        children.add(child)
+
+
+def merge_urdf(base_urdf: str, hand_urdfs: Dict[str, str], config: Dict[str, List[str]],
+               output_dir: str, robot_name: Optional[str] = None,
+               verbose: bool = False) -> ET.ElementTree:
+    """
+    Merge hand URDFs into a base URDF.
+
+    Args:
+        base_urdf: Path to the body URDF
+        hand_urdfs: Mapping of side ('left'/'right') to hand URDF path
+        config: Merge rules (see load_merge_config)
+        output_dir: Directory the result will be written to (for mesh paths)
+        robot_name: Name attribute of the merged robot
+        verbose: Whether to print merge steps
+
+    Returns:
+        Merged ElementTree
+    """
+    base_dir = os.path.dirname(os.path.abspath(base_urdf))
+    tree = ET.parse(base_urdf)
+    root = tree.getroot()
+    if robot_name:
+        root.attrib['name'] = robot_name
+
+    _remove_elements(root, 'link', config.get('G1_remove_links', []), verbose)
+    _remove_elements(root, 'joint', config.get('G1_remove_joints', []), verbose)
+    _rewrite_mesh_paths(root, base_dir, base_dir, output_dir)
+
+    for side in sorted(hand_urdfs):
+        hand_path = hand_urdfs[side]
+        prefix = HAND_SIDES[side]
+        hand_root = ET.parse(hand_path).getroot()
+
+        _remove_elements(hand_root, 'link', config.get(f'{prefix}_remove_links', []))
+        _remove_elements(hand_root, 'joint', config.get(f'{prefix}_remove_joints', []))
+        _rewrite_mesh_paths(hand_root, os.path.dirname(os.path.abspath(hand_path)),
+                            base_dir, output_dir)
+
+        n_added = 0
+        for element in hand_root:
+            if element.tag in ('link', 'joint'):
+                root.append(copy.deepcopy(element))
+                n_added += 1
+        if verbose:
+            print(f"  Attached {side} hand: {n_added} elements from {os.path.basename(hand_path)}")
+
+    _validate_tree(root)
+    return tree
+
+
+def merge_cache_key(base_urdf: str, hand_urdfs: Dict[str, str],
+                    config: Dict[str, List[str]], robot_name: str) -> str:
+    """
+    Compute the content address of a merge.
+
+    Args:
+        base_urdf: Path to the body URDF
+        hand_urdfs: Mapping of side to hand URDF path
+        config: Merge rules
+        robot_name: Name of the merged robot
+
+    Returns:
+        Hex digest identifying the merge inputs
+    """
+    payload = {
+        'version': MERGE_VERSION,
+        'robot_name': robot_name,
+        'base': file_sha256(base_urdf),
+        'hands': {side: file_sha256(path) for side, path in sorted(hand_urdfs.items())},
+        'config': config,
+    }
+    encoded = json.dumps(payload, sort_keys=True).encode()
+    return hashlib.sha256(encoded).hexdigest()
+
+
+def _write_tree_atomic(tree: ET.ElementTree, path: str):
+    """Write an ElementTree through a temporary file and atomic rename."""
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    os.close(fd)
+    try:
+        tree.write(tmp_path)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def merge_robot_with_hands(base_urdf: str, hand_type: str,
+                           config_path: str = DEFAULT_CONFIG_PATH,
+                           hand_dir: str = DEFAULT_HAND_DIR,
+                           output_path: Optional[str] = None,
+                           cache_dir: str = DEFAULT_CACHE_DIR,
+                           force: bool = False, verbose: bool = False) -> str:
+    """
+    Merge a G1 body URDF with left and right Inspire hands.
+
+    Args:
+        base_urdf: Path to the body URDF
+        hand_type: Inspire hand type ('FTP' or 'DFQ')
+        config_path: Path to the merge rules
+        hand_dir: Directory containing `{hand_type}_{side}_hand.urdf`
+        output_path: Copy the result to this path (optional)
+        cache_dir: Root of the content-addressed cache
+        force: Regenerate even if a cached result exists
+        verbose: Whether to print merge steps
+
+    Returns:
+        Path to the merged URDF (output_path if given, else the cache entry)
+    """
+    config = load_merge_config(config_path)
+    hand_urdfs = {
+        side: os.path.join(hand_dir, f"{hand_type}_{side}_hand.urdf") for side in HAND_SIDES
+    }
+    for path in [base_urdf] + list(hand_urdfs.values()):
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"URDF not found: {path}")
+
+    base_name = os.path.splitext(os.path.basename(base_urdf))[0]
+    robot_name = f"{base_name}_with_inspire_hand_{hand_type}"
+
+    key = merge_cache_key(base_urdf, hand_urdfs, config, robot_name)
+    cached_path = os.path.join(cache_dir, key[:16], f"{robot_name}.urdf")
+
+    if force or not os.path.exists(cached_path):
+        if verbose:
+            print(f"Merging {base_name} with {hand_type} hands")
+        tree = merge_urdf(base_urdf, hand_urdfs, config, os.path.dirname(cached_path),
+                          robot_name, verbose)
+        _write_tree_atomic(tree, cached_path)
+    elif verbose:
+        print(f"Using cached merge: {cached_path}")
+
+    if output_path is None:
+        return cached_path
+
+    # Mesh paths are relative, so rewrite them for the requested location
+    tree = merge_urdf(base_urdf, hand_urdfs, config, os.path.dirname(os.path.abspath(output_path)),
+                      robot_name)
+    _write_tree_atomic(tree, output_path)
+    if verbose:
+        print(f"Generated merged URDF file: {output_path}")
+    return output_path
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(prog="python -m robot_assets merge",
+                                     description="Merge a G1 URDF with Inspire hands")
+    parser.add_argument("--base", default="g1_29dof_rev_1_0",
+                        help="Body URDF path or registry variant name")
+    parser.add_argument("--hand", action="append", choices=["FTP", "DFQ"],
+                        help="Hand type (repeatable, default: FTP and DFQ)")
+    parser.add_argument("--config", default=DEFAULT_CONFIG_PATH)
+    parser.add_argument("--hand-dir", default=DEFAULT_HAND_DIR)
+    parser.add_argument("--output", default=None,
+                        help="Output path (only valid with a single --hand)")
+    parser.add_argument("--cache-dir", default=DEFAULT_CACHE_DIR)
+    parser.add_argument("--force", action="store_true", help="Ignore cached results")
+    args = parser.parse_args(argv)
+
+    hand_types = args.hand or ["FTP", "DFQ"]
+    if args.output and len(hand_types) > 1:
+        parser.error("--output requires exactly one --hand")
+
+    base_urdf = args.base
+    if not os.path.exists(base_urdf):
+        from .registry import RobotRegistry
+        base_urdf = RobotRegistry().urdf_path(args.base)
+
+    for hand_type in hand_types:
+        path = merge_robot_with_hands(base_urdf, hand_type, args.config, args.hand_dir,
+                                      args.output, args.cache_dir, args.force, verbose=True)
+        print(path)
+
+
+if __name__ == "__main__":
+    main()
@@ -3,18 +3,52 @@ Robot Grounding Library for Genesis
 
 Provides automatic calculation of robot grounding height by analyzing 
 URDF structure and detecting foot links for proper ground placement.
+
+The package root only imports the dependency-free core (detection rules,
+URDF parsing and grounding math). NumPy kinematics and the Genesis-facing
+calculator are imported on first attribute access.
 """
 
+import importlib
+
 __version__ = "0.1.0"
 __author__ = "Genesis Humanoid Learning Project"
 
-from .calculator import RobotGroundingCalculator
 from .detector import FootDetector
 from .utils import get_lowest_z_position, calculate_grounding_offset
+from .urdf import URDFModel, parse_urdf
+
+# Attributes loaded lazily from submodules with heavier dependencies
+_LAZY_ATTRS = {
+    'RobotGroundingCalculator': '.calculator',
+    'KinematicChain': '.kinematics',
+    'offline_grounding_height': '.kinematics',
+    'StaticEquilibriumSolver': '.equilibrium',
+    'solve_standing_pose': '.equilibrium',
+}
 
 __all__ = [
     'RobotGroundingCalculator',
     'FootDetector',
     'get_lowest_z_position',
-    'calculate_grounding_offset'
-]
\ No newline at end of file
+    'calculate_grounding_offset',
+    'URDFModel',
+    'parse_urdf',
+    'KinematicChain',
+    'offline_grounding_height',
+    'StaticEquilibriumSolver',
+    'solve_standing_pose'
+]
+
+
+def __getattr__(name):
+    if name in _LAZY_ATTRS:
+        module = importlib.import_module(_LAZY_ATTRS[name], __name__)
+        value = getattr(module, name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY_ATTRS))
@@ -0,0 +1,118 @@
+"""
+Array backend dispatch for NumPy and PyTorch inputs.
+
+Functions here pick the array library from the type of their inputs, so
+torch is only imported when a torch tensor is actually passed in.
+"""
+
+from typing import Any, Sequence
+
+
+def is_torch_tensor(x: Any) -> bool:
+    """
+    Check if a value is a torch tensor without importing torch.
+
+    Args:
+        x: Any value
+
+    Returns:
+        True if x is a torch.Tensor
+    """
+    return type(x).__module__.split('.')[0] == 'torch'
+
+
+def array_namespace(x: Any):
+    """
+    Get the array module matching an input.
+
+    Args:
+        x: Array-like value
+
+    Returns:
+        The torch module for torch tensors, numpy otherwise
+    """
+    if is_torch_tensor(x):
+        import torch
+        return torch
+    import numpy
+    return numpy
+
+
+def asarray(x: Any):
+    """
+    Convert a value to an array, keeping torch tensors as they are.
+
+    Args:
+        x: Array-like value
+
+    Returns:
+        torch.Tensor or float64 numpy.ndarray
+    """
+    if is_torch_tensor(x):
+        return x
+    import numpy
+    return numpy.asarray(x, dtype=numpy.float64)
+
+
+def asarray_like(value: Any, like: Any):
+    """
+    Convert a constant to the backend, dtype and device of a reference array.
+
+    Args:
+        value: Array-like constant
+        like: Reference array
+
+    Returns:
+        Array of the same backend as `like`
+    """
+    if is_torch_tensor(like):
+        import torch
+        return torch.as_tensor(value, dtype=like.dtype, device=like.device)
+    import numpy
+    return numpy.asarray(value, dtype=numpy.result_type(like, numpy.float64))
+
+
+def stack(arrays: Sequence[Any], axis: int = 0):
+    """
+    Stack arrays with the backend of the first element.
+
+    Args:
+        arrays: Non-empty sequence of arrays
+        axis: Axis to stack along
+
+    Returns:
+        Stacked array
+    """
+    xp = array_namespace(arrays[0])
+    if xp.__name__ == 'torch':
+        return xp.stack(list(arrays), dim=axis)
+    return xp.stack(arrays, axis=axis)
+
+
+def to_numpy(x: Any):
+    """
+    Convert an array to a NumPy array (copying from device if needed).
+
+    Args:
+        x: Array-like value
+
+    Returns:
+        numpy.ndarray
+    """
+    if is_torch_tensor(x):
+        return x.detach().cpu().numpy()
+    import numpy
+    return numpy.asarray(x)
+
+
+def to_float(x: Any) -> float:
+    """
+    Convert a scalar array or number to a Python float.
+
+    Args:
+        x: Scalar tensor, array or number
+
+    Returns:
+        Python float
+    """
+    return float(x.item()) if hasattr(x, 'item') else float(x)
@@ -2,11 +2,11 @@
 Main calculator class for robot grounding height computation.
 """
 
-import torch
-import numpy as np
-from typing import List, Optional, Tuple
+from typing import Dict, List, Optional, Tuple, Union
 
+from .backend import stack
 from .detector import FootDetector
+from .urdf import parse_urdf
 from .utils import get_link_world_position, get_lowest_z_position, calculate_grounding_offset
 
 
@@ -83,7 +83,7 @@ class RobotGroundingCalculator:
         
         # Get current base position
         base_pos = self.robot.get_pos()
-        if base_pos.dim() > 1:
+        if base_pos.ndim > 1:
             base_z = base_pos[0, 2].item()  # Batched position
         else:
             base_z = base_pos[2].item()  # Single position
@@ -108,7 +108,7 @@ class RobotGroundingCalculator:
         
         return grounding_height
     
-    def get_current_foot_positions(self) -> Optional[torch.Tensor]:
+    def get_current_foot_positions(self) -> Optional["torch.Tensor"]:
         """
         Get current positions of detected foot links.
         
@@ -122,7 +122,7 @@ class RobotGroundingCalculator:
         for link in self.foot_links:
             try:
                 pos = get_link_world_position(link)
-                if pos.dim() > 1:
+                if pos.ndim > 1:
                     positions.append(pos[0])  # First environment if batched
                 else:
                     positions.append(pos)
@@ -131,6 +131,41 @@ class RobotGroundingCalculator:
                     print(f"Warning: Could not get position for link: {e}")
         
         if positions:
-            return torch.stack(positions)
+            return stack(positions)
         else:
-            return None
\ No newline at end of file
+            return None
+
+    def get_equilibrium_pose(self, kp: Union[float, Dict[str, float]], q_target=None,
+                             safety_margin: float = 0.005,
+                             urdf_path: Optional[str] = None) -> Tuple[float, List[int], object]:
+        """
+        Solve the settled standing pose so the robot can spawn without settle steps.
+
+        Uses the static-equilibrium solver on the robot's URDF: the returned
+        joint positions are where the PD controller holds the robot against
+        gravity, and the height places the deflected feet on the ground.
+
+        Args:
+            kp: Position gains (scalar or joint name -> gain)
+            q_target: PD targets in URDF dof order (default: zeros)
+            safety_margin: Distance above ground in meters (default: 0.005)
+            urdf_path: URDF file (default: the file the entity was loaded from)
+
+        Returns:
+            Tuple of (base height, local dof indices, joint positions), ready for
+            robot.set_dofs_position(positions, dofs_idx)
+        """
+        from .equilibrium import solve_standing_pose
+
+        if urdf_path is None:
+            urdf_path = self.robot.morph.file
+        result = solve_standing_pose(parse_urdf(urdf_path), kp, q_target,
+                                     safety_margin=safety_margin, verbose=self.verbose)
+
+        dofs_idx = []
+        for name in result['dof_names']:
+            joint = self.robot.get_joint(name)
+            idx = getattr(joint, 'dof_idx_local', None)
+            dofs_idx.append(idx if isinstance(idx, int) else joint.dofs_idx_local[0])
+
+        return float(result['base_height']), dofs_idx, result['q']
@@ -75,7 +75,7 @@ class FootDetector:
         Detect foot links in a robot.
         
         Args:
-            robot: Genesis robot entity
+            robot: Genesis robot entity or parsed URDFModel
             
         Returns:
             List of detected foot links
@@ -95,7 +95,7 @@ class FootDetector:
                 foot_links.append(link)
         
         # If no foot links found by name, use heuristics
-        if not foot_links and end_links:
+        if not foot_links and end_links and hasattr(robot, 'get_pos'):
             # For humanoids, typically look for lowest end links
             # This is a fallback strategy
             base_pos = robot.get_pos()
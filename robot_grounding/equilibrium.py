@@ -0,0 +1,336 @@
+"""
+Static-equilibrium standing pose solver.
+
+Finds the joint configuration at which PD-controlled joints exactly hold
+the robot against gravity while it stands on its detected foot supports,
+and the base height that puts those supports on the ground. Spawning in
+this pose removes the settle steps otherwise needed after grounding.
+
+Statics only depend on link masses and centers of mass; inertias do not
+enter. The base is kept upright and contact forces are the minimum-norm
+forces at the foot contact points that balance gravity.
+"""
+
+from typing import Dict, List, Optional, Union
+
+import numpy as np
+
+from .detector import FootDetector
+from .kinematics import KinematicChain
+from .urdf import URDFModel
+from .utils import calculate_grounding_offset
+
+
+GRAVITY = np.array([0.0, 0.0, -9.81])
+
+
+def _cross(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    return np.cross(a, b, axis=-1)
+
+
+class StaticEquilibriumSolver:
+    """
+    Batched Newton solver for the static standing pose of a URDF robot.
+
+    Solves kp * (q_target - q) = tau(q) for q, where tau(q) are the joint
+    torques needed to hold configuration q with the feet supporting the
+    robot's weight.
+    """
+
+    def __init__(self, model: URDFModel, kp: Union[float, np.ndarray, Dict[str, float]],
+                 foot_links: Optional[List[str]] = None, gravity: np.ndarray = GRAVITY):
+        """
+        Precompute mass distribution and support topology.
+
+        Args:
+            model: Parsed URDF model
+            kp: Position gains, as a scalar, an (n_dofs,) array or a
+                joint name -> gain mapping
+            foot_links: Support links (default: FootDetector rules)
+            gravity: Gravity vector in m/s^2
+        """
+        self.model = model
+        self.chain = KinematicChain(model)
+        self.gravity = np.asarray(gravity, dtype=float)
+        n_dofs = self.chain.n_dofs
+
+        if isinstance(kp, dict):
+            kp = [kp[name] for name in self.chain.dof_names]
+        self.kp = np.broadcast_to(np.asarray(kp, dtype=float), (n_dofs,)).copy()
+
+        if foot_links is None:
+            foot_links = [link.name for link in FootDetector.detect_foot_links(model)]
+        if not foot_links:
+            raise ValueError(f"No foot links found for {model.name}")
+        self.foot_links = foot_links
+
+        # Link masses and centers of mass (homogeneous, link frame)
+        self.link_names = [name for name in self.chain.link_names if model.get_link(name).mass > 0]
+        self.masses = np.array([model.get_link(name).mass for name in self.link_names])
+        self.coms = np.array([list(model.get_link(name).com) + [1.0] for name in self.link_names])
+
+        # Contact points: foot collision spheres, or the link origin
+        self.contacts = []
+        for name in foot_links:
+            spheres = [geom for geom in model.get_link(name).collisions if geom['type'] == 'sphere']
+            for geom in spheres or [{'xyz': (0.0, 0.0, 0.0), 'radius': 0.0}]:
+                self.contacts.append((name, np.array(list(geom['xyz']) + [1.0]), geom['radius']))
+
+        # Subtree masks: which links/contacts move with each dof joint
+        dof_joints = model.dof_joints
+        self.axes = np.array([joint.axis for joint in dof_joints], dtype=float)
+        self.axes /= np.linalg.norm(self.axes, axis=1, keepdims=True)
+        self.dof_links = [joint.child for joint in dof_joints]
+        self.limits = np.array([
+            (joint.limit.get('lower', -np.inf), joint.limit.get('upper', np.inf))
+            if joint.limit else (-np.inf, np.inf)
+            for joint in dof_joints
+        ])
+
+        descendants = {name: self._descendants(name) for name in self.dof_links}
+        self.link_mask = np.array([
+            [link in descendants[child] for link in self.link_names] for child in self.dof_links
+        ], dtype=float)
+        self.contact_mask = np.array([
+            [contact[0] in descendants[child] for contact in self.contacts] for child in self.dof_links
+        ], dtype=float)
+
+    def _descendants(self, link_name: str) -> set:
+        """Links in the subtree rooted at link_name (inclusive)."""
+        children = {}
+        for joint in self.model.joints:
+            children.setdefault(joint.parent, []).append(joint.child)
+        found = set()
+        stack = [link_name]
+        while stack:
+            name = stack.pop()
+            found.add(name)
+            stack.extend(children.get(name, []))
+        return found
+
+    def _contact_points(self, frames) -> np.ndarray:
+        """World positions of contact points, (B, C, 3)."""
+        return np.stack([
+            (frames[name] @ point)[..., :3] for name, point, _ in self.contacts
+        ], axis=-2)
+
+    def support_torques(self, q: np.ndarray):
+        """
+        Joint torques needed to hold a configuration on the foot supports.
+
+        Args:
+            q: Joint positions (B, n_dofs)
+
+        Returns:
+            Tuple of (torques (B, n_dofs), contact forces (B, C, 3))
+        """
+        frames = self.chain.forward(q)
+        base = frames[self.chain.root_name][..., :3, 3]                       # (B, 3)
+        coms = np.stack([(frames[name] @ com)[..., :3]
+                         for name, com in zip(self.link_names, self.coms)], axis=-2)  # (B, L, 3)
+        contacts = self._contact_points(frames)                             # (B, C, 3)
+        weights = self.masses[:, None] * self.gravity                       # (L, 3)
+
+        # Minimum-norm contact forces balancing total force and moment about the base
+        n_contacts = contacts.shape[-2]
+        batch = q.shape[:-1]
+        rel = contacts - base[..., None, :]
+        a = np.zeros(batch + (6, 3 * n_contacts))
+        for c in range(n_contacts):
+            x, y, z = rel[..., c, 0], rel[..., c, 1], rel[..., c, 2]
+            a[..., 0:3, 3 * c:3 * c + 3] = np.eye(3)
+            a[..., 3, 3 * c + 1], a[..., 3, 3 * c + 2] = -z, y
+            a[..., 4, 3 * c + 0], a[..., 4, 3 * c + 2] = z, -x
+            a[..., 5, 3 * c + 0], a[..., 5, 3 * c + 1] = -y, x
+        gravity_moment = _cross(coms - base[..., None, :], weights).sum(axis=-2)
+        b = -np.concatenate([np.broadcast_to(weights.sum(axis=0), batch + (3,)), gravity_moment], axis=-1)
+        aat = a @ np.swapaxes(a, -1, -2) + 1e-9 * np.eye(6)
+        forces = (np.swapaxes(a, -1, -2) @ np.linalg.solve(aat, b[..., None]))[..., 0]
+        forces = forces.reshape(batch + (n_contacts, 3))
+
+        # Moment of gravity and contact forces on each joint's subtree about the joint
+        joint_pos = np.stack([frames[name][..., :3, 3] for name in self.dof_links], axis=-2)   # (B, J, 3)
+        joint_axis = np.stack([frames[name][..., :3, :3] @ axis
+                               for name, axis in zip(self.dof_links, self.axes)], axis=-2)  # (B, J, 3)
+
+        subtree_mass = self.link_mask @ self.masses                                       # (J,)
+        subtree_first_moment = np.einsum('jl,l,...ld->...jd', self.link_mask, self.masses, coms)
+        gravity_part = _cross(subtree_first_moment - subtree_mass[:, None] * joint_pos, self.gravity)
+
+        contact_moment = np.einsum('jc,...cd->...jd', self.contact_mask, _cross(contacts, forces))
+        contact_force = np.einsum('jc,...cd->...jd', self.contact_mask, forces)
+        contact_part = contact_moment - _cross(joint_pos, contact_force)
+
+        torques = -np.sum(joint_axis * (gravity_part + contact_part), axis=-1)
+        return torques, forces
+
+    def residual(self, q: np.ndarray, q_target: np.ndarray) -> np.ndarray:
+        """PD equilibrium residual kp * (q_target - q) - tau(q), (B, n_dofs)."""
+        torques, _ = self.support_torques(q)
+        return self.kp * (q_target - q) - torques
+
+    def _at_limit(self, q: np.ndarray, residual: np.ndarray) -> np.ndarray:
+        """Joints on a limit whose residual torque pushes further into it."""
+        lower = (q <= self.limits[:, 0] + 1e-9) & (residual < 0)
+        upper = (q >= self.limits[:, 1] - 1e-9) & (residual > 0)
+        return lower | upper
+
+    def _masked_residual(self, q: np.ndarray, q_target: np.ndarray) -> np.ndarray:
+        """Residual with the joints held by their limits zeroed."""
+        residual = self.residual(q, q_target)
+        return np.where(self._at_limit(q, residual), 0.0, residual)
+
+    def solve(self, q_target: Optional[np.ndarray] = None, max_iter: int = 20,
+              tol: float = 1e-6, fd_eps: float = 1e-5,
+              max_step: float = 0.05) -> Dict[str, np.ndarray]:
+        """
+        Find the equilibrium configuration with batched damped Newton iterations.
+
+        The Jacobian is estimated by finite differences; all perturbed
+        configurations of all batch entries go through one kinematics pass.
+        Each iteration tries the Newton step and Levenberg-Marquardt steps of
+        increasing damping (evaluated together in a single pass) and keeps the
+        least damped one that lowers the residual norm. Entries for which no
+        step lowers the residual stop and are reported as not converged.
+
+        Args:
+            q_target: PD targets (n_dofs,) or (B, n_dofs) (default: zeros)
+            max_iter: Maximum Newton iterations
+            tol: Convergence threshold on the max Newton update (rad)
+            fd_eps: Finite-difference step (rad)
+            max_step: Largest joint update per iteration (rad); steps are
+                scaled down to this to keep poses far from equilibrium stable
+
+        Returns:
+            Dictionary with 'q', 'contact_forces', 'residual', 'residual_norm',
+            'iterations', 'converged' (per batch entry), 'status' (per batch
+            entry: 'converged', 'stalled' or 'max_iter') and 'stable' (all
+            vertical contact forces supportive).
+            Residuals of joints held by their limits are reported as zero.
+        """
+        n = self.chain.n_dofs
+        q_target = np.zeros(n) if q_target is None else np.asarray(q_target, dtype=float)
+        single = q_target.ndim == 1
+        q_target = np.atleast_2d(q_target)
+        q = q_target.copy()
+        eye = np.eye(n)
+        damping = np.concatenate([[0.0], 10.0 ** np.arange(-8, 3)])
+
+        iterations = 0
+        converged = np.zeros(len(q), dtype=bool)
+        stalled = np.zeros(len(q), dtype=bool)
+        for iterations in range(1, max_iter + 1):
+            # Batch: current q plus one perturbation per dof, (B, n + 1, n)
+            probes = q[:, None, :] + np.concatenate([np.zeros((1, n)), fd_eps * eye])[None]
+            r = self.residual(probes, q_target[:, None, :])
+            jacobian = np.swapaxes((r[:, 1:, :] - r[:, :1, :]) / fd_eps, -1, -2)   # (B, n, n)
+            residual = r[:, 0, :]
+
+            # Joints resting on a limit are held there by the limit: freeze them
+            active = self._at_limit(q, residual)
+            jacobian = np.where(active[..., None], eye, jacobian)
+            residual = np.where(active, 0.0, residual)
+
+            step = -np.linalg.solve(jacobian, residual[..., None])[..., 0]
+            converged = np.abs(step).max(axis=-1) < tol
+
+            # Damped (Levenberg-Marquardt) steps for a ladder of dampings, (B, K, n)
+            jtj = np.swapaxes(jacobian, -1, -2) @ jacobian
+            jtr = (np.swapaxes(jacobian, -1, -2) @ residual[..., None])[..., 0]
+            scale = np.trace(jtj, axis1=-2, axis2=-1)[:, None, None, None] / n
+            damped = jtj[:, None] + damping[None, :, None, None] * scale * eye
+            steps = -np.linalg.solve(damped, np.broadcast_to(jtr[:, None, :, None], damped.shape[:-1] + (1,)))[..., 0]
+            steps = steps / np.maximum(np.abs(steps).max(axis=-1, keepdims=True) / max_step, 1.0)
+            trials = np.clip(q[:, None, :] + steps, self.limits[:, 0], self.limits[:, 1])
+
+            # Accept the least damped step that lowers the residual norm
+            trial_norm = np.linalg.norm(self._masked_residual(trials, q_target[:, None, :]), axis=-1)
+            decrease = trial_norm < np.linalg.norm(residual, axis=-1, keepdims=True)
+            accepted = decrease.any(axis=-1)
+            best = trials[np.arange(len(q)), decrease.argmax(axis=-1)]
+            q = np.where(accepted[:, None], best, q)
+
+            stalled = ~accepted & ~converged
+            if (converged | stalled).all():
+                break
+
+        torques, forces = self.support_torques(q)
+        residual = self.kp * (q_target - q) - torques
+        residual = np.where(self._at_limit(q, residual), 0.0, residual)
+        status = np.where(converged, 'converged', np.where(stalled, 'stalled', 'max_iter'))
+        result = {
+            'q': q,
+            'contact_forces': forces,
+            'residual': residual,
+            'residual_norm': np.linalg.norm(residual, axis=-1),
+            'iterations': iterations,
+            'converged': converged,
+            'status': status,
+            'stable': (forces[..., 2] >= -1e-6).all(axis=-1),
+        }
+        if single:
+            result['q'] = q[0]
+            result['contact_forces'] = forces[0]
+            result['residual'] = residual[0]
+            result['residual_norm'] = float(result['residual_norm'][0])
+            result['converged'] = bool(converged[0])
+            result['status'] = str(status[0])
+            result['stable'] = bool(result['stable'][0])
+        return result
+
+    def base_height(self, q: np.ndarray, safety_margin: float = 0.0) -> np.ndarray:
+        """
+        Base height that puts the lowest contact point at the safety margin.
+
+        Args:
+            q: Joint positions (n_dofs,) or (B, n_dofs)
+            safety_margin: Distance above ground in meters
+
+        Returns:
+            Height(s) of the root link
+        """
+        frames = self.chain.forward(q)
+        contacts = self._contact_points(frames)
+        radii = np.array([radius for _, _, radius in self.contacts])
+        lowest = (contacts[..., 2] - radii).min(axis=-1)
+        return calculate_grounding_offset(0.0, lowest, safety_margin)
+
+
+def solve_standing_pose(model: URDFModel, kp: Union[float, np.ndarray, Dict[str, float]],
+                        q_target: Optional[np.ndarray] = None, safety_margin: float = 0.0,
+                        foot_links: Optional[List[str]] = None,
+                        verbose: bool = False) -> Dict[str, np.ndarray]:
+    """
+    Solve the settled standing pose of a robot.
+
+    Args:
+        model: Parsed URDF model
+        kp: Position gains (scalar, per-dof array or joint name -> gain)
+        q_target: PD targets (default: zeros)
+        safety_margin: Distance above ground in meters
+        foot_links: Support links (default: FootDetector rules)
+        verbose: Whether to print a summary
+
+    Returns:
+        Solver result extended with 'base_height' and 'dof_names'
+    """
+    solver = StaticEquilibriumSolver(model, kp, foot_links)
+    result = solver.solve(q_target)
+    result['base_height'] = solver.base_height(result['q'], safety_margin)
+    result['dof_names'] = solver.chain.dof_names
+
+    if verbose:
+        q_default = np.zeros(solver.chain.n_dofs) if q_target is None else q_target
+        sag = np.abs(np.asarray(result['q']) - q_default).max()
+        print(f"Static equilibrium for {model.name}")
+        print(f"  Converged: {np.all(result['converged'])} in {result['iterations']} iterations")
+        if not np.all(result['converged']):
+            print(f"  Warning: solver stopped without converging "
+                  f"(status {np.unique(result['status']).tolist()}, "
+                  f"residual norm {float(np.max(result['residual_norm'])):.2e})")
+        print(f"  Max joint sag: {sag:.4f} rad")
+        print(f"  Base height: {float(np.max(result['base_height'])):.4f}m")
+        if not np.all(result['stable']):
+            print("  Warning: center of mass is outside the support polygon")
+
+    return result
@@ -0,0 +1,267 @@
+"""
+Offline forward kinematics on parsed URDF models.
+
+Computes link frames from joint positions without Genesis, so grounding
+heights can be estimated before a scene is built. Joint positions may be
+NumPy arrays or torch tensors of shape (..., n_dofs); the result uses the
+same backend.
+"""
+
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .backend import array_namespace, asarray, asarray_like, stack, to_float
+from .detector import FootDetector
+from .urdf import URDFModel
+from .utils import calculate_grounding_offset
+
+
+def rpy_to_matrix(rpy: Sequence[float]) -> np.ndarray:
+    """
+    Convert URDF roll/pitch/yaw angles to a rotation matrix.
+
+    Args:
+        rpy: (roll, pitch, yaw) in radians
+
+    Returns:
+        (3, 3) rotation matrix R = Rz(yaw) @ Ry(pitch) @ Rx(roll)
+    """
+    r, p, y = rpy
+    cr, sr = np.cos(r), np.sin(r)
+    cp, sp = np.cos(p), np.sin(p)
+    cy, sy = np.cos(y), np.sin(y)
+    return np.array([
+        [cy * cp, cy * sp * sr - sy * cr, cy * sp * cr + sy * sr],
+        [sy * cp, sy * sp * sr + cy * cr, sy * sp * cr - cy * sr],
+        [-sp, cp * sr, cp * cr],
+    ])
+
+
+def matrix_to_rpy(rotation: np.ndarray) -> Tuple[float, float, float]:
+    """
+    Convert a rotation matrix to URDF roll/pitch/yaw angles.
+
+    Args:
+        rotation: (3, 3) rotation matrix
+
+    Returns:
+        (roll, pitch, yaw) in radians
+    """
+    pitch = np.arcsin(-np.clip(rotation[2, 0], -1.0, 1.0))
+    if abs(rotation[2, 0]) < 1.0 - 1e-9:
+        roll = np.arctan2(rotation[2, 1], rotation[2, 2])
+        yaw = np.arctan2(rotation[1, 0], rotation[0, 0])
+    else:
+        # Gimbal lock: yaw and roll are coupled, put everything into yaw
+        roll = 0.0
+        yaw = np.arctan2(-rotation[0, 1], rotation[1, 1])
+    return float(roll), float(pitch), float(yaw)
+
+
+def make_transform(xyz: Sequence[float], rpy: Sequence[float]) -> np.ndarray:
+    """
+    Build a homogeneous transform from a URDF origin.
+
+    Args:
+        xyz: Translation
+        rpy: Roll/pitch/yaw rotation
+
+    Returns:
+        (4, 4) transform
+    """
+    transform = np.eye(4)
+    transform[:3, :3] = rpy_to_matrix(rpy)
+    transform[:3, 3] = xyz
+    return transform
+
+
+def _skew4(axis: Sequence[float]) -> np.ndarray:
+    """Cross-product matrix of an axis embedded in a 4x4 matrix."""
+    x, y, z = np.asarray(axis, dtype=float) / np.linalg.norm(axis)
+    skew = np.zeros((4, 4))
+    skew[:3, :3] = [[0, -z, y], [z, 0, -x], [-y, x, 0]]
+    return skew
+
+
+class KinematicChain:
+    """
+    Precomputed kinematic tree of a URDF model.
+
+    Joint motions are written as affine functions of sin/cos (revolute) or
+    of the joint position (prismatic), so one evaluation works for any
+    batch shape and for both NumPy and torch inputs.
+    """
+
+    def __init__(self, model: URDFModel):
+        """
+        Precompute joint constants in topological order.
+
+        Args:
+            model: Parsed URDF model
+        """
+        self.model = model
+        self.dof_names = [joint.name for joint in model.dof_joints]
+        dof_index = {name: i for i, name in enumerate(self.dof_names)}
+
+        children = {}
+        for joint in model.joints:
+            children.setdefault(joint.parent, []).append(joint)
+
+        root = model.root_link
+        self.root_name = root.name if root else None
+        self.link_names = [self.root_name] if root else []
+
+        # (parent, child, origin transform, (motion kind, A, B), dof index)
+        self.steps = []
+        queue = [self.root_name] if root else []
+        while queue:
+            parent = queue.pop(0)
+            for joint in children.get(parent, []):
+                origin = make_transform(joint.origin_xyz, joint.origin_rpy)
+                idx = dof_index.get(joint.name, -1)
+                if joint.type in ('revolute', 'continuous'):
+                    k = _skew4(joint.axis)
+                    motion = ('revolute', k, k @ k)
+                elif joint.type == 'prismatic':
+                    p = np.zeros((4, 4))
+                    p[:3, 3] = np.asarray(joint.axis) / np.linalg.norm(joint.axis)
+                    motion = ('prismatic', p, None)
+                else:
+                    motion = ('fixed', None, None)
+                self.steps.append((parent, joint.child, origin, motion, idx))
+                self.link_names.append(joint.child)
+                queue.append(joint.child)
+
+    @property
+    def n_dofs(self) -> int:
+        return len(self.dof_names)
+
+    def forward(self, q=None, base_transform=None) -> Dict[str, object]:
+        """
+        Compute world transforms of all links.
+
+        Args:
+            q: Joint positions (..., n_dofs) in dof_names order (default: zeros)
+            base_transform: (..., 4, 4) root link transform (default: identity)
+
+        Returns:
+            Mapping of link name to (..., 4, 4) transform
+        """
+        q = asarray(np.zeros(self.n_dofs) if q is None else q)
+        xp = array_namespace(q)
+        batch_shape = tuple(q.shape[:-1])
+
+        eye = asarray_like(np.eye(4), q)
+        if base_transform is None:
+            base = asarray_like(np.eye(4) + np.zeros(batch_shape + (4, 4)), q)
+        else:
+            base = asarray_like(base_transform, q)
+
+        frames = {self.root_name: base}
+        for parent, child, origin, motion, idx in self.steps:
+            transform = frames[parent] @ asarray_like(origin, q)
+            kind, a, b = motion
+            if kind == 'revolute':
+                angle = q[..., idx][..., None, None]
+                transform = transform @ (
+                    eye + xp.sin(angle) * asarray_like(a, q)
+                    + (1 - xp.cos(angle)) * asarray_like(b, q)
+                )
+            elif kind == 'prismatic':
+                transform = transform @ (eye + q[..., idx][..., None, None] * asarray_like(a, q))
+            frames[child] = transform
+        return frames
+
+    def link_positions(self, link_names: List[str], q=None, base_transform=None):
+        """
+        World positions of selected links.
+
+        Args:
+            link_names: Links to report
+            q: Joint positions (..., n_dofs)
+            base_transform: Root link transform
+
+        Returns:
+            Array of shape (..., len(link_names), 3)
+        """
+        frames = self.forward(q, base_transform)
+        return stack([frames[name][..., :3, 3] for name in link_names], axis=-2)
+
+
+def collision_lowest_z(model: URDFModel, frames: Dict[str, object], link_name: str):
+    """
+    Lowest world Z of a link's collision geometry.
+
+    Spheres and boxes are handled exactly; other geometries fall back to
+    their origin point.
+
+    Args:
+        model: Parsed URDF model
+        frames: Link transforms from KinematicChain.forward
+        link_name: Link to evaluate
+
+    Returns:
+        Array of shape (...) with the lowest Z, or the link origin Z if the
+        link has no collision geometry
+    """
+    transform = frames[link_name]
+    xp = array_namespace(transform)
+    candidates = []
+
+    for geom in model.get_link(link_name).collisions:
+        local = make_transform(geom['xyz'], geom['rpy'])
+        # Z row of the geometry frame: world z = row_z @ [x, y, z, 1]
+        row_z = (transform @ asarray_like(local, transform))[..., 2, :]
+        if geom['type'] == 'box':
+            half = np.asarray(geom['size']) / 2
+            corners = np.array([[sx * half[0], sy * half[1], sz * half[2], 1.0]
+                                for sx in (-1, 1) for sy in (-1, 1) for sz in (-1, 1)])
+            candidates.append(xp.amin(row_z @ asarray_like(corners.T, transform), -1))
+        elif geom['type'] == 'sphere':
+            candidates.append(row_z[..., 3] - geom['radius'])
+        else:
+            candidates.append(row_z[..., 3])
+
+    if not candidates:
+        return transform[..., 2, 3]
+
+    lowest = candidates[0]
+    for z in candidates[1:]:
+        lowest = xp.minimum(lowest, z)
+    return lowest
+
+
+def offline_grounding_height(model: URDFModel, safety_margin: float = 0.005, q=None,
+                             foot_links: Optional[List[str]] = None,
+                             use_collision_geometry: bool = False) -> float:
+    """
+    Grounding height computed from the URDF alone.
+
+    With use_collision_geometry=False the foot link origins are used, which
+    matches RobotGroundingCalculator.get_grounding_height for the same pose.
+
+    Args:
+        model: Parsed URDF model
+        safety_margin: Distance above ground in meters
+        q: Joint positions (n_dofs,) (default: zeros)
+        foot_links: Foot link names (default: FootDetector rules)
+        use_collision_geometry: Use the lowest collision point of the feet
+
+    Returns:
+        Height in meters for the root link
+    """
+    if foot_links is None:
+        foot_links = [link.name for link in FootDetector.detect_foot_links(model)]
+    if not foot_links:
+        return 1.0  # Same fallback as RobotGroundingCalculator
+
+    chain = KinematicChain(model)
+    frames = chain.forward(q)
+
+    if use_collision_geometry:
+        lowest = min(to_float(collision_lowest_z(model, frames, name)) for name in foot_links)
+    else:
+        lowest = min(to_float(frames[name][..., 2, 3]) for name in foot_links)
+
+    return calculate_grounding_offset(0.0, lowest, safety_margin)
@@ -0,0 +1,293 @@
+"""
+Offline URDF parsing for robot structure analysis.
+
+Provides a lightweight link/joint model that can be inspected without
+loading the robot into a Genesis scene.
+"""
+
+import os
+import xml.etree.ElementTree as ET
+from typing import List, Dict, Optional, Tuple
+
+
+def _parse_floats(text: Optional[str], default: Tuple[float, ...]) -> Tuple[float, ...]:
+    """
+    Parse a whitespace separated list of floats from a URDF attribute.
+
+    Args:
+        text: Attribute value (e.g. "0 0 -0.07605")
+        default: Value returned when the attribute is missing
+
+    Returns:
+        Tuple of floats
+    """
+    if text is None:
+        return default
+    return tuple(float(v) for v in text.split())
+
+
+def _parse_origin(element) -> Dict[str, Tuple[float, ...]]:
+    """
+    Parse an <origin> child element into xyz/rpy tuples.
+
+    Args:
+        element: Parent XML element (link inertial, geometry or joint)
+
+    Returns:
+        Dictionary with 'xyz' and 'rpy' entries
+    """
+    origin = element.find('origin') if element is not None else None
+    if origin is None:
+        return {'xyz': (0.0, 0.0, 0.0), 'rpy': (0.0, 0.0, 0.0)}
+    return {
+        'xyz': _parse_floats(origin.attrib.get('xyz'), (0.0, 0.0, 0.0)),
+        'rpy': _parse_floats(origin.attrib.get('rpy'), (0.0, 0.0, 0.0)),
+    }
+
+
+def _parse_geometry(element) -> Optional[Dict]:
+    """
+    Parse a <visual> or <collision> element into a geometry description.
+
+    Args:
+        element: XML <visual> or <collision> element
+
+    Returns:
+        Geometry dictionary, or None if no supported geometry is present
+    """
+    geometry = element.find('geometry')
+    if geometry is None or len(geometry) == 0:
+        return None
+
+    shape = geometry[0]
+    geom = {'type': shape.tag}
+    geom.update(_parse_origin(element))
+
+    if shape.tag == 'mesh':
+        geom['filename'] = shape.attrib.get('filename', '')
+        geom['scale'] = _parse_floats(shape.attrib.get('scale'), (1.0, 1.0, 1.0))
+    elif shape.tag == 'box':
+        geom['size'] = _parse_floats(shape.attrib.get('size'), (0.0, 0.0, 0.0))
+    elif shape.tag == 'sphere':
+        geom['radius'] = float(shape.attrib.get('radius', 0.0))
+    elif shape.tag in ('cylinder', 'capsule'):
+        geom['radius'] = float(shape.attrib.get('radius', 0.0))
+        geom['length'] = float(shape.attrib.get('length', 0.0))
+
+    return geom
+
+
+class URDFLink:
+    """
+    Link parsed from a URDF file.
+
+    Exposes `name`, `idx` and `parent_idx` so that FootDetector rules can
+    be applied to it in the same way as to Genesis links.
+    """
+
+    def __init__(self, element, idx: int):
+        """
+        Initialize the link from its XML element.
+
+        Args:
+            element: XML <link> element
+            idx: Index of the link in document order
+        """
+        self.name = element.attrib.get('name', '')
+        self.idx = idx
+        self.parent_idx = -1
+
+        inertial = element.find('inertial')
+        mass = inertial.find('mass') if inertial is not None else None
+        self.mass = float(mass.attrib.get('value', 0.0)) if mass is not None else 0.0
+        self.com = _parse_origin(inertial)['xyz']
+
+        self.inertia = (0.0, 0.0, 0.0, 0.0, 0.0, 0.0)
+        if inertial is not None and inertial.find('inertia') is not None:
+            attrib = inertial.find('inertia').attrib
+            self.inertia = tuple(
+                float(attrib.get(key, 0.0))
+                for key in ('ixx', 'ixy', 'ixz', 'iyy', 'iyz', 'izz')
+            )
+
+        self.visuals = [g for g in map(_parse_geometry, element.findall('visual')) if g]
+        self.collisions = [g for g in map(_parse_geometry, element.findall('collision')) if g]
+
+    def __repr__(self) -> str:
+        return f"URDFLink(name={self.name!r}, idx={self.idx}, parent_idx={self.parent_idx})"
+
+
+class URDFJoint:
+    """
+    Joint parsed from a URDF file.
+    """
+
+    def __init__(self, element):
+        """
+        Initialize the joint from its XML element.
+
+        Args:
+            element: XML <joint> element
+        """
+        self.name = element.attrib.get('name', '')
+        self.type = element.attrib.get('type', 'fixed')
+        self.parent = element.find('parent').attrib['link']
+        self.child = element.find('child').attrib['link']
+
+        origin = _parse_origin(element)
+        self.origin_xyz = origin['xyz']
+        self.origin_rpy = origin['rpy']
+
+        axis = element.find('axis')
+        self.axis = _parse_floats(
+            axis.attrib.get('xyz') if axis is not None else None, (1.0, 0.0, 0.0)
+        )
+
+        self.limit = None
+        limit = element.find('limit')
+        if limit is not None:
+            self.limit = {
+                key: float(limit.attrib[key])
+                for key in ('lower', 'upper', 'effort', 'velocity')
+                if key in limit.attrib
+            }
+
+    @property
+    def is_dof(self) -> bool:
+        """True if the joint contributes a degree of freedom."""
+        return self.type in ('revolute', 'continuous', 'prismatic')
+
+    def __repr__(self) -> str:
+        return f"URDFJoint(name={self.name!r}, type={self.type!r})"
+
+
+class URDFModel:
+    """
+    Parsed URDF robot description.
+    """
+
+    def __init__(self, path: str):
+        """
+        Parse a URDF file.
+
+        Args:
+            path: Path to the URDF file
+        """
+        self.path = os.path.abspath(path)
+        root = ET.parse(path).getroot()
+        self.name = root.attrib.get('name', '')
+
+        self.links = [URDFLink(el, i) for i, el in enumerate(root.findall('link'))]
+        self.joints = [URDFJoint(el) for el in root.findall('joint')]
+
+        self._link_by_name = {link.name: link for link in self.links}
+        self._joint_by_child = {}
+        for joint in self.joints:
+            child = self._link_by_name.get(joint.child)
+            parent = self._link_by_name.get(joint.parent)
+            if child is not None and parent is not None:
+                child.parent_idx = parent.idx
+                self._joint_by_child[joint.child] = joint
+
+    @property
+    def n_links(self) -> int:
+        return len(self.links)
+
+    @property
+    def n_joints(self) -> int:
+        return len(self.joints)
+
+    @property
+    def dof_joints(self) -> List[URDFJoint]:
+        """Movable joints in document order."""
+        return [joint for joint in self.joints if joint.is_dof]
+
+    @property
+    def n_dofs(self) -> int:
+        return len(self.dof_joints)
+
+    @property
+    def root_link(self) -> Optional[URDFLink]:
+        """First link without a parent joint."""
+        for link in self.links:
+            if link.parent_idx == -1:
+                return link
+        return None
+
+    @property
+    def total_mass(self) -> float:
+        return sum(link.mass for link in self.links)
+
+    def get_link(self, name: str) -> URDFLink:
+        """
+        Get a link by name.
+
+        Args:
+            name: Link name
+
+        Returns:
+            Matching URDFLink
+        """
+        if name not in self._link_by_name:
+            raise KeyError(f"Link '{name}' not found in {self.name}")
+        return self._link_by_name[name]
+
+    def get_parent_joint(self, link_name: str) -> Optional[URDFJoint]:
+        """
+        Get the joint connecting a link to its parent.
+
+        Args:
+            link_name: Child link name
+
+        Returns:
+            URDFJoint or None for the root link
+        """
+        return self._joint_by_child.get(link_name)
+
+    def mesh_files(self) -> List[str]:
+        """
+        Collect all mesh files referenced by the model.
+
+        Returns:
+            Sorted list of mesh paths, resolved relative to the URDF directory
+        """
+        base_dir = os.path.dirname(self.path)
+        files = set()
+        for link in self.links:
+            for geom in link.visuals + link.collisions:
+                if geom['type'] == 'mesh' and geom['filename']:
+                    files.add(resolve_mesh_path(geom['filename'], base_dir))
+        return sorted(files)
+
+
+def resolve_mesh_path(filename: str, base_dir: str) -> str:
+    """
+    Resolve a URDF mesh reference to a filesystem path.
+
+    Args:
+        filename: Mesh filename as written in the URDF
+        base_dir: Directory containing the URDF file
+
+    Returns:
+        Normalized absolute path
+    """
+    for prefix in ('package://', 'file://'):
+        if filename.startswith(prefix):
+            filename = filename[len(prefix):]
+            break
+    if not os.path.isabs(filename):
+        filename = os.path.join(base_dir, filename)
+    return os.path.normpath(filename)
+
+
+def parse_urdf(path: str) -> URDFModel:
+    """
+    Parse a URDF file into a URDFModel.
+
+    Args:
+        path: Path to the URDF file
+
+    Returns:
+        Parsed URDFModel
+    """
+    return URDFModel(path)
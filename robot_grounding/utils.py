@@ -2,12 +2,10 @@
 Utility functions for robot grounding calculations.
 """
 
-import torch
-import numpy as np
 from typing import List, Tuple, Optional
 
 
-def get_link_world_position(link) -> torch.Tensor:
+def get_link_world_position(link):
     """
     Get the world position of a link.
     
@@ -15,7 +13,7 @@ def get_link_world_position(link) -> torch.Tensor:
         link: Genesis link object
         
     Returns:
-        Position tensor (3,) in world coordinates
+        Position tensor (3,) or (n_envs, 3) in world coordinates
     """
     if hasattr(link, 'get_pos'):
         return link.get_pos()
@@ -42,7 +40,7 @@ def get_lowest_z_position(links: List) -> float:
         try:
             pos = get_link_world_position(link)
             # Handle both single position and batched positions
-            if pos.dim() == 1:
+            if pos.ndim == 1:
                 z = pos[2].item()
             else:
                 # For batched, take first environment
@@ -17,6 +17,7 @@ import sys
 # Import robot grounding library
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from robot_grounding import RobotGroundingCalculator
+from sim_profiling import StepProfiler
 
 
 def main():
@@ -119,6 +120,9 @@ def main():
     
     print("\nStarting parallel simulation with different motion patterns...")
     
+    # Per-phase loop timing (sync=True attributes asynchronous GPU work to phases)
+    profiler = StepProfiler(sync=True, verbose=False)
+    
     try:
         while step_count < max_steps:
             t = step_count * 0.01
@@ -135,43 +139,47 @@ def main():
                 phase_offset = (i / n_envs) * 2 * np.pi
                 frequency = 1.0 + 0.1 * i
                 
-                target_pos = all_initial_pos[i].copy()
+                with profiler.phase('targets'):
+                    target_pos = all_initial_pos[i].copy()
                 
-                # Different motion patterns per robot
-                if n_dofs > 6:
-                    if i % 4 == 0:
-                        # Pattern 1: Simple oscillation
-                        amplitude = 0.3
-                        target_pos[0] += amplitude * np.sin(2 * np.pi * frequency * t + phase_offset)
-                        target_pos[1] += amplitude * np.cos(2 * np.pi * frequency * t + phase_offset)
+                    # Different motion patterns per robot
+                    if n_dofs > 6:
+                        if i % 4 == 0:
+                            # Pattern 1: Simple oscillation
+                            amplitude = 0.3
+                            target_pos[0] += amplitude * np.sin(2 * np.pi * frequency * t + phase_offset)
+                            target_pos[1] += amplitude * np.cos(2 * np.pi * frequency * t + phase_offset)
                     
-                    elif i % 4 == 1:
-                        # Pattern 2: Walking-like motion
-                        step_amp = 0.4
-                        target_pos[0] += step_amp * np.sin(2 * np.pi * frequency * t + phase_offset)
-                        if n_dofs > 6:
-                            target_pos[6] += step_amp * np.sin(2 * np.pi * frequency * t + phase_offset + np.pi)
+                        elif i % 4 == 1:
+                            # Pattern 2: Walking-like motion
+                            step_amp = 0.4
+                            target_pos[0] += step_amp * np.sin(2 * np.pi * frequency * t + phase_offset)
+                            if n_dofs > 6:
+                                target_pos[6] += step_amp * np.sin(2 * np.pi * frequency * t + phase_offset + np.pi)
                     
-                    elif i % 4 == 2:
-                        # Pattern 3: Multi-joint motion
-                        for j in range(min(4, n_dofs)):
-                            joint_phase = phase_offset + j * np.pi / 2
-                            target_pos[j] += 0.2 * np.sin(2 * np.pi * frequency * t + joint_phase)
+                        elif i % 4 == 2:
+                            # Pattern 3: Multi-joint motion
+                            for j in range(min(4, n_dofs)):
+                                joint_phase = phase_offset + j * np.pi / 2
+                                target_pos[j] += 0.2 * np.sin(2 * np.pi * frequency * t + joint_phase)
                     
-                    else:
-                        # Pattern 4: Static with perturbations
-                        perturbation = 0.1 * np.sin(2 * np.pi * 0.5 * t + phase_offset)
-                        target_pos += perturbation
+                        else:
+                            # Pattern 4: Static with perturbations
+                            perturbation = 0.1 * np.sin(2 * np.pi * 0.5 * t + phase_offset)
+                            target_pos += perturbation
                 
                 try:
-                    robot.control_dofs_position(torch.tensor(target_pos, device='cuda'))
+                    with profiler.phase('control'):
+                        robot.control_dofs_position(torch.tensor(target_pos, device='cuda'))
                 except Exception as e:
                     print(f"Control error for robot {i}: {e}")
             
-            scene.step()
+            with profiler.phase('physics'):
+                scene.step()
             
             # Render frame for recording
-            camera.render(rgb=True)
+            with profiler.phase('render'):
+                camera.render(rgb=True)
             
             # Performance stats
             if step_count % 100 == 0 and step_count > 0:
@@ -184,8 +192,9 @@ def main():
                 
                 # Sample robot data
                 for i in [0, n_envs//2, n_envs-1]:
-                    pos = robots[i].get_dofs_position().cpu().numpy()
-                    vel = robots[i].get_dofs_velocity().cpu().numpy()
+                    with profiler.phase('readback'):
+                        pos = robots[i].get_dofs_position().cpu().numpy()
+                        vel = robots[i].get_dofs_velocity().cpu().numpy()
                     print(f"  Robot {i}: pos[0]={pos[0]:.3f}, vel[0]={vel[0]:.3f}")
             
             step_count += 1
@@ -209,6 +218,7 @@ def main():
     print(f"Environment steps: {total_env_steps}")
     print(f"Environment steps/sec: {total_env_steps / total_time:.0f}")
     print(f"Performance per environment: {total_env_steps / total_time / n_envs:.1f} steps/sec")
+    profiler.print_summary()
     
     print("\nParallel simulation completed!")
 
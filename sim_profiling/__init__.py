@@ -0,0 +1,23 @@
+"""
+Simulation Profiling Tools for Genesis
+
+Provides measurement utilities for startup cost, per-step timing and
+resource usage of Genesis simulations.
+"""
+
+__version__ = "0.1.0"
+__author__ = "Genesis Humanoid Learning Project"
+
+from .startup import StartupProfiler, KernelCache, profile_startup, run_startup_profile
+from .step import StepProfiler, LatencyHistogram
+from .sync import SyncTracker
+
+__all__ = [
+    'StartupProfiler',
+    'KernelCache',
+    'profile_startup',
+    'run_startup_profile',
+    'StepProfiler',
+    'LatencyHistogram',
+    'SyncTracker'
+]
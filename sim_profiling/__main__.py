@@ -0,0 +1,26 @@
+"""
+Command line entry point: python -m sim_profiling <command> [options]
+"""
+
+import sys
+
+from . import memory, startup, sync
+
+
+COMMANDS = {
+    'startup': startup.main,
+    'cache': startup.cache_main,
+    'sync': sync.main,
+    'memory': memory.main,
+}
+
+
+def main():
+    if len(sys.argv) < 2 or sys.argv[1] not in COMMANDS:
+        print(f"Usage: python -m sim_profiling {{{','.join(COMMANDS)}}} [options]")
+        sys.exit(2)
+    COMMANDS[sys.argv[1]](sys.argv[2:])
+
+
+if __name__ == "__main__":
+    main()
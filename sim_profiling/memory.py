@@ -0,0 +1,436 @@
+"""
+Memory footprint profiling with per-environment scaling curves.
+
+Measures resident memory and framework tensor memory after each phase of
+a scene's life (import/init, build, stepping, video recording) for a
+sweep of n_envs, each in a fresh process so peaks do not carry over. A
+linear fit over the sweep gives the fixed cost and the marginal cost per
+environment, and the largest live torch tensors and Taichi fields
+(where Genesis keeps its simulation state) are listed for each run.
+Other native allocations, such as meshes or renderer buffers, only show
+up in the resident memory.
+"""
+
+import argparse
+import gc
+import json
+import os
+import resource
+import subprocess
+import sys
+import time
+import warnings
+from typing import Any, Dict, List, Optional
+
+from .startup import DEFAULT_URDF, PROJECT_ROOT, config_key, scene_config
+
+
+DEFAULT_RESULTS_PATH = os.path.join(
+    os.path.expanduser("~"), ".cache", "genesis_humanoid_learning", "memory_profiles.json"
+)
+
+# Ordered phases reported by measure_memory
+MEMORY_PHASES = ['init', 'build', 'step', 'record']
+
+MB = 1024 * 1024
+
+
+def current_rss() -> int:
+    """Current resident set size in bytes."""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss
+    except ImportError:
+        return peak_rss()
+
+
+def peak_rss() -> int:
+    """Peak resident set size of this process in bytes."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def tensor_census(top: int = 10) -> Dict[str, Any]:
+    """
+    Live torch tensors grouped by shape, dtype and device.
+
+    Args:
+        top: Number of largest groups to report
+
+    Returns:
+        Dictionary with total bytes per device and the largest groups
+    """
+    torch = sys.modules.get('torch')
+    if torch is None:
+        return {'devices': {}, 'largest': []}
+
+    groups = {}
+    seen = set()
+    with warnings.catch_warnings():
+        # isinstance on deprecated torch aliases found by gc emits warnings
+        warnings.simplefilter("ignore")
+        tensors = [obj for obj in gc.get_objects() if isinstance(obj, torch.Tensor)]
+    for obj in tensors:
+        try:
+            if obj.is_meta:
+                continue
+            storage = obj.untyped_storage()
+            # Views share storage: count each storage once
+            if storage.data_ptr() in seen:
+                continue
+            seen.add(storage.data_ptr())
+            key = (tuple(obj.shape), str(obj.dtype), str(obj.device))
+            group = groups.setdefault(key, {'count': 0, 'bytes': 0})
+            group['count'] += 1
+            group['bytes'] += storage.nbytes()
+        except Exception:
+            continue
+
+    devices = {}
+    for (_, _, device), group in groups.items():
+        devices[device] = devices.get(device, 0) + group['bytes']
+    largest = sorted(groups.items(), key=lambda item: -item[1]['bytes'])[:top]
+    return {
+        'devices': devices,
+        'largest': [{'shape': list(shape), 'dtype': dtype, 'device': device, **group}
+                    for (shape, dtype, device), group in largest],
+    }
+
+
+def taichi_census(top: int = 10) -> Dict[str, Any]:
+    """
+    Live Taichi fields and ndarrays grouped by shape and dtype.
+
+    Sizes are logical (elements times element size), without any layout
+    padding. Best effort: the result is marked unavailable if Taichi is
+    not loaded or its field classes cannot be inspected.
+
+    Args:
+        top: Number of largest groups to report
+
+    Returns:
+        Dictionary with 'available', total 'bytes' and the largest groups
+    """
+    ti = sys.modules.get('taichi')
+    empty = {'available': False, 'bytes': 0, 'largest': []}
+    if ti is None:
+        return empty
+    try:
+        import numpy as np
+        from taichi.lang.field import Field
+        from taichi.lang.util import to_numpy_type
+        try:
+            from taichi.lang._ndarray import Ndarray
+            classes = (Field, Ndarray)
+        except ImportError:
+            classes = (Field,)
+    except ImportError:
+        return empty
+
+    groups = {}
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        objects = [obj for obj in gc.get_objects() if isinstance(obj, classes)]
+    for obj in objects:
+        try:
+            shape = tuple(obj.shape)
+            dtype = obj.dtype
+            # Matrix and vector containers hold n x m values per element
+            per_element = getattr(obj, 'n', 1) * (getattr(obj, 'm', 1) or 1)
+            nbytes = int(np.prod(shape, dtype=np.int64)) * per_element * np.dtype(to_numpy_type(dtype)).itemsize
+            key = (type(obj).__name__, shape, str(dtype))
+            group = groups.setdefault(key, {'count': 0, 'bytes': 0})
+            group['count'] += 1
+            group['bytes'] += nbytes
+        except Exception:
+            continue
+
+    largest = sorted(groups.items(), key=lambda item: -item[1]['bytes'])[:top]
+    return {
+        'available': True,
+        'bytes': sum(group['bytes'] for group in groups.values()),
+        'largest': [{'kind': kind, 'shape': list(shape), 'dtype': dtype, **group}
+                    for (kind, shape, dtype), group in largest],
+    }
+
+
+def device_memory() -> Dict[str, int]:
+    """Allocator statistics of the CUDA device, if one is in use."""
+    torch = sys.modules.get('torch')
+    if torch is None or not torch.cuda.is_available() or not torch.cuda.is_initialized():
+        return {}
+    return {
+        'allocated': torch.cuda.memory_allocated(),
+        'reserved': torch.cuda.memory_reserved(),
+        'peak_allocated': torch.cuda.max_memory_allocated(),
+    }
+
+
+def snapshot(top: int = 10) -> Dict[str, Any]:
+    """Memory state of this process."""
+    return {
+        'rss': current_rss(),
+        'peak_rss': peak_rss(),
+        'device': device_memory(),
+        'tensors': tensor_census(top),
+        'taichi': taichi_census(top),
+    }
+
+
+def memory_config(urdf_path: str = DEFAULT_URDF, n_envs: int = 1, backend: str = "cpu",
+                  steps: int = 50, record_frames: int = 0,
+                  camera_res: tuple = (640, 480)) -> Dict[str, Any]:
+    """
+    Build a memory profile configuration.
+
+    Args:
+        urdf_path: Robot URDF
+        n_envs: Number of parallel environments (0 builds without batching)
+        backend: Genesis backend name
+        steps: Simulation steps in the step phase
+        record_frames: Frames rendered while recording (0 skips the record phase)
+        camera_res: Recording camera resolution
+
+    Returns:
+        JSON-serializable configuration
+    """
+    config = scene_config(urdf_path, n_envs, backend)
+    config.update({
+        'steps': steps,
+        'record_frames': record_frames,
+        'camera_res': list(camera_res),
+    })
+    return config
+
+
+def measure_memory(config: Dict[str, Any], top: int = 10) -> Dict[str, Any]:
+    """
+    Run the scene phases in this process and snapshot memory after each.
+
+    The record phase renders frames while the camera is recording but does
+    not save the video, so the growth it reports is the in-memory frame
+    buffer the recorder accumulates.
+
+    Args:
+        config: Configuration from memory_config
+        top: Largest tensor groups reported per phase
+
+    Returns:
+        Dictionary with per-phase snapshots and the configuration
+    """
+    phases = {'start': snapshot(top)}
+
+    import genesis as gs
+    gs.init(backend=getattr(gs, config['backend']), logging_level="warning")
+    phases['init'] = snapshot(top)
+
+    scene = gs.Scene(
+        sim_options=gs.options.SimOptions(dt=config['dt'], substeps=config['substeps']),
+        show_viewer=False,
+    )
+    scene.add_entity(gs.morphs.Plane())
+    scene.add_entity(gs.morphs.URDF(file=config['urdf'], pos=(0, 0, 0.8)))
+    camera = None
+    if config['record_frames'] > 0:
+        camera = scene.add_camera(res=tuple(config['camera_res']), pos=(3.0, -3.0, 2.0),
+                                  lookat=(0.0, 0.0, 0.6), fov=40, GUI=False)
+    if config['n_envs'] > 0:
+        scene.build(n_envs=config['n_envs'])
+    else:
+        scene.build()
+    phases['build'] = snapshot(top)
+
+    for _ in range(config['steps']):
+        scene.step()
+    phases['step'] = snapshot(top)
+
+    if camera is not None:
+        camera.start_recording()
+        for _ in range(config['record_frames']):
+            scene.step()
+            camera.render()
+        phases['record'] = snapshot(top)
+        phases['record']['bytes_per_frame'] = (
+            (phases['record']['rss'] - phases['step']['rss']) / config['record_frames']
+        )
+
+    return {
+        'config': config,
+        'phases': phases,
+        'genesis_version': getattr(gs, '__version__', 'unknown'),
+    }
+
+
+def run_memory_profile(config: Dict[str, Any], timeout: float = 3600.0) -> Dict[str, Any]:
+    """
+    Measure memory in a fresh Python process.
+
+    Args:
+        config: Configuration from memory_config
+        timeout: Seconds before the child is killed
+
+    Returns:
+        Result of measure_memory
+    """
+    env = dict(os.environ)
+    env['PYTHONPATH'] = os.pathsep.join(filter(None, [PROJECT_ROOT, env.get('PYTHONPATH')]))
+    output = subprocess.run(
+        [sys.executable, "-m", "sim_profiling", "memory", "--child", json.dumps(config)],
+        cwd=PROJECT_ROOT, env=env, capture_output=True, text=True, timeout=timeout, check=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def fit_scaling(results: List[Dict[str, Any]], phase: str = 'step',
+                metric: str = 'peak_rss') -> Dict[str, float]:
+    """
+    Least-squares fit of memory = fixed + per_env * n_envs.
+
+    Args:
+        results: Results of measure_memory for different n_envs
+        phase: Phase whose snapshot is fitted
+        metric: Snapshot field ('peak_rss' or 'rss')
+
+    Returns:
+        Dictionary with fixed_mb, per_env_mb and the fit's r2
+    """
+    import numpy as np
+
+    points = [(max(r['config']['n_envs'], 1), r['phases'][phase][metric])
+              for r in results if phase in r['phases']]
+    if len(points) < 2:
+        raise ValueError("Need at least two n_envs values to fit a scaling curve")
+    x = np.array([n for n, _ in points], dtype=np.float64)
+    y = np.array([value for _, value in points], dtype=np.float64) / MB
+    per_env, fixed = np.polyfit(x, y, 1)
+    residual = y - (fixed + per_env * x)
+    total = ((y - y.mean()) ** 2).sum()
+    return {
+        'phase': phase,
+        'metric': metric,
+        'fixed_mb': float(fixed),
+        'per_env_mb': float(per_env),
+        'r2': float(1.0 - (residual ** 2).sum() / total) if total > 0 else 1.0,
+    }
+
+
+def predict_mb(fit: Dict[str, float], n_envs: int) -> float:
+    """Memory predicted by a scaling fit for n_envs environments."""
+    return fit['fixed_mb'] + fit['per_env_mb'] * n_envs
+
+
+def save_curves(results: List[Dict[str, Any]], fits: List[Dict[str, float]],
+                path: str = DEFAULT_RESULTS_PATH) -> Dict[str, Any]:
+    """
+    Store a sweep and its fits, keyed by the sweep's fixed settings.
+
+    Args:
+        results: Results of measure_memory
+        fits: Scaling fits over the results
+        path: Results JSON file
+
+    Returns:
+        The stored entry
+    """
+    try:
+        with open(path) as f:
+            history = json.load(f)
+    except (OSError, ValueError):
+        history = {}
+
+    base = dict(results[0]['config'], n_envs=None)
+    entry = {
+        'config': base,
+        'timestamp': time.time(),
+        'curve': {str(r['config']['n_envs']): r['phases'] for r in results},
+        'fits': fits,
+    }
+    history[config_key(base)] = entry
+
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(history, f, indent=1)
+    os.replace(tmp_path, path)
+    return entry
+
+
+def print_result(result: Dict[str, Any], top: int = 5):
+    """Print per-phase memory and the largest tensors and Taichi fields of one run."""
+    config = result['config']
+    print(f"Memory profile: {os.path.basename(config['urdf'])}, n_envs={config['n_envs']}, "
+          f"backend={config['backend']}")
+    for name in MEMORY_PHASES:
+        if name not in result['phases']:
+            continue
+        phase = result['phases'][name]
+        tensors = sum(phase['tensors']['devices'].values())
+        line = (f"  {name:<6} rss {phase['rss'] / MB:9.1f} MB  peak {phase['peak_rss'] / MB:9.1f} MB"
+                f"  tensors {tensors / MB:8.1f} MB")
+        if phase.get('taichi', {}).get('available'):
+            line += f"  taichi {phase['taichi']['bytes'] / MB:8.1f} MB"
+        if phase['device']:
+            line += f"  device {phase['device']['peak_allocated'] / MB:8.1f} MB"
+        if 'bytes_per_frame' in phase:
+            line += f"  {phase['bytes_per_frame'] / MB:.2f} MB/frame"
+        print(line)
+    last = result['phases'][[n for n in MEMORY_PHASES if n in result['phases']][-1]]
+    for group in last['tensors']['largest'][:top]:
+        print(f"    {group['bytes'] / MB:8.1f} MB  {group['count']:>4}x {group['dtype']} "
+              f"{tuple(group['shape'])} on {group['device']}")
+    taichi = last.get('taichi', {})
+    for group in taichi.get('largest', [])[:top]:
+        print(f"    {group['bytes'] / MB:8.1f} MB  {group['count']:>4}x {group['dtype']} "
+              f"{tuple(group['shape'])} Taichi {group['kind']}")
+    if not taichi.get('available'):
+        print("    Only torch tensors are listed: Taichi fields (Genesis' simulation state) "
+              "could not be measured and are included in rss only")
+    else:
+        print("    Other native allocations (meshes, renderer buffers) are included in rss only")
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(prog="python -m sim_profiling memory",
+                                     description="Measure memory use against n_envs")
+    parser.add_argument("--urdf", default=DEFAULT_URDF)
+    parser.add_argument("--n-envs", type=int, nargs="+", default=[1, 16, 64, 256])
+    parser.add_argument("--backend", default="cpu")
+    parser.add_argument("--steps", type=int, default=50)
+    parser.add_argument("--record-frames", type=int, default=0,
+                        help="Frames to render while recording (0 skips recording)")
+    parser.add_argument("--results", default=DEFAULT_RESULTS_PATH)
+    parser.add_argument("--child", default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.child:
+        # Runs inside the fresh interpreter started by run_memory_profile
+        print(json.dumps(measure_memory(json.loads(args.child))))
+        return
+
+    results = []
+    for n_envs in args.n_envs:
+        config = memory_config(args.urdf, n_envs, args.backend, args.steps, args.record_frames)
+        result = run_memory_profile(config)
+        results.append(result)
+        print_result(result)
+
+    fits = []
+    if len(results) >= 2:
+        phases = [p for p in MEMORY_PHASES if p != 'init' and p in results[0]['phases']]
+        print("Per-env scaling (peak RSS):")
+        for phase in phases:
+            fit = fit_scaling(results, phase)
+            fits.append(fit)
+            print(f"  {phase:<6} {fit['fixed_mb']:9.1f} MB + {fit['per_env_mb']:.3f} MB/env "
+                  f"(r2={fit['r2']:.3f}, 4096 envs ~ {predict_mb(fit, 4096) / 1024:.1f} GB)")
+
+    save_curves(results, fits, args.results)
+    print(f"Curves written to {args.results}")
@@ -0,0 +1,497 @@
+"""
+Startup profiling and kernel cache management for Genesis scenes.
+
+Times every phase a sample pays before its first useful step (import,
+gs.init, entity loading including Genesis' own URDF and mesh parsing,
+scene.build and the first steps), records the result per scene configuration and manages the
+persistent Taichi kernel cache that scene.build compiles into.
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import subprocess
+import sys
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional
+
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_URDF = os.path.join(PROJECT_ROOT, "assets", "robots", "g1", "g1.urdf")
+DEFAULT_RESULTS_PATH = os.path.join(
+    os.path.expanduser("~"), ".cache", "genesis_humanoid_learning", "startup_profiles.json"
+)
+
+# Taichi reads ti.init options from TI_* environment variables
+KERNEL_CACHE_ENV = "TI_OFFLINE_CACHE_FILE_PATH"
+DEFAULT_KERNEL_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "taichi", "ticache")
+
+# Cache temporaries and locks younger than this may belong to a running compile
+STALE_FILE_SECONDS = 3600.0
+
+# Ordered phases reported by profile_startup
+STARTUP_PHASES = [
+    'import', 'init', 'add_entity', 'build', 'first_step', 'steady_step',
+]
+
+
+class StartupProfiler:
+    """
+    Accumulate wall-clock durations of named startup phases.
+    """
+
+    def __init__(self, verbose: bool = False):
+        """
+        Initialize an empty profiler.
+
+        Args:
+            verbose: Whether to print each phase as it completes
+        """
+        self.verbose = verbose
+        self.phases: Dict[str, float] = {}
+
+    @contextmanager
+    def phase(self, name: str):
+        """
+        Time a phase. Repeated phases accumulate.
+
+        Args:
+            name: Phase name
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            self.phases[name] = self.phases.get(name, 0.0) + elapsed
+            if self.verbose:
+                print(f"  {name:<12} {elapsed * 1000:9.1f} ms")
+
+    @property
+    def total(self) -> float:
+        """Total time over all phases except the steady-state step."""
+        return sum(t for name, t in self.phases.items() if name != 'steady_step')
+
+
+def scene_config(urdf_path: str = DEFAULT_URDF, n_envs: int = 1, backend: str = "cpu",
+                 dt: float = 0.01, substeps: int = 10) -> Dict[str, Any]:
+    """
+    Build a scene configuration dictionary.
+
+    Args:
+        urdf_path: Robot URDF
+        n_envs: Number of parallel environments (0 builds without batching)
+        backend: Genesis backend name ('cpu', 'gpu', 'cuda', ...)
+        dt: Simulation timestep
+        substeps: Physics substeps per step
+
+    Returns:
+        JSON-serializable configuration
+    """
+    return {
+        'urdf': os.path.abspath(urdf_path),
+        'n_envs': n_envs,
+        'backend': backend,
+        'dt': dt,
+        'substeps': substeps,
+    }
+
+
+def config_key(config: Dict[str, Any]) -> str:
+    """
+    Short stable identifier of a scene configuration.
+
+    Args:
+        config: Configuration from scene_config
+
+    Returns:
+        Hex digest prefix
+    """
+    return hashlib.sha256(json.dumps(config, sort_keys=True).encode()).hexdigest()[:12]
+
+
+def profile_startup(config: Dict[str, Any], verbose: bool = False) -> Dict[str, Any]:
+    """
+    Run the standard sample startup sequence in this process and time it.
+
+    Only the first call per process measures a cold import and init; use
+    run_startup_profile to profile in a fresh interpreter.
+
+    Args:
+        config: Configuration from scene_config
+        verbose: Whether to print phase timings
+
+    Returns:
+        Dictionary with per-phase seconds and the configuration
+    """
+    profiler = StartupProfiler(verbose=verbose)
+
+    with profiler.phase('import'):
+        import genesis as gs
+
+    with profiler.phase('init'):
+        gs.init(backend=getattr(gs, config['backend']), logging_level="warning")
+
+    scene = gs.Scene(
+        sim_options=gs.options.SimOptions(dt=config['dt'], substeps=config['substeps']),
+        show_viewer=False,
+    )
+    with profiler.phase('add_entity'):
+        scene.add_entity(gs.morphs.Plane())
+        scene.add_entity(gs.morphs.URDF(file=config['urdf'], pos=(0, 0, 1.0)))
+
+    with profiler.phase('build'):
+        if config['n_envs'] > 0:
+            scene.build(n_envs=config['n_envs'])
+        else:
+            scene.build()
+
+    with profiler.phase('first_step'):
+        scene.step()
+
+    with profiler.phase('steady_step'):
+        scene.step()
+
+    return {
+        'config': config,
+        'phases': profiler.phases,
+        'total': profiler.total,
+        'genesis_version': getattr(gs, '__version__', 'unknown'),
+    }
+
+
+class KernelCache:
+    """
+    Persistent kernel cache directory used by scene.build.
+
+    Cache hits are detected by comparing the directory contents before and
+    after a build: a build that writes no new files was served from cache.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        """
+        Initialize the cache manager.
+
+        Args:
+            path: Cache directory (default: $TI_OFFLINE_CACHE_FILE_PATH or ~/.cache/taichi/ticache)
+        """
+        self.path = os.path.abspath(
+            path or os.environ.get(KERNEL_CACHE_ENV) or DEFAULT_KERNEL_CACHE_DIR
+        )
+
+    def files(self) -> Dict[str, os.stat_result]:
+        """
+        List all files in the cache.
+
+        Returns:
+            Mapping of relative path to stat result
+        """
+        found = {}
+        if not os.path.isdir(self.path):
+            return found
+        for dirpath, _, filenames in os.walk(self.path):
+            for filename in filenames:
+                full_path = os.path.join(dirpath, filename)
+                try:
+                    found[os.path.relpath(full_path, self.path)] = os.stat(full_path)
+                except OSError:
+                    continue
+        return found
+
+    def snapshot(self) -> Dict[str, int]:
+        """
+        Capture file sizes for hit/miss detection.
+
+        Returns:
+            Mapping of relative path to size in bytes
+        """
+        return {name: st.st_size for name, st in self.files().items()}
+
+    @staticmethod
+    def diff(before: Dict[str, int], after: Dict[str, int]) -> Dict[str, Any]:
+        """
+        Compare two snapshots.
+
+        Args:
+            before: Snapshot taken before a build
+            after: Snapshot taken after a build
+
+        Returns:
+            Dictionary with new/changed file counts, bytes written and 'hit'
+        """
+        new_files = [name for name in after if name not in before]
+        changed = [name for name in after if name in before and after[name] != before[name]]
+        return {
+            'new_files': len(new_files),
+            'changed_files': len(changed),
+            'bytes_written': sum(after[name] for name in new_files + changed),
+            'hit': not new_files and not changed and bool(after),
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Summarize cache size and age.
+
+        Returns:
+            Dictionary with path, file count, total bytes and newest/oldest mtimes
+        """
+        files = self.files()
+        mtimes = [st.st_mtime for st in files.values()]
+        return {
+            'path': self.path,
+            'files': len(files),
+            'bytes': sum(st.st_size for st in files.values()),
+            'oldest': min(mtimes) if mtimes else None,
+            'newest': max(mtimes) if mtimes else None,
+        }
+
+    def validate(self, remove: bool = False, stale_after: float = STALE_FILE_SECONDS) -> List[str]:
+        """
+        Find unusable cache files (empty files and leftover temporaries).
+
+        Locks, temporaries and empty files may belong to another process
+        compiling into the same cache right now, so only those untouched
+        for stale_after seconds count as leftovers.
+
+        Args:
+            remove: Delete the invalid files
+            stale_after: Seconds since the last modification before a file
+                can be a leftover
+
+        Returns:
+            Relative paths of invalid files
+        """
+        invalid = []
+        now = time.time()
+        for name, st in self.files().items():
+            if now - st.st_mtime < stale_after:
+                continue
+            if st.st_size == 0 or name.endswith(('.tmp', '.lock', '.partial')):
+                invalid.append(name)
+        if remove:
+            for name in invalid:
+                os.remove(os.path.join(self.path, name))
+        return sorted(invalid)
+
+    def prune(self, max_bytes: Optional[int] = None, max_age_days: Optional[float] = None,
+              dry_run: bool = False) -> List[str]:
+        """
+        Delete least recently used files until size and age limits hold.
+
+        Args:
+            max_bytes: Maximum total cache size
+            max_age_days: Remove files not accessed for this many days
+            dry_run: Only report what would be removed
+
+        Returns:
+            Relative paths of removed files
+        """
+        files = sorted(self.files().items(), key=lambda item: max(item[1].st_atime, item[1].st_mtime))
+        now = time.time()
+        total = sum(st.st_size for _, st in files)
+        removed = []
+
+        for name, st in files:
+            last_used = max(st.st_atime, st.st_mtime)
+            too_old = max_age_days is not None and now - last_used > max_age_days * 86400
+            too_big = max_bytes is not None and total > max_bytes
+            if not (too_old or too_big):
+                continue
+            removed.append(name)
+            total -= st.st_size
+            if not dry_run:
+                os.remove(os.path.join(self.path, name))
+
+        if not dry_run:
+            self._remove_empty_dirs()
+        return removed
+
+    def clear(self):
+        """Delete the whole cache directory."""
+        shutil.rmtree(self.path, ignore_errors=True)
+
+    def _remove_empty_dirs(self):
+        for dirpath, _, _ in sorted(os.walk(self.path), key=lambda w: -len(w[0])):
+            if dirpath != self.path and not os.listdir(dirpath):
+                os.rmdir(dirpath)
+
+
+def run_startup_profile(config: Dict[str, Any], cache: Optional[KernelCache] = None,
+                        timeout: float = 1800.0) -> Dict[str, Any]:
+    """
+    Profile startup in a fresh Python process.
+
+    Args:
+        config: Configuration from scene_config
+        cache: Kernel cache to use (its path is passed to the child process)
+        timeout: Seconds before the child is killed
+
+    Returns:
+        Result of profile_startup, extended with kernel cache hit information
+    """
+    cache = cache or KernelCache()
+    env = dict(os.environ)
+    env[KERNEL_CACHE_ENV] = cache.path
+    env['PYTHONPATH'] = os.pathsep.join(filter(None, [PROJECT_ROOT, env.get('PYTHONPATH')]))
+
+    before = cache.snapshot()
+    start = time.perf_counter()
+    output = subprocess.run(
+        [sys.executable, "-m", "sim_profiling", "startup", "--child", json.dumps(config)],
+        cwd=PROJECT_ROOT, env=env, capture_output=True, text=True, timeout=timeout, check=True,
+    ).stdout
+    process_total = time.perf_counter() - start
+
+    result = json.loads(output.strip().splitlines()[-1])
+    result['process_total'] = process_total
+    result['kernel_cache'] = KernelCache.diff(before, cache.snapshot())
+    return result
+
+
+def record_result(result: Dict[str, Any], path: str = DEFAULT_RESULTS_PATH,
+                  max_runs: int = 50) -> Dict[str, Any]:
+    """
+    Append a profile result to the per-configuration history.
+
+    Args:
+        result: Result from run_startup_profile
+        path: Results JSON file
+        max_runs: Number of runs kept per configuration
+
+    Returns:
+        The full history for the result's configuration
+    """
+    try:
+        with open(path) as f:
+            history = json.load(f)
+    except (OSError, ValueError):
+        history = {}
+
+    key = config_key(result['config'])
+    entry = history.setdefault(key, {'config': result['config'], 'runs': []})
+    entry['runs'].append(dict(result, timestamp=time.time()))
+    entry['runs'] = entry['runs'][-max_runs:]
+
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(history, f, indent=1)
+    os.replace(tmp_path, path)
+    return entry
+
+
+def warm_up(configs: List[Dict[str, Any]], cache: Optional[KernelCache] = None,
+            verbose: bool = True) -> List[Dict[str, Any]]:
+    """
+    Populate the kernel cache by building each configuration once.
+
+    Args:
+        configs: Scene configurations to compile
+        cache: Kernel cache to populate
+        verbose: Whether to print progress
+
+    Returns:
+        Profile results of the warm-up runs
+    """
+    cache = cache or KernelCache()
+    results = []
+    for config in configs:
+        result = run_startup_profile(config, cache)
+        results.append(result)
+        if verbose:
+            state = "hit" if result['kernel_cache']['hit'] else "compiled"
+            print(f"  {config_key(config)} n_envs={config['n_envs']:<5} "
+                  f"build {result['phases']['build']:.2f}s ({state})")
+    return results
+
+
+def print_result(result: Dict[str, Any]):
+    """Print a startup profile as a phase table."""
+    config = result['config']
+    print(f"Startup profile {config_key(config)}: {os.path.basename(config['urdf'])}, "
+          f"n_envs={config['n_envs']}, backend={config['backend']}, "
+          f"dt={config['dt']}, substeps={config['substeps']}")
+    for name in STARTUP_PHASES:
+        if name in result['phases']:
+            print(f"  {name:<12} {result['phases'][name] * 1000:9.1f} ms")
+    print(f"  {'total':<12} {result['total'] * 1000:9.1f} ms")
+    if 'kernel_cache' in result:
+        cache = result['kernel_cache']
+        state = "hit" if cache['hit'] else f"miss ({cache['new_files']} new files, " \
+                                           f"{cache['bytes_written'] / 1e6:.1f} MB written)"
+        print(f"  kernel cache: {state}")
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(prog="python -m sim_profiling startup",
+                                     description="Profile gs.init / scene.build startup")
+    parser.add_argument("--urdf", default=DEFAULT_URDF)
+    parser.add_argument("--n-envs", type=int, nargs="+", default=[1])
+    parser.add_argument("--backend", default="cpu")
+    parser.add_argument("--dt", type=float, default=0.01)
+    parser.add_argument("--substeps", type=int, default=10)
+    parser.add_argument("--repeat", type=int, default=1, help="Runs per configuration")
+    parser.add_argument("--cache-dir", default=None, help="Kernel cache directory")
+    parser.add_argument("--results", default=DEFAULT_RESULTS_PATH)
+    parser.add_argument("--child", default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.child:
+        # Runs inside the fresh interpreter started by run_startup_profile
+        print(json.dumps(profile_startup(json.loads(args.child))))
+        return
+
+    cache = KernelCache(args.cache_dir)
+    for n_envs in args.n_envs:
+        config = scene_config(args.urdf, n_envs, args.backend, args.dt, args.substeps)
+        for _ in range(args.repeat):
+            result = run_startup_profile(config, cache)
+            record_result(result, args.results)
+            print_result(result)
+
+
+def cache_main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(prog="python -m sim_profiling cache",
+                                     description="Manage the persistent kernel cache")
+    parser.add_argument("action", choices=["stats", "warmup", "validate", "prune", "clear"])
+    parser.add_argument("--cache-dir", default=None)
+    parser.add_argument("--urdf", default=DEFAULT_URDF)
+    parser.add_argument("--n-envs", type=int, nargs="+", default=[1])
+    parser.add_argument("--backend", default="cpu")
+    parser.add_argument("--max-gb", type=float, default=None, help="Prune to this size")
+    parser.add_argument("--max-age-days", type=float, default=None, help="Prune older files")
+    parser.add_argument("--stale-minutes", type=float, default=STALE_FILE_SECONDS / 60,
+                        help="Validate: only treat locks and temporaries older than this as leftovers")
+    parser.add_argument("--dry-run", action="store_true")
+    args = parser.parse_args(argv)
+
+    cache = KernelCache(args.cache_dir)
+
+    if args.action == "stats":
+        stats = cache.stats()
+        print(f"Kernel cache: {stats['path']}")
+        print(f"  files: {stats['files']}")
+        print(f"  size:  {stats['bytes'] / 1e6:.1f} MB")
+    elif args.action == "warmup":
+        print(f"Warming kernel cache: {cache.path}")
+        configs = [scene_config(args.urdf, n, args.backend) for n in args.n_envs]
+        warm_up(configs, cache)
+    elif args.action == "validate":
+        invalid = cache.validate(remove=not args.dry_run, stale_after=args.stale_minutes * 60)
+        print(f"{len(invalid)} invalid cache files" + (" (removed)" if invalid and not args.dry_run else ""))
+        for name in invalid:
+            print(f"  {name}")
+    elif args.action == "prune":
+        max_bytes = int(args.max_gb * 1e9) if args.max_gb is not None else None
+        removed = cache.prune(max_bytes, args.max_age_days, args.dry_run)
+        print(f"{'Would remove' if args.dry_run else 'Removed'} {len(removed)} files")
+    elif args.action == "clear":
+        cache.clear()
+        print(f"Cleared {cache.path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,348 @@
+"""
+Per-phase timing of simulation loop steps.
+
+StepProfiler splits the wall time of each loop iteration into named
+phases (target computation, control, physics, render, readback, ...).
+Phases are timestamped with perf_counter_ns and accumulated into
+fixed-size log-scale histograms, so memory use does not grow with the
+number of steps. The device is only synchronized when requested, since a
+sync changes the timing it measures.
+"""
+
+import bisect
+import functools
+import json
+import os
+import time
+from contextlib import nullcontext
+from typing import Any, Callable, Dict, List, Optional
+
+
+# Histogram range: 1 us to 100 s
+HISTOGRAM_MIN_NS = 1_000
+HISTOGRAM_MAX_NS = 100_000_000_000
+HISTOGRAM_BINS = 96
+
+
+def cuda_synchronize():
+    """Synchronize the CUDA device if torch has initialized one (no-op otherwise)."""
+    import sys
+    torch = sys.modules.get('torch')
+    if torch is not None and torch.cuda.is_available() and torch.cuda.is_initialized():
+        torch.cuda.synchronize()
+
+
+class LatencyHistogram:
+    """
+    Fixed-size histogram of durations with log-spaced bins.
+
+    Count, sum, min and max are exact; percentiles are interpolated within
+    a bin (about 10% relative resolution with the default 96 bins over 8
+    decades).
+    """
+
+    def __init__(self, n_bins: int = HISTOGRAM_BINS, min_ns: int = HISTOGRAM_MIN_NS,
+                 max_ns: int = HISTOGRAM_MAX_NS):
+        """
+        Initialize an empty histogram.
+
+        Args:
+            n_bins: Number of log-spaced bins between min_ns and max_ns
+            min_ns: Upper edge of the first bin
+            max_ns: Lower edge of the overflow bin
+        """
+        ratio = (max_ns / min_ns) ** (1.0 / n_bins)
+        self.edges = [min_ns * ratio ** i for i in range(n_bins + 1)]
+        # counts[0]: below min_ns, counts[-1]: above max_ns
+        self.counts = [0] * (n_bins + 2)
+        self.count = 0
+        self.total_ns = 0
+        self.min_ns = None
+        self.max_ns = None
+
+    def add(self, duration_ns: int):
+        """Record one duration."""
+        self.counts[bisect.bisect_right(self.edges, duration_ns)] += 1
+        self.count += 1
+        self.total_ns += duration_ns
+        if self.min_ns is None or duration_ns < self.min_ns:
+            self.min_ns = duration_ns
+        if self.max_ns is None or duration_ns > self.max_ns:
+            self.max_ns = duration_ns
+
+    @property
+    def mean_ns(self) -> float:
+        return self.total_ns / self.count if self.count else 0.0
+
+    def percentile(self, q: float) -> float:
+        """
+        Estimate a percentile.
+
+        Args:
+            q: Percentile in [0, 100]
+
+        Returns:
+            Duration in nanoseconds (0 if empty)
+        """
+        if not self.count:
+            return 0.0
+        rank = q / 100.0 * self.count
+        seen = 0
+        for i, n in enumerate(self.counts):
+            if n and seen + n >= rank:
+                if i == 0:
+                    return float(self.min_ns)
+                if i == len(self.counts) - 1:
+                    return float(self.max_ns)
+                # Geometric interpolation inside the bin, clamped to the observed range
+                lo, hi = self.edges[i - 1], self.edges[i]
+                value = lo * (hi / lo) ** ((rank - seen) / n)
+                return float(min(max(value, self.min_ns), self.max_ns))
+            seen += n
+        return float(self.max_ns)
+
+    def merge(self, other: 'LatencyHistogram'):
+        """Add the counts of a histogram with the same bins."""
+        if other.edges != self.edges:
+            raise ValueError("Histograms have different bins")
+        self.counts = [a + b for a, b in zip(self.counts, other.counts)]
+        self.count += other.count
+        self.total_ns += other.total_ns
+        for value in (other.min_ns, other.max_ns):
+            if value is not None:
+                self.min_ns = value if self.min_ns is None else min(self.min_ns, value)
+                self.max_ns = value if self.max_ns is None else max(self.max_ns, value)
+
+    def summary(self) -> Dict[str, float]:
+        """Statistics in milliseconds."""
+        return {
+            'count': self.count,
+            'total_ms': self.total_ns / 1e6,
+            'mean_ms': self.mean_ns / 1e6,
+            'p50_ms': self.percentile(50) / 1e6,
+            'p99_ms': self.percentile(99) / 1e6,
+            'min_ms': (self.min_ns or 0) / 1e6,
+            'max_ms': (self.max_ns or 0) / 1e6,
+        }
+
+
+class _PhaseTimer:
+    """Reusable context manager for one phase name (cheaper than a generator)."""
+
+    __slots__ = ('profiler', 'name')
+
+    def __init__(self, profiler: 'StepProfiler', name: str):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        profiler = self.profiler
+        if profiler.sync:
+            profiler.synchronize()
+        profiler._starts.append(time.perf_counter_ns())
+
+    def __exit__(self, exc_type, exc, tb):
+        profiler = self.profiler
+        if profiler.sync:
+            profiler.synchronize()
+        end = time.perf_counter_ns()
+        profiler._record(self.name, profiler._starts.pop(), end)
+        return False
+
+
+class StepProfiler:
+    """
+    Low-overhead phase timer for simulation loops.
+
+    Usage:
+        with StepProfiler(trace_path="trace.json") as profiler:
+            for _ in range(n_steps):
+                with profiler.step():
+                    with profiler.phase('control'):
+                        robot.control_dofs_position(targets)
+                    with profiler.phase('physics'):
+                        scene.step()
+
+    On exit the summary is printed (if verbose) and the Chrome trace is
+    written (if trace_path is set); open it in chrome://tracing or Perfetto.
+    """
+
+    STEP = 'step'
+
+    def __init__(self, sync: bool = False, synchronize: Optional[Callable[[], None]] = None,
+                 enabled: bool = True, trace_path: Optional[str] = None,
+                 max_trace_events: int = 200_000, summary_path: Optional[str] = None,
+                 verbose: bool = True):
+        """
+        Initialize the profiler.
+
+        Args:
+            sync: Synchronize the device at phase boundaries, so asynchronous
+                work is attributed to the phase that launched it
+            synchronize: Sync function (default: CUDA sync if initialized)
+            enabled: If False, phase() and step() are no-ops
+            trace_path: Chrome trace JSON written on exit
+            max_trace_events: Trace events kept; later events are dropped and counted
+            summary_path: Summary JSON written on exit
+            verbose: Print the summary on exit
+        """
+        self.sync = sync
+        self.synchronize = synchronize or cuda_synchronize
+        self.enabled = enabled
+        self.trace_path = trace_path
+        self.max_trace_events = max_trace_events if trace_path else 0
+        self.summary_path = summary_path
+        self.verbose = verbose
+
+        self.histograms: Dict[str, LatencyHistogram] = {}
+        self.order: List[str] = []
+        self.events: List[tuple] = []
+        self.dropped_events = 0
+        self.n_steps = 0
+        self.origin_ns = time.perf_counter_ns()
+        self._starts: List[int] = []
+        self._timers: Dict[str, '_PhaseTimer'] = {}
+        self._null = nullcontext()
+
+    def _record(self, name: str, start_ns: int, end_ns: int):
+        histogram = self.histograms.get(name)
+        if histogram is None:
+            histogram = self.histograms[name] = LatencyHistogram()
+            self.order.append(name)
+        histogram.add(end_ns - start_ns)
+        if len(self.events) < self.max_trace_events:
+            self.events.append((name, start_ns, end_ns, len(self._starts)))
+        elif self.max_trace_events:
+            self.dropped_events += 1
+
+    def _timer(self, name: str) -> '_PhaseTimer':
+        timer = self._timers.get(name)
+        if timer is None:
+            timer = self._timers[name] = _PhaseTimer(self, name)
+        return timer
+
+    def phase(self, name: str):
+        """
+        Context manager timing one phase. Repeated phases within a step
+        are recorded individually (e.g. one control call per robot).
+
+        Args:
+            name: Phase name
+        """
+        return self._timer(name) if self.enabled else self._null
+
+    def step(self):
+        """Context manager marking one full loop iteration."""
+        if not self.enabled:
+            return self._null
+        self.n_steps += 1
+        return self._timer(self.STEP)
+
+    def wrap(self, name: Optional[str] = None):
+        """
+        Decorator timing every call of a function as a phase.
+
+        Args:
+            name: Phase name (default: the function name)
+        """
+        def decorator(fn):
+            phase_name = name or fn.__name__
+
+            @functools.wraps(fn)
+            def wrapper(*args, **kwargs):
+                with self.phase(phase_name):
+                    return fn(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def reset(self):
+        """Discard all recorded timings (e.g. after warm-up steps)."""
+        self.histograms.clear()
+        self.order.clear()
+        self.events.clear()
+        self.dropped_events = 0
+        self.n_steps = 0
+        self.origin_ns = time.perf_counter_ns()
+
+    def summary(self) -> Dict[str, Any]:
+        """
+        Per-phase statistics.
+
+        Returns:
+            Dictionary with 'steps', 'sync' and per-phase statistics; each
+            phase also has 'share', its total as a fraction of step time
+        """
+        step = self.histograms.get(self.STEP)
+        step_total = step.total_ns if step else sum(h.total_ns for h in self.histograms.values())
+        phases = {}
+        for name in self.order:
+            stats = self.histograms[name].summary()
+            stats['share'] = self.histograms[name].total_ns / step_total if step_total else 0.0
+            phases[name] = stats
+        return {
+            'steps': self.n_steps,
+            'sync': self.sync,
+            'phases': phases,
+            'dropped_trace_events': self.dropped_events,
+        }
+
+    def print_summary(self):
+        """Print the per-phase table."""
+        summary = self.summary()
+        print(f"Step profile ({summary['steps']} steps, sync={'on' if self.sync else 'off'}):")
+        print(f"  {'phase':<14} {'calls':>7} {'mean ms':>9} {'p50 ms':>9} {'p99 ms':>9} {'share':>7}")
+        for name, stats in summary['phases'].items():
+            print(f"  {name:<14} {stats['count']:>7} {stats['mean_ms']:9.3f} {stats['p50_ms']:9.3f} "
+                  f"{stats['p99_ms']:9.3f} {stats['share'] * 100:6.1f}%")
+        if self.STEP in self.histograms:
+            step_total = self.histograms[self.STEP].total_ns
+            measured = sum(h.total_ns for n, h in self.histograms.items() if n != self.STEP)
+            if step_total and measured <= step_total:
+                print(f"  {'(untracked)':<14} {'':>7} {'':>9} {'':>9} {'':>9} "
+                      f"{(step_total - measured) / step_total * 100:6.1f}%")
+
+    def chrome_trace(self) -> Dict[str, Any]:
+        """
+        Recorded events in Chrome trace event format.
+
+        Returns:
+            Trace dictionary (timestamps in microseconds since profiler start)
+        """
+        pid = os.getpid()
+        events = [{
+            'name': name,
+            'ph': 'X',
+            'ts': (start - self.origin_ns) / 1e3,
+            'dur': (end - start) / 1e3,
+            'pid': pid,
+            'tid': 0,
+            'args': {'depth': depth},
+        } for name, start, end, depth in self.events]
+        return {'traceEvents': events, 'displayTimeUnit': 'ms',
+                'otherData': {'dropped_events': self.dropped_events}}
+
+    def _write_json(self, data: Dict[str, Any], path: str):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(data, f)
+        os.replace(tmp_path, path)
+
+    def dump(self):
+        """Write the configured summary and trace files and print the summary."""
+        if self.summary_path:
+            self._write_json(self.summary(), self.summary_path)
+        if self.trace_path:
+            self._write_json(self.chrome_trace(), self.trace_path)
+        if self.verbose:
+            self.print_summary()
+            if self.trace_path:
+                print(f"  Chrome trace: {self.trace_path}")
+
+    def __enter__(self) -> 'StepProfiler':
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if self.enabled:
+            self.dump()
+        return False
@@ -0,0 +1,357 @@
+"""
+Host/device synchronization and transfer instrumentation.
+
+SyncTracker temporarily wraps the torch calls that move data between host
+and device (.item(), .cpu(), .tolist(), float()/int()/bool(),
+.to()/.cuda() and torch.tensor/torch.as_tensor with a device) and counts
+them, with the bytes moved, per call site and per simulation step.
+
+On the CPU backend no data actually crosses a device boundary. With
+simulate_device=True every such call is counted as if tensors lived on
+an accelerator, so CI machines without a GPU can still catch new syncs in
+hot paths.
+"""
+
+import argparse
+import json
+import os
+import runpy
+import sys
+import threading
+import traceback
+from typing import Any, Dict, List, Optional, Sequence
+
+from .startup import PROJECT_ROOT
+
+
+# Device-to-host calls: the host waits for the device and copies the result
+# (.numpy() only works on host tensors, so the .cpu() before it is what counts)
+D2H_METHODS = ['item', 'cpu', 'tolist', '__float__', '__int__', '__bool__', '__index__']
+# Host-to-device calls
+H2D_METHODS = ['to', 'cuda']
+H2D_FUNCTIONS = ['tensor', 'as_tensor']
+
+
+def _nbytes(value) -> int:
+    try:
+        return value.numel() * value.element_size()
+    except AttributeError:
+        return 0
+
+
+def _is_device(device) -> bool:
+    if device is None:
+        return False
+    return getattr(device, 'type', str(device).split(':')[0]) != 'cpu'
+
+
+class SyncTracker:
+    """
+    Count host/device syncs and transfers per call site.
+
+    Usage:
+        with SyncTracker(simulate_device=True) as tracker:
+            for _ in range(n_steps):
+                ...
+                scene.step()
+                tracker.step()
+        tracker.print_report()
+        assert not tracker.check(max_per_step=0)
+    """
+
+    def __init__(self, simulate_device: bool = False, stack_depth: int = 4,
+                 project_root: str = PROJECT_ROOT):
+        """
+        Initialize the tracker (nothing is patched until it is entered).
+
+        Args:
+            simulate_device: Count every transfer call as crossing a device boundary
+            stack_depth: Frames kept per call site for the report
+            project_root: Calls are attributed to the innermost frame under this path
+        """
+        self.simulate_device = simulate_device
+        self.stack_depth = stack_depth
+        self.project_root = os.path.abspath(project_root)
+        self.sites: Dict[tuple, Dict[str, Any]] = {}
+        self.n_steps = 0
+        self._originals: Dict[tuple, Any] = {}
+        self._local = threading.local()
+        # The tracker and the command line entry point that runs the script
+        self._skip_files = {os.path.abspath(__file__),
+                            os.path.join(os.path.dirname(os.path.abspath(__file__)), '__main__.py')}
+
+    def _attribute(self):
+        """Innermost project frame (or innermost non-library frame) and a short stack."""
+        # Pseudo-files such as '<frozen runpy>' are not source locations
+        frames = [frame for frame in traceback.extract_stack()
+                  if not frame.filename.startswith('<')
+                  and os.path.abspath(frame.filename) not in self._skip_files]
+        external = [frame for frame in frames if os.sep + 'torch' + os.sep not in frame.filename]
+        project = [frame for frame in external if os.path.abspath(frame.filename).startswith(self.project_root)]
+        candidates = project or external or frames
+        site = candidates[-1] if candidates else None
+        stack = [f"{os.path.relpath(f.filename, self.project_root)}:{f.lineno} {f.name}"
+                 for f in candidates[-self.stack_depth:]]
+        return site, stack, bool(project)
+
+    def _record(self, kind: str, call: str, nbytes: int):
+        site, stack, in_project = self._attribute()
+        location = (f"{os.path.relpath(site.filename, self.project_root)}:{site.lineno}"
+                    if site else "<unknown>")
+        key = (location, kind, call)
+        entry = self.sites.get(key)
+        if entry is None:
+            entry = self.sites[key] = {
+                'site': location,
+                'function': site.name if site else None,
+                'code': site.line if site else None,
+                'kind': kind,
+                'call': call,
+                'count': 0,
+                'bytes': 0,
+                'in_project': in_project,
+                'stack': stack,
+            }
+        entry['count'] += 1
+        entry['bytes'] += nbytes
+
+    def _guarded(self, original, on_call):
+        tracker = self
+
+        def wrapper(*args, **kwargs):
+            # Calls made by torch while handling a tracked call are not counted again
+            if getattr(tracker._local, 'active', False):
+                return original(*args, **kwargs)
+            tracker._local.active = True
+            try:
+                result = original(*args, **kwargs)
+                on_call(args, kwargs, result)
+                return result
+            finally:
+                tracker._local.active = False
+
+        wrapper.__wrapped__ = original
+        return wrapper
+
+    def _patch(self, owner, name, on_call):
+        original = getattr(owner, name, None)
+        if original is None:
+            return
+        # Remember whether the attribute was inherited so __exit__ leaves no trace
+        self._originals[(owner, name)] = (original, name in vars(owner))
+        setattr(owner, name, self._guarded(original, on_call))
+
+    def _d2h(self, call):
+        def on_call(args, kwargs, result):
+            tensor = args[0]
+            if self.simulate_device or _is_device(tensor.device):
+                self._record('d2h', call, _nbytes(tensor) if call != 'item' else tensor.element_size())
+        return on_call
+
+    def _h2d_method(self, call):
+        def on_call(args, kwargs, result):
+            source, target = args[0], result
+            if source is target or not hasattr(target, 'device'):
+                return
+            if _is_device(target.device) and not _is_device(source.device):
+                self._record('h2d', call, _nbytes(target))
+            elif self.simulate_device and self._explicit_device(call, args, kwargs):
+                self._record('h2d', call, _nbytes(target))
+        return on_call
+
+    @staticmethod
+    def _explicit_device(call, args, kwargs) -> bool:
+        """Whether a .to()/.cuda() call names a device (rather than only a dtype)."""
+        if call == 'cuda' or kwargs.get('device') is not None:
+            return True
+        return any(isinstance(a, str) or type(a).__name__ == 'device' for a in args[1:])
+
+    def _h2d_function(self, call):
+        def on_call(args, kwargs, result):
+            device = kwargs.get('device')
+            data = args[0] if args else None
+            if data is not None and hasattr(data, 'device') and data.device == getattr(result, 'device', None):
+                return  # already on the target device, no copy
+            if _is_device(device) or (self.simulate_device and device is not None):
+                self._record('h2d', call, _nbytes(result))
+        return on_call
+
+    def __enter__(self) -> 'SyncTracker':
+        import torch
+        for name in D2H_METHODS:
+            self._patch(torch.Tensor, name, self._d2h(name))
+        for name in H2D_METHODS:
+            self._patch(torch.Tensor, name, self._h2d_method(name))
+        for name in H2D_FUNCTIONS:
+            self._patch(torch, name, self._h2d_function(name))
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        for (owner, name), (original, own) in self._originals.items():
+            if own:
+                setattr(owner, name, original)
+            else:
+                delattr(owner, name)
+        self._originals.clear()
+        return False
+
+    def step(self):
+        """Mark the end of one simulation step."""
+        self.n_steps += 1
+
+    def count_steps(self, scene_cls):
+        """
+        Count steps automatically by wrapping a scene class's step method.
+
+        Args:
+            scene_cls: Class whose step() marks a simulation step (e.g. gs.Scene)
+        """
+        original = scene_cls.step
+        tracker = self
+
+        def step(scene, *args, **kwargs):
+            result = original(scene, *args, **kwargs)
+            tracker.step()
+            return result
+
+        self._originals[(scene_cls, 'step')] = (original, 'step' in vars(scene_cls))
+        scene_cls.step = step
+
+    def report(self) -> Dict[str, Any]:
+        """
+        Counts per call site, largest first.
+
+        Returns:
+            Dictionary with 'steps', per-kind 'totals' and 'sites'
+        """
+        steps = max(self.n_steps, 1)
+        sites = sorted(self.sites.values(), key=lambda e: (-e['count'], e['site']))
+        totals = {}
+        for entry in sites:
+            total = totals.setdefault(entry['kind'], {'count': 0, 'bytes': 0})
+            total['count'] += entry['count']
+            total['bytes'] += entry['bytes']
+        for total in totals.values():
+            total['per_step'] = total['count'] / steps
+        return {
+            'steps': self.n_steps,
+            'simulate_device': self.simulate_device,
+            'totals': totals,
+            'sites': [dict(entry, per_step=entry['count'] / steps) for entry in sites],
+        }
+
+    def print_report(self, limit: int = 20):
+        """Print totals and the busiest call sites."""
+        report = self.report()
+        mode = " (simulated device)" if self.simulate_device else ""
+        print(f"Host/device transfers over {report['steps']} steps{mode}:")
+        for kind, total in sorted(report['totals'].items()):
+            print(f"  {kind}: {total['count']} calls, {total['bytes'] / 1e3:.1f} kB, "
+                  f"{total['per_step']:.2f} per step")
+        for entry in report['sites'][:limit]:
+            marker = "" if entry['in_project'] else " [external]"
+            print(f"  {entry['count']:>7}x {entry['per_step']:7.2f}/step {entry['kind']} "
+                  f"{entry['call']:<10} {entry['site']} ({entry['function']}){marker}")
+            if entry['code']:
+                print(f"             {entry['code']}")
+
+    def check(self, max_per_step: Optional[float] = None,
+              allowed_sites: Sequence[str] = (), project_only: bool = True) -> List[str]:
+        """
+        Check the recorded transfers against a budget.
+
+        Args:
+            max_per_step: Maximum transfers per step at any one call site
+                that is not allowed explicitly
+            allowed_sites: 'path:line' or 'path' prefixes that are exempt
+            project_only: Only gate call sites in project code
+
+        Returns:
+            List of violation messages (empty if within budget)
+        """
+        violations = []
+        for entry in self.report()['sites']:
+            if project_only and not entry['in_project']:
+                continue
+            if any(entry['site'] == allowed or entry['site'].startswith(allowed + ':')
+                   for allowed in allowed_sites):
+                continue
+            if max_per_step is not None and entry['per_step'] > max_per_step:
+                violations.append(
+                    f"{entry['site']}: {entry['per_step']:.2f} {entry['kind']} {entry['call']} "
+                    f"calls per step (budget {max_per_step})"
+                )
+        return violations
+
+
+def load_allowlist(path: Optional[str]) -> List[str]:
+    """
+    Read allowed call sites, one 'path:line' or 'path' per line ('#' comments).
+
+    Args:
+        path: Allowlist file (None for an empty list)
+
+    Returns:
+        List of allowed site prefixes
+    """
+    if not path:
+        return []
+    with open(path) as f:
+        return [line.split('#')[0].strip() for line in f if line.split('#')[0].strip()]
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(
+        prog="python -m sim_profiling sync",
+        description="Run a script and count host/device syncs per call site",
+    )
+    parser.add_argument("script", help="Python script to run")
+    parser.add_argument("script_args", nargs=argparse.REMAINDER)
+    parser.add_argument("--simulate-device", action="store_true",
+                        help="Count transfers as if tensors lived on an accelerator")
+    parser.add_argument("--max-per-step", type=float, default=None,
+                        help="Fail if a project call site exceeds this many transfers per step")
+    parser.add_argument("--allow", default=None, help="Allowlist file of exempt call sites")
+    parser.add_argument("--output", default=None, help="Write the report as JSON")
+    argv = list(sys.argv[1:] if argv is None else argv)
+    # Everything after '--' goes to the script unchecked
+    passthrough = []
+    if '--' in argv:
+        split = argv.index('--')
+        argv, passthrough = argv[:split], argv[split + 1:]
+    args = parser.parse_args(argv)
+
+    # Tracker options after the script path would silently reach the script
+    tracker_flags = {option for action in parser._actions for option in action.option_strings}
+    misplaced = [arg for arg in args.script_args if arg.split('=')[0] in tracker_flags]
+    if misplaced:
+        parser.error(f"Options {misplaced} come after the script path and would be passed to "
+                     f"the script; put them before it, or pass script arguments after '--'")
+    args.script_args += passthrough
+
+    tracker = SyncTracker(simulate_device=args.simulate_device)
+    try:
+        import genesis as gs
+        tracker.count_steps(gs.Scene)
+    except ImportError:
+        pass
+
+    sys.argv = [args.script] + args.script_args
+    with tracker:
+        try:
+            runpy.run_path(args.script, run_name="__main__")
+        except SystemExit:
+            pass
+
+    tracker.print_report()
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, 'w') as f:
+            json.dump(tracker.report(), f, indent=1)
+
+    violations = tracker.check(args.max_per_step, load_allowlist(args.allow))
+    if violations:
+        print("Sync budget exceeded:")
+        for violation in violations:
+            print(f"  {violation}")
+        sys.exit(1)
@@ -0,0 +1,33 @@
+"""
+Simulation Tools for Genesis
+
+Provides runtime utilities for Genesis scenes such as state snapshots
+for fast resets, adaptive stepping with instability rollback, solver
+setting sweeps, solver autotuning and a batched joint controller with
+URDF limits.
+"""
+
+__version__ = "0.1.0"
+__author__ = "Genesis Humanoid Learning Project"
+
+from .snapshot import SceneSnapshot, capture_settled
+from .adaptive_step import AdaptiveStepper, build_adaptive_pair
+from .solver_sweep import solver_config, solver_grid, sweep_table, pareto_front
+from .autotune import autotune, load_solver_options, save_solver_config
+from .controller import JointController, joint_limits
+
+__all__ = [
+    'SceneSnapshot',
+    'capture_settled',
+    'AdaptiveStepper',
+    'build_adaptive_pair',
+    'solver_config',
+    'solver_grid',
+    'sweep_table',
+    'pareto_front',
+    'autotune',
+    'load_solver_options',
+    'save_solver_config',
+    'JointController',
+    'joint_limits'
+]
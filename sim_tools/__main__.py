@@ -0,0 +1,24 @@
+"""
+Command line entry point: python -m sim_tools <command> [options]
+"""
+
+import sys
+
+from . import autotune, solver_sweep
+
+
+COMMANDS = {
+    'solver-sweep': solver_sweep.main,
+    'autotune': autotune.main,
+}
+
+
+def main():
+    if len(sys.argv) < 2 or sys.argv[1] not in COMMANDS:
+        print(f"Usage: python -m sim_tools {{{','.join(COMMANDS)}}} [options]")
+        sys.exit(2)
+    COMMANDS[sys.argv[1]](sys.argv[2:])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,263 @@
+"""
+Adaptive stepping with instability rollback.
+
+Genesis compiles dt and substeps into a scene when it is built, so the
+adaptive stepper pairs the coarse scene with a fine twin of the same
+scene (smaller dt or more substeps). Every step runs on the coarse scene.
+The stability signals of sample 04 (NaNs, |dof velocity| > 50) are
+checked on device; envs that violate them are rolled back to a recent
+snapshot, re-stepped on the fine scene and copied back, and they return
+to the coarse step after a number of stable steps.
+"""
+
+from collections import deque
+from typing import Any, Callable, Dict, Optional, Sequence, Tuple, Union
+
+import torch
+
+from .snapshot import SceneSnapshot
+
+
+def build_adaptive_pair(build_scene: Callable[[float, int], Tuple[Any, Any]], dt: float,
+                        substeps: int, refine: int = 4, mode: str = "dt") -> Dict[str, Any]:
+    """
+    Build the coarse scene and its fine twin.
+
+    Args:
+        build_scene: Function (dt, substeps) -> (built scene, entities);
+            both calls must create the same entities with the same n_envs
+        dt: Coarse timestep
+        substeps: Coarse substeps
+        refine: Refinement factor
+        mode: 'dt' (fine dt = dt / refine, stepped refine times per coarse
+            step) or 'substeps' (same dt, substeps * refine)
+
+    Returns:
+        Keyword arguments for AdaptiveStepper
+    """
+    if mode not in ("dt", "substeps"):
+        raise ValueError(f"Unknown refinement mode: {mode}")
+    scene, entities = build_scene(dt, substeps)
+    if mode == "dt":
+        fine_scene, fine_entities = build_scene(dt / refine, substeps)
+        fine_steps = refine
+    else:
+        fine_scene, fine_entities = build_scene(dt, substeps * refine)
+        fine_steps = 1
+    return {
+        'scene': scene, 'entities': entities,
+        'fine_scene': fine_scene, 'fine_entities': fine_entities,
+        'fine_steps': fine_steps,
+    }
+
+
+class AdaptiveStepper:
+    """
+    Step a batched scene coarsely and re-step unstable envs finely.
+
+    Usage:
+        stepper = AdaptiveStepper(**build_adaptive_pair(build_scene, dt=0.01, substeps=4))
+        for _ in range(n_steps):
+            failed = stepper.step({'robot': targets})
+            if failed is not None:
+                reset(failed)
+        stepper.print_stats()
+
+    The only per-step host sync is one boolean for "any env unstable";
+    env indices are only read back when envs are rolled back or are
+    stepping finely.
+    """
+
+    def __init__(self, scene, entities: Union[Dict[str, Any], Sequence[Any]], fine_scene,
+                 fine_entities: Union[Dict[str, Any], Sequence[Any]], fine_steps: int = 1,
+                 max_velocity: float = 50.0, snapshot_interval: int = 10, ring_size: int = 4,
+                 rollback: int = 1, relax_steps: int = 50,
+                 dofs_idx: Optional[Dict[str, Any]] = None):
+        """
+        Initialize the stepper and take the first snapshot.
+
+        Args:
+            scene: Coarse built scene
+            entities: Coarse scene entities (list or name -> entity)
+            fine_scene: Fine built scene with the same entities and n_envs
+            fine_entities: Fine scene entities, matching entities
+            fine_steps: Fine scene steps per coarse step
+            max_velocity: Largest allowed |dof velocity|
+            snapshot_interval: Coarse steps between snapshots
+            ring_size: Snapshots kept
+            rollback: Snapshots to go back on a violation (1 = most recent)
+            relax_steps: Stable steps before a rolled-back env returns to the coarse step
+            dofs_idx: Optional mapping of entity name to the local dof indices
+                the position targets refer to
+        """
+        if not 1 <= rollback <= ring_size:
+            raise ValueError("rollback must be between 1 and ring_size")
+        self.scene = scene
+        self.fine_scene = fine_scene
+        self.entities = SceneSnapshot._named(entities)
+        self.fine_entities = SceneSnapshot._named(fine_entities)
+        self.fine_steps = fine_steps
+        self.max_velocity = max_velocity
+        self.snapshot_interval = snapshot_interval
+        self.rollback = rollback
+        self.relax_steps = relax_steps
+        self.dofs_idx = dofs_idx or {}
+
+        first = next(iter(self.entities.values()))
+        self.n_envs = scene.n_envs
+        self.device = first.get_dofs_velocity().device
+
+        self.step_count = 0
+        self.ring = deque(maxlen=ring_size)
+        self.history = deque()
+        # Latest position targets per entity; commands persist until replaced
+        self.commands: Dict[str, torch.Tensor] = {}
+        # Coarse steps each env still runs on the fine scene
+        self.fine_remaining = torch.zeros(max(self.n_envs, 1), dtype=torch.long, device=self.device)
+        self._fine_until = 0
+        self.stats = {'steps': 0, 'rollbacks': 0, 'rolled_back_envs': 0,
+                      'fine_steps': 0, 'failed_envs': 0}
+        self._snapshot()
+
+    def _envs(self, idx: torch.Tensor):
+        """Env indices for entity calls (None for an unbatched scene)."""
+        return idx if self.n_envs > 0 else None
+
+    def _snapshot(self):
+        self.ring.append((self.step_count, SceneSnapshot.capture(self.entities, include_gains=False)))
+        # Drop commands older than the oldest snapshot
+        while self.history and self.history[0][0] <= self.ring[0][0]:
+            self.history.popleft()
+
+    def _control(self, entities: Dict[str, Any], targets: Dict[str, torch.Tensor]):
+        for name, value in targets.items():
+            if value is None:
+                continue
+            if name in self.dofs_idx:
+                entities[name].control_dofs_position(value, self.dofs_idx[name])
+            else:
+                entities[name].control_dofs_position(value)
+
+    def _copy(self, source: Dict[str, Any], target: Dict[str, Any], envs: torch.Tensor):
+        """Copy the state of envs from one scene's entities to the other's."""
+        snapshot = SceneSnapshot.capture(source, envs_idx=self._envs(envs), include_gains=False)
+        snapshot.restore(target, envs_idx=self._envs(envs),
+                         source_idx=torch.arange(len(envs), device=self.device))
+
+    def _step_fine(self, targets: Dict[str, torch.Tensor]):
+        self._control(self.fine_entities, targets)
+        for _ in range(self.fine_steps):
+            self.fine_scene.step()
+        self.stats['fine_steps'] += self.fine_steps
+
+    def unstable(self, entities: Optional[Dict[str, Any]] = None) -> torch.Tensor:
+        """
+        Per-env instability flags, computed on device.
+
+        Args:
+            entities: Entities to check (default: the coarse scene's)
+
+        Returns:
+            Bool tensor (n_envs,): NaN or |dof velocity| above max_velocity
+        """
+        flags = torch.zeros(max(self.n_envs, 1), dtype=torch.bool, device=self.device)
+        for entity in (entities or self.entities).values():
+            vel = entity.get_dofs_velocity().reshape(flags.shape[0], -1)
+            qpos = entity.get_qpos().reshape(flags.shape[0], -1)
+            flags |= ~torch.isfinite(vel).all(-1) | ~torch.isfinite(qpos).all(-1)
+            flags |= (vel.abs() > self.max_velocity).any(-1)
+        return flags
+
+    def _roll_back(self, envs: torch.Tensor) -> torch.Tensor:
+        """
+        Re-step newly unstable envs from a snapshot on the fine scene.
+
+        Returns:
+            Envs that are still unstable after the fine re-step
+        """
+        snapshot_step, snapshot = self.ring[-min(self.rollback, len(self.ring))]
+        # Envs already running finely must not advance during the replay
+        active = (self.fine_remaining > 0).nonzero().flatten() if self.step_count < self._fine_until else None
+        saved = (SceneSnapshot.capture(self.fine_entities, envs_idx=self._envs(active), include_gains=False)
+                 if active is not None and len(active) else None)
+
+        snapshot.restore(self.fine_entities, envs_idx=self._envs(envs), source_idx=envs)
+        # The history holds the full command state of every step and ends with this one
+        for step, step_commands in self.history:
+            if step > snapshot_step:
+                self._step_fine(step_commands)
+
+        if saved is not None:
+            saved.restore(self.fine_entities, envs_idx=self._envs(active),
+                          source_idx=torch.arange(len(active), device=self.device))
+        self._copy(self.fine_entities, self.entities, envs)
+
+        self.stats['rollbacks'] += 1
+        self.stats['rolled_back_envs'] += len(envs)
+        return envs[self.unstable()[envs]]
+
+    def _fail(self, envs: torch.Tensor):
+        """Restore envs that could not be stabilized to the latest snapshot."""
+        self.ring[-1][1].restore(self.entities, envs_idx=self._envs(envs), source_idx=envs)
+        self.fine_remaining[envs] = 0
+        self.stats['failed_envs'] += len(envs)
+
+    def step(self, targets: Optional[Dict[str, torch.Tensor]] = None) -> Optional[torch.Tensor]:
+        """
+        Advance all envs by one coarse step.
+
+        Args:
+            targets: Mapping of entity name to position targets for this
+                step (n_envs, n_dofs); entities without targets keep their
+                previous command
+
+        Returns:
+            Indices of envs that stayed unstable even on the fine scene
+            (they are restored to the latest snapshot and should be
+            reset by the caller), or None
+        """
+        targets = targets or {}
+        self._control(self.entities, targets)
+        self.scene.step()
+        self.step_count += 1
+        self.stats['steps'] += 1
+        # Keep copies for replay, callers often update targets in place. The
+        # fine scene is driven with every entity's command, including ones
+        # that were set on earlier steps and kept.
+        self.commands.update({name: value.clone() for name, value in targets.items() if value is not None})
+        commands = dict(self.commands)
+        self.history.append((self.step_count, commands))
+
+        failed = []
+        if self.step_count <= self._fine_until:
+            # Envs in fine mode: step them on the fine scene and overwrite the coarse result
+            fine = (self.fine_remaining > 0).nonzero().flatten()
+            if len(fine):
+                self._step_fine(commands)
+                self._copy(self.fine_entities, self.entities, fine)
+                diverged = fine[self.unstable(self.fine_entities)[fine]]
+                if len(diverged):
+                    self._fail(diverged)
+                    failed.append(diverged)
+                self.fine_remaining[fine] -= 1
+
+        unstable = self.unstable()
+        if unstable.any():
+            envs = unstable.nonzero().flatten()
+            still_unstable = self._roll_back(envs)
+            self.fine_remaining[envs] = self.relax_steps
+            self._fine_until = self.step_count + self.relax_steps
+            if len(still_unstable):
+                self._fail(still_unstable)
+                failed.append(still_unstable)
+
+        if self.step_count % self.snapshot_interval == 0:
+            self._snapshot()
+        return torch.cat(failed) if failed else None
+
+    def print_stats(self):
+        """Print rollback and fine stepping counts."""
+        stats = self.stats
+        print(f"Adaptive stepping: {stats['steps']} steps, {stats['rollbacks']} rollbacks "
+              f"({stats['rolled_back_envs']} envs), {stats['fine_steps']} fine steps, "
+              f"{stats['failed_envs']} failed envs")
@@ -0,0 +1,273 @@
+"""
+Automatic solver settings autotuner.
+
+Searches dt, substeps, constraint solver, iterations and tolerance for
+the cheapest setting that keeps the NaN rate, foot penetration and energy
+drift of a robot's motion set under given thresholds. Candidates are run
+with solver_sweep.run_isolated in parallel processes, cheapest (by
+nominal cost) first, and the chosen setting is written to a JSON config
+file that load_solver_options turns back into Genesis options.
+"""
+
+import argparse
+import itertools
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Sequence
+
+from robot_assets.registry import write_json_atomic
+
+from .solver_sweep import (
+    DEFAULT_URDF, MOTIONS, PROJECT_ROOT, REFERENCE_SETTINGS,
+    accuracy_metrics, run_isolated, settings_label, solver_config,
+)
+
+
+DEFAULT_OUTPUT_PATH = os.path.join(PROJECT_ROOT, "sim_tools", "results", "solver_settings.json")
+
+# Default search space
+SEARCH_SPACE = {
+    'dt': [0.02, 0.01, 0.005, 0.002],
+    'substeps': [2, 4, 10, 20],
+    'solver': ['CG', 'Newton'],
+    'iterations': [10, 25, 50, 100],
+    'tolerance': [1e-4, 1e-5, 1e-6],
+}
+
+# Default acceptance thresholds
+DEFAULT_LIMITS = {
+    'nan_rate': 0.0,          # fraction of motions that produce NaNs
+    'penetration': 0.01,      # m, worst over the motion set
+    'energy_drift': 0.10,     # relative to the reference energy range, worst over the motion set
+}
+
+SETTING_KEYS = ('dt', 'substeps', 'solver', 'iterations', 'tolerance')
+
+
+def nominal_cost(settings: Dict[str, Any]) -> float:
+    """
+    Relative cost estimate used to order candidates before they are measured.
+
+    Physics substeps per simulated second dominate; each solver iteration
+    adds a fraction of a substep, and a Newton iteration is more expensive
+    than a CG iteration but needs fewer of them to converge.
+    """
+    per_iteration = 0.02 if settings['solver'] == 'Newton' else 0.01
+    return settings['substeps'] / settings['dt'] * (1.0 + per_iteration * settings['iterations'])
+
+
+def candidate_settings(space: Dict[str, Sequence[Any]] = SEARCH_SPACE) -> List[Dict[str, Any]]:
+    """
+    All settings in a search space, cheapest nominal cost first.
+
+    Args:
+        space: Mapping of setting name to candidate values
+
+    Returns:
+        List of settings dictionaries
+    """
+    candidates = [dict(zip(SETTING_KEYS, values))
+                  for values in itertools.product(*(space[key] for key in SETTING_KEYS))]
+    return sorted(candidates, key=nominal_cost)
+
+
+def evaluate(results: List[Dict[str, Any]], references: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Aggregate the runs of one setting over the motion set.
+
+    Args:
+        results: run_motion results, one per motion
+        references: Reference result per motion name
+
+    Returns:
+        Dictionary with nan_rate, worst penetration and energy drift, mean
+        joint RMSE and mean wall time per simulated second. Accuracy
+        metrics cover the runs without NaNs only (infinite if every run
+        failed); failed runs count through nan_rate alone.
+    """
+    metrics = [accuracy_metrics(result, references[result['config']['motion']])
+               for result in results if not result['nan']]
+    if not metrics:
+        metrics = [{'penetration': float('inf'), 'energy_drift': float('inf'), 'joint_rmse': float('inf')}]
+    return {
+        'nan_rate': sum(result['nan'] for result in results) / len(results),
+        'penetration': max(m['penetration'] for m in metrics),
+        'energy_drift': max(m['energy_drift'] for m in metrics),
+        'joint_rmse': sum(m['joint_rmse'] for m in metrics) / len(metrics),
+        'wall_per_sim_second': sum(r['wall_per_sim_second'] for r in results) / len(results),
+    }
+
+
+def feasible(summary: Dict[str, Any], limits: Dict[str, float] = DEFAULT_LIMITS) -> bool:
+    """Whether an evaluated setting is within every limit."""
+    return all(summary[name] <= limit for name, limit in limits.items())
+
+
+def autotune(urdf_path: str = DEFAULT_URDF, motions: Sequence[str] = ('validation', 'collision', 'multi_joint'),
+             space: Dict[str, Sequence[Any]] = SEARCH_SPACE, limits: Dict[str, float] = DEFAULT_LIMITS,
+             workers: int = 4, exhaustive: bool = False, backend: str = "cpu",
+             verbose: bool = True) -> Dict[str, Any]:
+    """
+    Find the cheapest solver setting that meets the limits.
+
+    Candidates are evaluated in batches of `workers` settings, in order of
+    nominal cost, each motion in its own process. The search stops after
+    the first batch that contains a feasible setting unless exhaustive is
+    set; the cheapest feasible setting by measured cost is selected.
+    Concurrent runs share the machine, so measured costs are comparable
+    with each other but not with an isolated run (use workers=1 for that).
+
+    Args:
+        urdf_path: Robot URDF
+        motions: Names of scripted motions in MOTIONS
+        space: Search space (see SEARCH_SPACE)
+        limits: Acceptance thresholds (see DEFAULT_LIMITS)
+        workers: Settings evaluated concurrently
+        exhaustive: Evaluate the whole search space
+        backend: Genesis backend name
+        verbose: Whether to print progress
+
+    Returns:
+        Dictionary with the selected 'settings' (None if nothing is
+        feasible), its 'metrics', the limits and all evaluated candidates
+    """
+    start = time.time()
+    fixed = dict(urdf_path=urdf_path, backend=backend)
+
+    if verbose:
+        print(f"Reference runs ({settings_label(REFERENCE_SETTINGS)}) for {len(motions)} motions...")
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        reference_runs = list(pool.map(
+            run_isolated, [solver_config(**REFERENCE_SETTINGS, motion=m, **fixed) for m in motions]
+        ))
+    references = {result['config']['motion']: result for result in reference_runs}
+    unstable = [name for name, result in references.items() if result['nan']]
+    if unstable:
+        raise RuntimeError(f"Reference runs produced NaNs for {unstable}")
+
+    candidates = candidate_settings(space)
+    evaluated = []
+    with ThreadPoolExecutor(max_workers=workers * len(motions)) as pool:
+        for batch_start in range(0, len(candidates), workers):
+            batch = candidates[batch_start:batch_start + workers]
+            futures = [[pool.submit(run_isolated, solver_config(**settings, motion=m, **fixed)) for m in motions]
+                       for settings in batch]
+            for settings, runs in zip(batch, futures):
+                summary = evaluate([future.result() for future in runs], references)
+                ok = feasible(summary, limits)
+                evaluated.append({'settings': settings, 'metrics': summary, 'feasible': ok})
+                if verbose:
+                    status = "ok" if ok else "--"
+                    print(f"  [{len(evaluated)}/{len(candidates)}] {status} {settings_label(settings)} "
+                          f"nan={summary['nan_rate']:.2f} pen={summary['penetration'] * 1000:.2f}mm "
+                          f"drift={summary['energy_drift']:.3f} cost={summary['wall_per_sim_second']:.3f}")
+            if not exhaustive and any(entry['feasible'] for entry in evaluated):
+                break
+
+    accepted = [entry for entry in evaluated if entry['feasible']]
+    best = min(accepted, key=lambda e: e['metrics']['wall_per_sim_second']) if accepted else None
+    return {
+        'urdf': os.path.abspath(urdf_path),
+        'motions': list(motions),
+        'limits': dict(limits),
+        'settings': best['settings'] if best else None,
+        'metrics': best['metrics'] if best else None,
+        'evaluated': evaluated,
+        'search_time': time.time() - start,
+    }
+
+
+def save_solver_config(result: Dict[str, Any], path: str = DEFAULT_OUTPUT_PATH):
+    """
+    Write an autotune result as a solver config file.
+
+    Args:
+        result: Result of autotune with a selected setting
+        path: Output JSON path
+    """
+    if result['settings'] is None:
+        raise ValueError("No feasible setting to save")
+    settings = result['settings']
+    write_json_atomic(path, {
+        'sim_options': {'dt': settings['dt'], 'substeps': settings['substeps']},
+        'rigid_options': {
+            'constraint_solver': settings['solver'],
+            'iterations': settings['iterations'],
+            'tolerance': settings['tolerance'],
+        },
+        'tuned_for': {'urdf': result['urdf'], 'motions': result['motions'], 'limits': result['limits']},
+        'metrics': result['metrics'],
+    })
+
+
+def load_solver_options(path: str) -> Dict[str, Any]:
+    """
+    Read a solver config file as Genesis option objects.
+
+    Usage:
+        options = load_solver_options("sim_tools/results/solver_settings.json")
+        scene = gs.Scene(sim_options=options['sim_options'],
+                         rigid_options=options['rigid_options'])
+
+    Args:
+        path: File written by save_solver_config
+
+    Returns:
+        Dictionary with 'sim_options' (gs.options.SimOptions) and
+        'rigid_options' (gs.options.RigidOptions)
+    """
+    import genesis as gs
+
+    with open(path) as f:
+        config = json.load(f)
+    rigid = dict(config['rigid_options'])
+    rigid['constraint_solver'] = getattr(gs.constraint_solver, rigid['constraint_solver'])
+    return {
+        'sim_options': gs.options.SimOptions(**config['sim_options']),
+        'rigid_options': gs.options.RigidOptions(**rigid),
+    }
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(prog="python -m sim_tools autotune",
+                                     description="Find the cheapest stable solver settings for a robot")
+    target = parser.add_mutually_exclusive_group()
+    target.add_argument("--urdf", default=DEFAULT_URDF)
+    target.add_argument("--robot", default=None, help="Robot variant name from the asset registry")
+    parser.add_argument("--motion", nargs="+", default=['validation', 'collision', 'multi_joint'],
+                        choices=sorted(MOTIONS))
+    parser.add_argument("--dt", type=float, nargs="+", default=SEARCH_SPACE['dt'])
+    parser.add_argument("--substeps", type=int, nargs="+", default=SEARCH_SPACE['substeps'])
+    parser.add_argument("--solver", nargs="+", default=SEARCH_SPACE['solver'], choices=["CG", "Newton"])
+    parser.add_argument("--iterations", type=int, nargs="+", default=SEARCH_SPACE['iterations'])
+    parser.add_argument("--tolerance", type=float, nargs="+", default=SEARCH_SPACE['tolerance'])
+    parser.add_argument("--max-nan-rate", type=float, default=DEFAULT_LIMITS['nan_rate'])
+    parser.add_argument("--max-penetration", type=float, default=DEFAULT_LIMITS['penetration'])
+    parser.add_argument("--max-energy-drift", type=float, default=DEFAULT_LIMITS['energy_drift'])
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--exhaustive", action="store_true", help="Evaluate the whole search space")
+    parser.add_argument("--backend", default="cpu")
+    parser.add_argument("--output", default=DEFAULT_OUTPUT_PATH)
+    args = parser.parse_args(argv)
+
+    urdf_path = args.urdf
+    if args.robot:
+        from robot_assets import RobotRegistry
+        urdf_path = RobotRegistry().urdf_path(args.robot)
+
+    space = {'dt': args.dt, 'substeps': args.substeps, 'solver': args.solver,
+             'iterations': args.iterations, 'tolerance': args.tolerance}
+    limits = {'nan_rate': args.max_nan_rate, 'penetration': args.max_penetration,
+              'energy_drift': args.max_energy_drift}
+
+    result = autotune(urdf_path, args.motion, space, limits, args.workers, args.exhaustive, args.backend)
+    print(f"\nEvaluated {len(result['evaluated'])} settings in {result['search_time']:.0f}s")
+    if result['settings'] is None:
+        print("No setting meets the limits; widen the search space or relax the limits")
+        raise SystemExit(1)
+
+    print(f"Selected: {settings_label(result['settings'])}")
+    save_solver_config(result, args.output)
+    print(f"Solver config written to {args.output}")
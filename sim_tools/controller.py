@@ -0,0 +1,200 @@
+"""
+Batched joint controller with URDF position, effort and velocity limits.
+
+The <limit> of every actuated joint is read once from the URDF into
+(n_dofs,) tensors. For all envs at once the controller either clamps
+position targets into the joint range (position mode, tracked by the
+Genesis PD controller with the force range set from the effort limits)
+or computes PD torques itself (torque mode). Torques are clamped to the
+effort limit, optionally reduced along a linear torque-speed curve
+(motor saturation). Every step is a handful of elementwise tensor ops
+over (n_envs, n_dofs), with no per-joint Python.
+"""
+
+from typing import Dict, Optional, Sequence, Union
+
+import torch
+
+from robot_grounding.urdf import parse_urdf
+
+
+MODES = ('position', 'torque')
+
+
+def joint_limits(urdf_path: str, dof_names: Optional[Sequence[str]] = None,
+                 device='cpu') -> Dict[str, torch.Tensor]:
+    """
+    Read the limits of actuated joints from a URDF.
+
+    Missing limits (e.g. continuous joints, or no effort/velocity given)
+    are unbounded.
+
+    Args:
+        urdf_path: Robot URDF
+        dof_names: Joint order (default: the URDF's actuated joints in order)
+        device: Device of the tensors
+
+    Returns:
+        Dictionary of 'lower', 'upper', 'effort' and 'velocity' tensors (n_dofs,)
+    """
+    model = parse_urdf(urdf_path)
+    joints = {joint.name: joint for joint in model.dof_joints}
+    names = list(dof_names) if dof_names is not None else list(joints)
+    missing = [name for name in names if name not in joints]
+    if missing:
+        raise KeyError(f"Joints not in {urdf_path}: {missing}")
+
+    inf = float('inf')
+    defaults = {'lower': -inf, 'upper': inf, 'effort': inf, 'velocity': inf}
+    limits = {key: [] for key in defaults}
+    for name in names:
+        joint = joints[name]
+        limit = joint.limit or {}
+        for key, default in defaults.items():
+            value = limit.get(key, default)
+            if key in ('lower', 'upper') and joint.type == 'continuous':
+                value = default
+            # URDF uses 0 for "not specified" effort and velocity
+            if key in ('effort', 'velocity') and value <= 0:
+                value = default
+            limits[key].append(value)
+    return {key: torch.tensor(values, dtype=torch.float32, device=device) for key, values in limits.items()}
+
+
+def _pd_torques(targets: torch.Tensor, dof_pos: torch.Tensor, dof_vel: torch.Tensor,
+                target_vel: torch.Tensor, kp: torch.Tensor, kv: torch.Tensor,
+                lower: torch.Tensor, upper: torch.Tensor, effort: torch.Tensor,
+                velocity: torch.Tensor, saturation: bool) -> torch.Tensor:
+    targets = torch.minimum(torch.maximum(targets, lower), upper)
+    torques = kp * (targets - dof_pos) + kv * (target_vel - dof_vel)
+    limit = effort
+    if saturation:
+        # Linear torque-speed curve: driving torque drops to zero at the velocity limit
+        driving = torques * dof_vel > 0
+        scale = torch.clamp(1.0 - dof_vel.abs() / velocity, 0.0, 1.0)
+        limit = torch.where(driving, effort * scale, effort)
+    return torch.minimum(torch.maximum(torques, -limit), limit)
+
+
+class JointController:
+    """
+    Clamped position or PD torque control of a robot's actuated joints.
+
+    Usage:
+        controller = JointController(urdf_path, dof_names, kp=100.0, kv=2.0, device=gs.device)
+        controller.configure(robot, dofs_idx)
+        ...
+        controller.apply(robot, targets, dofs_idx)    # targets (n_envs, n_dofs)
+    """
+
+    def __init__(self, urdf_path: str, dof_names: Optional[Sequence[str]] = None,
+                 kp: Union[float, Dict[str, float]] = 100.0, kv: Union[float, Dict[str, float]] = 2.0,
+                 mode: str = 'position', saturation: bool = False, position_margin: float = 0.0,
+                 effort_scale: float = 1.0, device='cpu'):
+        """
+        Read the joint limits and set up the gains.
+
+        Args:
+            urdf_path: Robot URDF
+            dof_names: Controlled joints in target order (default: all actuated joints)
+            kp: Position gain, for every joint or per joint name
+            kv: Velocity gain, for every joint or per joint name
+            mode: 'position' (clamped targets, Genesis PD) or 'torque' (PD torques here)
+            saturation: Reduce the torque limit linearly to zero at the
+                velocity limit (torque mode)
+            position_margin: Keep targets this far inside the joint range (rad or m)
+            effort_scale: Scale of the URDF effort limits
+            device: Device of the tensors
+        """
+        if mode not in MODES:
+            raise ValueError(f"Unknown mode {mode!r}, expected one of {MODES}")
+        self.mode = mode
+        self.saturation = saturation
+        self.device = torch.device(device)
+
+        limits = joint_limits(urdf_path, dof_names, self.device)
+        self.dof_names = list(dof_names) if dof_names is not None else [
+            joint.name for joint in parse_urdf(urdf_path).dof_joints]
+        self.lower = limits['lower'] + position_margin
+        self.upper = limits['upper'] - position_margin
+        self.effort = limits['effort'] * effort_scale
+        self.velocity = limits['velocity']
+
+        self.kp = self._per_joint(kp)
+        self.kv = self._per_joint(kv)
+        self._zero_vel = torch.zeros_like(self.kp)
+
+    def _per_joint(self, gain: Union[float, Dict[str, float]]) -> torch.Tensor:
+        if isinstance(gain, dict):
+            return torch.tensor([gain.get(name, 0.0) for name in self.dof_names],
+                                dtype=torch.float32, device=self.device)
+        return torch.full((len(self.dof_names),), float(gain), device=self.device)
+
+    def configure(self, robot, dofs_idx: Sequence[int]):
+        """
+        Set the Genesis gains and force range of the controlled joints.
+
+        In position mode Genesis tracks the targets with kp/kv and the
+        effort limits bound its forces. In torque mode its gains are zeroed
+        so the applied torques are the only actuation.
+        """
+        if self.mode == 'position':
+            robot.set_dofs_kp(self.kp, dofs_idx)
+            robot.set_dofs_kv(self.kv, dofs_idx)
+        else:
+            robot.set_dofs_kp(torch.zeros_like(self.kp), dofs_idx)
+            robot.set_dofs_kv(torch.zeros_like(self.kv), dofs_idx)
+        finite = torch.isfinite(self.effort)
+        if bool(finite.any()):
+            big = torch.full_like(self.effort, 1e6)
+            effort = torch.where(finite, self.effort, big)
+            robot.set_dofs_force_range(-effort, effort, dofs_idx)
+
+    def clamp_targets(self, targets: torch.Tensor) -> torch.Tensor:
+        """Clamp position targets (n_envs, n_dofs) into the joint ranges."""
+        return torch.minimum(torch.maximum(targets, self.lower), self.upper)
+
+    def torques(self, targets: torch.Tensor, dof_pos: torch.Tensor, dof_vel: torch.Tensor,
+                target_vel: Optional[torch.Tensor] = None) -> torch.Tensor:
+        """
+        PD torques toward clamped targets, bounded by the effort limits.
+
+        Args:
+            targets: Position targets (n_envs, n_dofs)
+            dof_pos: Joint positions (n_envs, n_dofs)
+            dof_vel: Joint velocities (n_envs, n_dofs)
+            target_vel: Velocity targets (default: zero)
+
+        Returns:
+            Torques (n_envs, n_dofs)
+        """
+        return _pd_torques(targets, dof_pos, dof_vel, self._zero_vel if target_vel is None else target_vel,
+                           self.kp, self.kv, self.lower, self.upper, self.effort, self.velocity,
+                           self.saturation)
+
+    def apply(self, robot, targets: torch.Tensor, dofs_idx: Sequence[int],
+              dof_pos: Optional[torch.Tensor] = None, dof_vel: Optional[torch.Tensor] = None) -> torch.Tensor:
+        """
+        Send targets for all envs to the robot.
+
+        Args:
+            robot: Genesis entity
+            targets: Position targets (n_envs, n_dofs)
+            dofs_idx: Local dof indices of the controlled joints
+            dof_pos: Current joint positions, if already read (torque mode)
+            dof_vel: Current joint velocities, if already read (torque mode)
+
+        Returns:
+            The clamped targets (position mode) or the torques (torque mode)
+        """
+        if self.mode == 'position':
+            command = self.clamp_targets(targets)
+            robot.control_dofs_position(command, dofs_idx)
+        else:
+            if dof_pos is None:
+                dof_pos = robot.get_dofs_position(dofs_idx)
+            if dof_vel is None:
+                dof_vel = robot.get_dofs_velocity(dofs_idx)
+            command = self.torques(targets, dof_pos, dof_vel)
+            robot.control_dofs_force(command, dofs_idx)
+        return command
@@ -0,0 +1,297 @@
+"""
+Scene state snapshots for instant warm resets.
+
+Captures the settled state of robot entities (qpos, dof velocities, base
+pose and PD gains) into a compact tensor bundle that can be saved to disk
+and restored into any subset of environments with one batched write per
+field, instead of re-running settle steps after every reset.
+"""
+
+import os
+from typing import Any, Dict, Optional, Sequence, Union
+
+import torch
+
+
+# Bump when the bundle layout changes
+SNAPSHOT_VERSION = 1
+
+
+def _as_index(envs_idx, device) -> Optional[torch.Tensor]:
+    """Convert environment indices to a long tensor (None stays None)."""
+    if envs_idx is None:
+        return None
+    return torch.as_tensor(envs_idx, dtype=torch.long, device=device).reshape(-1)
+
+
+def _batched(tensor: torch.Tensor, ndim: int) -> torch.Tensor:
+    """Add a leading env dimension to unbatched entity state."""
+    return tensor.unsqueeze(0) if tensor.dim() == ndim else tensor
+
+
+def _scene_n_envs(entity) -> int:
+    """Number of batched environments of an entity's scene (0 if unbatched)."""
+    scene = getattr(entity, 'scene', None)
+    return getattr(scene, 'n_envs', 0) if scene is not None else 0
+
+
+class SceneSnapshot:
+    """
+    State of one or more entities across environments.
+
+    Every field is stored with a leading environment dimension. A snapshot
+    captured from a single environment can be broadcast to any number of
+    environments on restore.
+    """
+
+    def __init__(self, states: Dict[str, Dict[str, torch.Tensor]],
+                 gains: Optional[Dict[str, Dict[str, torch.Tensor]]] = None,
+                 extras: Optional[Dict[str, torch.Tensor]] = None):
+        """
+        Initialize from already captured tensors.
+
+        Args:
+            states: Mapping of entity name to field tensors (n_envs, ...)
+            gains: Mapping of entity name to {'kp', 'kv'} tensors
+            extras: Additional tensors such as controller state (n_envs, ...)
+        """
+        self.states = states
+        self.gains = gains or {}
+        self.extras = extras or {}
+
+    @property
+    def n_envs(self) -> int:
+        """Number of environments stored in the snapshot."""
+        first = next(iter(self.states.values()))
+        return first['qpos'].shape[0]
+
+    @property
+    def nbytes(self) -> int:
+        """Total size of all stored tensors in bytes."""
+        tensors = [t for fields in self.states.values() for t in fields.values()]
+        tensors += [t for fields in self.gains.values() for t in fields.values()]
+        tensors += list(self.extras.values())
+        return sum(t.numel() * t.element_size() for t in tensors)
+
+    @staticmethod
+    def _named(entities: Union[Dict[str, Any], Sequence[Any]]) -> Dict[str, Any]:
+        if isinstance(entities, dict):
+            return entities
+        return {f"entity_{i}": entity for i, entity in enumerate(entities)}
+
+    @classmethod
+    def capture(cls, entities: Union[Dict[str, Any], Sequence[Any]], envs_idx=None,
+                extras: Optional[Dict[str, torch.Tensor]] = None,
+                include_gains: bool = True) -> 'SceneSnapshot':
+        """
+        Capture the current state of entities.
+
+        Args:
+            entities: Genesis entities, as a list or a name -> entity mapping
+            envs_idx: Environments to capture (default: all)
+            extras: Extra per-env tensors to store (e.g. controller state)
+            include_gains: Also store the PD gains of each entity
+
+        Returns:
+            New SceneSnapshot (tensors are cloned)
+        """
+        states = {}
+        gains = {}
+        for name, entity in cls._named(entities).items():
+            states[name] = {
+                'qpos': _batched(entity.get_qpos(envs_idx=envs_idx), 1).clone(),
+                'dofs_vel': _batched(entity.get_dofs_velocity(envs_idx=envs_idx), 1).clone(),
+                'base_pos': _batched(entity.get_pos(envs_idx=envs_idx), 1).clone(),
+                'base_quat': _batched(entity.get_quat(envs_idx=envs_idx), 1).clone(),
+            }
+            if include_gains and hasattr(entity, 'get_dofs_kp'):
+                gains[name] = {
+                    'kp': entity.get_dofs_kp().clone(),
+                    'kv': entity.get_dofs_kv().clone(),
+                }
+        extras = {key: value.clone() for key, value in (extras or {}).items()}
+        return cls(states, gains, extras)
+
+    def restore(self, entities: Union[Dict[str, Any], Sequence[Any]], envs_idx=None,
+                source_idx=None, restore_gains: bool = False) -> Dict[str, torch.Tensor]:
+        """
+        Write the snapshot back into entities.
+
+        Args:
+            entities: Entities matching the ones captured (same names or order)
+            envs_idx: Target environments (default: all environments of the scene)
+            source_idx: Snapshot rows to use, one per target env. By default a
+                single-env snapshot is broadcast, otherwise rows are taken
+                at envs_idx.
+            restore_gains: Also restore the stored PD gains
+
+        Returns:
+            Extras for the restored environments
+        """
+        named = self._named(entities)
+        rows = None
+        for name, fields in self.states.items():
+            entity = named[name]
+            qpos = fields['qpos']
+            device = qpos.device
+
+            target = _as_index(envs_idx, device)
+            n_scene_envs = _scene_n_envs(entity)
+            if target is None and n_scene_envs > 0:
+                target = torch.arange(n_scene_envs, device=device)
+
+            if rows is None:
+                rows = _as_index(source_idx, device)
+                if rows is None:
+                    if target is None or self.n_envs == 1:
+                        rows = torch.zeros(1 if target is None else len(target),
+                                           dtype=torch.long, device=device)
+                    else:
+                        rows = target
+
+            def select(tensor):
+                selected = tensor[rows]
+                # Unbatched scenes take unbatched tensors and no envs_idx
+                return selected[0] if target is None else selected
+
+            entity.set_qpos(select(qpos), envs_idx=target)
+            entity.set_dofs_velocity(select(fields['dofs_vel']), envs_idx=target)
+
+            # A free base stores its pose in qpos (7 coordinates for 6 dofs);
+            # fixed-base entities need the base pose written separately
+            if qpos.shape[-1] == fields['dofs_vel'].shape[-1]:
+                entity.set_pos(select(fields['base_pos']), envs_idx=target)
+                entity.set_quat(select(fields['base_quat']), envs_idx=target)
+
+            if restore_gains and name in self.gains:
+                entity.set_dofs_kp(self.gains[name]['kp'])
+                entity.set_dofs_kv(self.gains[name]['kv'])
+
+        return {key: value[rows] for key, value in self.extras.items()}
+
+    def select(self, envs_idx) -> 'SceneSnapshot':
+        """
+        Create a snapshot containing only some environments.
+
+        Args:
+            envs_idx: Environment rows to keep
+
+        Returns:
+            New SceneSnapshot sharing gains with this one
+        """
+        first = next(iter(self.states.values()))['qpos']
+        rows = _as_index(envs_idx, first.device)
+        states = {
+            name: {key: value[rows] for key, value in fields.items()}
+            for name, fields in self.states.items()
+        }
+        extras = {key: value[rows] for key, value in self.extras.items()}
+        return SceneSnapshot(states, self.gains, extras)
+
+    def to(self, device) -> 'SceneSnapshot':
+        """
+        Move all tensors to a device.
+
+        Args:
+            device: Target torch device
+
+        Returns:
+            New SceneSnapshot on the device
+        """
+        def move(mapping):
+            return {key: value.to(device) for key, value in mapping.items()}
+
+        return SceneSnapshot(
+            {name: move(fields) for name, fields in self.states.items()},
+            {name: move(fields) for name, fields in self.gains.items()},
+            move(self.extras),
+        )
+
+    def state_dict(self) -> Dict[str, Any]:
+        """Serializable representation of the snapshot."""
+        return {
+            'version': SNAPSHOT_VERSION,
+            'states': self.states,
+            'gains': self.gains,
+            'extras': self.extras,
+        }
+
+    @classmethod
+    def from_state_dict(cls, data: Dict[str, Any]) -> 'SceneSnapshot':
+        """
+        Rebuild a snapshot from state_dict output.
+
+        Args:
+            data: Dictionary produced by state_dict
+
+        Returns:
+            SceneSnapshot
+        """
+        if data.get('version') != SNAPSHOT_VERSION:
+            raise ValueError(f"Unsupported snapshot version: {data.get('version')}")
+        return cls(data['states'], data['gains'], data['extras'])
+
+    def save(self, path: str):
+        """
+        Save the snapshot to disk (atomically).
+
+        Args:
+            path: Output file
+        """
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        tmp_path = path + ".tmp"
+        torch.save(self.to('cpu').state_dict(), tmp_path)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str, device=None) -> 'SceneSnapshot':
+        """
+        Load a snapshot from disk.
+
+        Args:
+            path: Snapshot file
+            device: Device to place tensors on (default: CPU)
+
+        Returns:
+            SceneSnapshot
+        """
+        snapshot = cls.from_state_dict(torch.load(path, map_location='cpu', weights_only=True))
+        return snapshot.to(device) if device is not None else snapshot
+
+
+def capture_settled(scene, entities: Union[Dict[str, Any], Sequence[Any]],
+                    n_steps: int = 10, path: Optional[str] = None,
+                    device=None, verbose: bool = False) -> SceneSnapshot:
+    """
+    Get a settled snapshot, stepping the scene only if none is cached.
+
+    If `path` exists the snapshot is loaded and restored immediately.
+    Otherwise the scene is stepped `n_steps` times, captured and saved.
+
+    Args:
+        scene: Built Genesis scene
+        entities: Entities to capture
+        n_steps: Settle steps when no cached snapshot exists
+        path: Snapshot file used as a cache (optional)
+        device: Device for loaded snapshots
+        verbose: Whether to print what happened
+
+    Returns:
+        Settled SceneSnapshot
+    """
+    if path is not None and os.path.exists(path):
+        snapshot = SceneSnapshot.load(path, device)
+        snapshot.restore(entities)
+        if verbose:
+            print(f"Restored settled state from {path} (0 settle steps)")
+        return snapshot
+
+    for _ in range(n_steps):
+        scene.step()
+    snapshot = SceneSnapshot.capture(entities)
+
+    if path is not None:
+        snapshot.save(path)
+    if verbose:
+        print(f"Captured settled state after {n_steps} steps ({snapshot.nbytes} bytes)")
+    return snapshot
@@ -0,0 +1,495 @@
+"""
+Solver accuracy-versus-cost sweep.
+
+Runs a fixed scripted motion (the phases of sample 04) under a grid of
+dt/substeps/constraint solver/iterations/tolerance settings, each in a
+fresh process, and compares every run with a high-fidelity reference
+trajectory. Cost is wall time per simulated second; accuracy is joint
+position error, energy drift and foot penetration. The result is a table
+with the Pareto-optimal settings marked.
+"""
+
+import argparse
+import itertools
+import json
+import math
+import os
+import subprocess
+import sys
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+
+from robot_grounding.kinematics import make_transform
+from robot_grounding.urdf import parse_urdf
+from sim_profiling.startup import DEFAULT_URDF, PROJECT_ROOT
+
+
+DEFAULT_RESULTS_PATH = os.path.join(PROJECT_ROOT, "sim_tools", "results", "solver_sweep.json")
+
+# Trajectories are compared at this simulated-time interval, independent of dt
+SAMPLE_INTERVAL = 0.05
+
+# Settings of the reference run
+REFERENCE_SETTINGS = {
+    'dt': 0.001, 'substeps': 20, 'solver': 'Newton', 'iterations': 200, 'tolerance': 1e-8,
+}
+
+# Default stability bar: a setting "meets the bar" when all of these hold
+DEFAULT_THRESHOLDS = {
+    'joint_rmse': 0.05,       # rad
+    'energy_drift': 0.10,     # relative to the reference energy range
+    'penetration': 0.01,      # m
+}
+
+
+def _sample04_validation(t: float, n_dofs: int) -> np.ndarray:
+    offsets = np.zeros(n_dofs)
+    if n_dofs > 2:
+        offsets[0] = 0.1 * np.sin(2 * np.pi * 0.8 * t)
+        offsets[1] = 0.1 * np.cos(2 * np.pi * 0.8 * t)
+    return offsets
+
+
+def _sample04_collision(t: float, n_dofs: int) -> np.ndarray:
+    offsets = np.zeros(n_dofs)
+    if n_dofs > 6:
+        offsets[0] = 0.5 * np.sin(2 * np.pi * t)
+        offsets[1] = 0.5 * np.sin(2 * np.pi * t * 0.7)
+        if n_dofs > 10:
+            for i in range(min(4, n_dofs - 6)):
+                offsets[6 + i] = 0.3 * np.sin(2 * np.pi * t + i)
+    return offsets
+
+
+def _sample04_multi_joint(t: float, n_dofs: int) -> np.ndarray:
+    offsets = np.zeros(n_dofs)
+    for i in range(min(n_dofs, 12)):
+        offsets[i] = 0.3 / (1 + i * 0.1) * np.sin(2 * np.pi * (1.5 + 0.1 * i) * t + i * np.pi / 6)
+    return offsets
+
+
+def _sample04_full(t: float, n_dofs: int) -> np.ndarray:
+    if t < 2.5:
+        return _sample04_validation(t, n_dofs)
+    if t < 5.0:
+        return _sample04_collision(t, n_dofs)
+    return _sample04_multi_joint(t, n_dofs)
+
+
+# Scripted motions: name -> (target offsets as a function of sim time, duration in seconds)
+MOTIONS: Dict[str, tuple] = {
+    'validation': (_sample04_validation, 2.5),
+    'collision': (_sample04_collision, 2.5),
+    'multi_joint': (_sample04_multi_joint, 2.5),
+    'sample04': (_sample04_full, 7.5),
+}
+
+
+def solver_config(dt: float = 0.005, substeps: int = 20, solver: str = "CG",
+                  iterations: int = 50, tolerance: float = 1e-6, urdf_path: str = DEFAULT_URDF,
+                  motion: str = "sample04", backend: str = "cpu") -> Dict[str, Any]:
+    """
+    Build a solver run configuration.
+
+    Args:
+        dt: Simulation timestep
+        substeps: Physics substeps per step
+        solver: Rigid constraint solver name ('CG' or 'Newton')
+        iterations: Maximum constraint solver iterations
+        tolerance: Constraint solver tolerance
+        urdf_path: Robot URDF
+        motion: Name of a scripted motion in MOTIONS
+        backend: Genesis backend name
+
+    Returns:
+        JSON-serializable configuration
+    """
+    return {
+        'dt': dt,
+        'substeps': substeps,
+        'solver': solver,
+        'iterations': iterations,
+        'tolerance': tolerance,
+        'urdf': os.path.abspath(urdf_path),
+        'motion': motion,
+        'backend': backend,
+    }
+
+
+def solver_grid(timesteps=((0.01, 10), (0.005, 20)), solvers=("CG", "Newton"),
+                iterations=(50,), tolerances=(1e-6,), **kwargs) -> List[Dict[str, Any]]:
+    """
+    Cartesian product of solver settings.
+
+    Args:
+        timesteps: (dt, substeps) pairs
+        solvers: Constraint solver names
+        iterations: Iteration limits
+        tolerances: Solver tolerances
+        **kwargs: Fixed solver_config arguments
+
+    Returns:
+        List of configurations
+    """
+    return [
+        solver_config(dt, substeps, solver, iters, tol, **kwargs)
+        for (dt, substeps), solver, iters, tol
+        in itertools.product(timesteps, solvers, iterations, tolerances)
+    ]
+
+
+def settings_label(config: Dict[str, Any]) -> str:
+    """Short description of a configuration's solver settings."""
+    return (f"dt={config['dt']:<6} sub={config['substeps']:<3} {config['solver']:<6} "
+            f"it={config['iterations']:<4} tol={config['tolerance']:.0e}")
+
+
+def _quat_to_matrix(quat: np.ndarray) -> np.ndarray:
+    """Rotation matrix from a (w, x, y, z) quaternion."""
+    w, x, y, z = quat / np.linalg.norm(quat)
+    return np.array([
+        [1 - 2 * (y * y + z * z), 2 * (x * y - w * z), 2 * (x * z + w * y)],
+        [2 * (x * y + w * z), 1 - 2 * (x * x + z * z), 2 * (y * z - w * x)],
+        [2 * (x * z - w * y), 2 * (y * z + w * x), 1 - 2 * (x * x + y * y)],
+    ])
+
+
+def foot_spheres(urdf_path: str) -> Dict[str, List[tuple]]:
+    """
+    Collision spheres of the foot links, used to measure ground penetration.
+
+    Args:
+        urdf_path: Robot URDF
+
+    Returns:
+        Mapping of foot link name to [(local center, radius), ...]
+    """
+    from robot_grounding import FootDetector
+
+    model = parse_urdf(urdf_path)
+    spheres = {}
+    for link in FootDetector.detect_foot_links(model):
+        for geom in link.collisions:
+            if geom['type'] == 'sphere':
+                center = make_transform(geom['xyz'], geom['rpy'])[:3, 3]
+                spheres.setdefault(link.name, []).append((center, geom['radius']))
+        # Links without collision spheres are measured at their origin
+        spheres.setdefault(link.name, [(np.zeros(3), 0.0)])
+    return spheres
+
+
+def run_motion(config: Dict[str, Any], verbose: bool = False) -> Dict[str, Any]:
+    """
+    Run the scripted motion in this process and record the trajectory.
+
+    The robot starts grounded at the nominal pose and tracks the motion with
+    PD position control. Joint positions, mechanical energy and foot
+    penetration are sampled every SAMPLE_INTERVAL of simulated time.
+
+    Args:
+        config: Configuration from solver_config
+        verbose: Whether to print progress
+
+    Returns:
+        Dictionary with the configuration, sampled trajectory, cost and
+        whether the run produced NaNs
+    """
+    import genesis as gs
+    import torch
+
+    from robot_grounding import RobotGroundingCalculator
+
+    gs.init(backend=getattr(gs, config['backend']), logging_level="warning")
+    scene = gs.Scene(
+        sim_options=gs.options.SimOptions(dt=config['dt'], substeps=config['substeps']),
+        rigid_options=gs.options.RigidOptions(
+            constraint_solver=getattr(gs.constraint_solver, config['solver']),
+            enable_self_collision=True,
+            enable_joint_limit=True,
+            iterations=config['iterations'],
+            tolerance=config['tolerance'],
+        ),
+        show_viewer=False,
+    )
+    scene.add_entity(gs.morphs.Plane(), material=gs.materials.Rigid(friction=0.8))
+    robot = scene.add_entity(gs.morphs.URDF(file=config['urdf'], pos=(0, 0, 1.0)),
+                             material=gs.materials.Rigid(friction=0.7))
+    scene.build()
+
+    height = RobotGroundingCalculator(robot, verbose=False).get_grounding_height(safety_margin=0.0)
+    robot.set_pos(torch.tensor([0.0, 0.0, height], device=gs.device))
+
+    motion, duration = MOTIONS[config['motion']]
+    n_dofs = robot.n_dofs
+    initial = robot.get_dofs_position().clone()
+    masses = torch.tensor([link.inertial_mass for link in robot.links], device=gs.device)
+    spheres = foot_spheres(config['urdf'])
+    feet = {name: robot.get_link(name) for name in spheres}
+
+    def sample():
+        links_pos = robot.get_links_pos()
+        links_vel = robot.get_links_vel()
+        kinetic = 0.5 * (masses * (links_vel ** 2).sum(-1)).sum()
+        potential = 9.81 * (masses * links_pos[..., 2]).sum()
+        lowest = np.inf
+        for name, link in feet.items():
+            pos = link.get_pos().cpu().numpy()
+            rotation = _quat_to_matrix(link.get_quat().cpu().numpy())
+            for center, radius in spheres[name]:
+                lowest = min(lowest, (pos + rotation @ center)[2] - radius)
+        return (robot.get_dofs_position().cpu().numpy().tolist(),
+                (kinetic + potential).item(), max(0.0, -lowest))
+
+    n_steps = int(round(duration / config['dt']))
+    times, qs, energies, penetrations = [], [], [], []
+    next_sample = 0.0
+    nan = False
+    wall = 0.0
+
+    for step in range(n_steps + 1):
+        # Sample at the first step at or after each multiple of SAMPLE_INTERVAL
+        # and record the actual time; accuracy_metrics interpolates between them
+        if step * config['dt'] >= next_sample - 1e-9 or step == n_steps:
+            q, energy, penetration = sample()
+            if not np.all(np.isfinite(q)) or not np.isfinite(energy):
+                nan = True
+                break
+            times.append(step * config['dt'])
+            next_sample = (math.floor(times[-1] / SAMPLE_INTERVAL + 1e-6) + 1) * SAMPLE_INTERVAL
+            qs.append(q)
+            energies.append(energy)
+            penetrations.append(penetration)
+        if step == n_steps:
+            break
+
+        t = step * config['dt']
+        targets = initial + torch.as_tensor(motion(t, n_dofs), dtype=initial.dtype, device=gs.device)
+        start = time.perf_counter()
+        robot.control_dofs_position(targets)
+        scene.step()
+        wall += time.perf_counter() - start
+
+        if verbose and step % 500 == 0:
+            print(f"  t={t:.2f}s", file=sys.stderr)
+
+    simulated = times[-1] if times else 0.0
+    return {
+        'config': config,
+        'times': times,
+        'q': qs,
+        'energy': energies,
+        'penetration': penetrations,
+        'nan': nan,
+        'steps': n_steps,
+        'wall_time': wall,
+        'wall_per_sim_second': wall / simulated if simulated else float('inf'),
+        'steps_per_second': n_steps / wall if wall else 0.0,
+    }
+
+
+def run_isolated(config: Dict[str, Any], timeout: float = 3600.0) -> Dict[str, Any]:
+    """
+    Run one configuration in a fresh Python process.
+
+    Args:
+        config: Configuration from solver_config
+        timeout: Seconds before the child is killed
+
+    Returns:
+        Result of run_motion
+    """
+    env = dict(os.environ)
+    env['PYTHONPATH'] = os.pathsep.join(filter(None, [PROJECT_ROOT, env.get('PYTHONPATH')]))
+    output = subprocess.run(
+        [sys.executable, "-m", "sim_tools", "solver-sweep", "--child", json.dumps(config)],
+        cwd=PROJECT_ROOT, env=env, capture_output=True, text=True, timeout=timeout, check=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def accuracy_metrics(result: Dict[str, Any], reference: Dict[str, Any]) -> Dict[str, float]:
+    """
+    Compare a run with the reference trajectory at the reference sample times.
+
+    Runs whose dt does not divide SAMPLE_INTERVAL sample at slightly
+    different times, so the run is linearly interpolated onto the
+    reference times within their common time span.
+
+    Args:
+        result: Result of run_motion
+        reference: Result of run_motion with reference settings
+
+    Returns:
+        Dictionary with joint_rmse, joint_max_error (rad), energy_drift
+        (max energy deviation relative to the reference energy range) and
+        penetration (max, m). Runs with NaNs get infinite errors.
+    """
+    infinite = {'joint_rmse': float('inf'), 'joint_max_error': float('inf'),
+                'energy_drift': float('inf'), 'penetration': float('inf')}
+    if result['nan'] or not result['times'] or not reference['times']:
+        return infinite
+
+    times = np.asarray(result['times'])
+    ref_times = np.asarray(reference['times'])
+    common = (ref_times >= times[0] - 1e-9) & (ref_times <= times[-1] + 1e-9)
+    if not common.any():
+        return infinite
+    ref_times = ref_times[common]
+
+    q_run = np.asarray(result['q'])
+    q = np.stack([np.interp(ref_times, times, q_run[:, j]) for j in range(q_run.shape[1])], axis=1)
+    q_ref = np.asarray(reference['q'])[common]
+    error = q - q_ref
+    energy = np.interp(ref_times, times, np.asarray(result['energy']))
+    energy_ref = np.asarray(reference['energy'])[common]
+    scale = max(np.ptp(energy_ref), 1e-6)
+    in_span = times <= ref_times[-1] + 1e-9
+    return {
+        'joint_rmse': float(np.sqrt(np.mean(error ** 2))),
+        'joint_max_error': float(np.abs(error).max()),
+        'energy_drift': float(np.abs(energy - energy_ref).max() / scale),
+        'penetration': float(np.asarray(result['penetration'])[in_span].max()),
+    }
+
+
+def meets_bar(metrics: Dict[str, float], thresholds: Dict[str, float] = DEFAULT_THRESHOLDS) -> bool:
+    """Whether every thresholded metric is within its limit."""
+    return all(metrics.get(name, float('inf')) <= limit for name, limit in thresholds.items())
+
+
+def pareto_front(rows: List[Dict[str, Any]], cost: str = 'wall_per_sim_second',
+                 error: str = 'joint_rmse') -> List[int]:
+    """
+    Indices of rows not dominated in (cost, error).
+
+    Args:
+        rows: Table rows with cost and error fields
+        cost: Cost field (lower is better)
+        error: Error field (lower is better)
+
+    Returns:
+        Indices of Pareto-optimal rows
+    """
+    front = []
+    for i, row in enumerate(rows):
+        dominated = any(
+            other[cost] <= row[cost] and other[error] <= row[error]
+            and (other[cost] < row[cost] or other[error] < row[error])
+            for j, other in enumerate(rows) if j != i
+        )
+        if not dominated:
+            front.append(i)
+    return front
+
+
+def sweep_table(results: List[Dict[str, Any]], reference: Dict[str, Any],
+                thresholds: Dict[str, float] = DEFAULT_THRESHOLDS) -> List[Dict[str, Any]]:
+    """
+    Build the accuracy-versus-cost table, sorted by cost.
+
+    Args:
+        results: Results of run_motion
+        reference: Reference result
+        thresholds: Stability bar
+
+    Returns:
+        Rows with settings, cost, accuracy metrics, 'pareto' and 'meets_bar'
+    """
+    rows = []
+    for result in results:
+        metrics = accuracy_metrics(result, reference)
+        rows.append({
+            'config': result['config'],
+            'wall_per_sim_second': result['wall_per_sim_second'],
+            'steps_per_second': result['steps_per_second'],
+            'nan': result['nan'],
+            **metrics,
+            'meets_bar': not result['nan'] and meets_bar(metrics, thresholds),
+        })
+    rows.sort(key=lambda row: row['wall_per_sim_second'])
+    front = set(pareto_front(rows))
+    for i, row in enumerate(rows):
+        row['pareto'] = i in front
+    return rows
+
+
+def cheapest_meeting_bar(rows: List[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """The lowest-cost row that meets the stability bar, if any."""
+    candidates = [row for row in rows if row['meets_bar']]
+    return min(candidates, key=lambda row: row['wall_per_sim_second']) if candidates else None
+
+
+def print_table(rows: List[Dict[str, Any]]):
+    """Print the sweep table (P = Pareto-optimal, ok = meets the stability bar)."""
+    print(f"  {'settings':<44} {'wall/sim s':>10} {'steps/s':>9} {'rmse rad':>9} "
+          f"{'max rad':>8} {'E drift':>8} {'pen mm':>7}")
+    for row in rows:
+        flags = ("P" if row['pareto'] else " ") + (" ok" if row['meets_bar'] else "   ")
+        if row['nan']:
+            print(f"  {settings_label(row['config']):<44} {'NaN':>10} {flags}")
+            continue
+        print(f"  {settings_label(row['config']):<44} {row['wall_per_sim_second']:10.3f} "
+              f"{row['steps_per_second']:9.1f} {row['joint_rmse']:9.4f} {row['joint_max_error']:8.4f} "
+              f"{row['energy_drift']:8.3f} {row['penetration'] * 1000:7.2f}  {flags}")
+
+
+def _timestep(value: str) -> tuple:
+    dt, substeps = value.split(":")
+    return float(dt), int(substeps)
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(prog="python -m sim_tools solver-sweep",
+                                     description="Sweep solver settings for accuracy versus cost")
+    parser.add_argument("--urdf", default=DEFAULT_URDF)
+    parser.add_argument("--motion", default="sample04", choices=sorted(MOTIONS))
+    parser.add_argument("--timestep", type=_timestep, nargs="+",
+                        default=[(0.02, 4), (0.01, 10), (0.01, 4), (0.005, 20), (0.005, 10)],
+                        metavar="DT:SUBSTEPS")
+    parser.add_argument("--solver", nargs="+", default=["CG", "Newton"], choices=["CG", "Newton"])
+    parser.add_argument("--iterations", type=int, nargs="+", default=[10, 50])
+    parser.add_argument("--tolerance", type=float, nargs="+", default=[1e-5, 1e-6])
+    parser.add_argument("--backend", default="cpu")
+    parser.add_argument("--max-rmse", type=float, default=DEFAULT_THRESHOLDS['joint_rmse'])
+    parser.add_argument("--max-energy-drift", type=float, default=DEFAULT_THRESHOLDS['energy_drift'])
+    parser.add_argument("--max-penetration", type=float, default=DEFAULT_THRESHOLDS['penetration'])
+    parser.add_argument("--output", default=DEFAULT_RESULTS_PATH)
+    parser.add_argument("--child", default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.child:
+        # Runs inside the fresh interpreter started by run_isolated
+        print(json.dumps(run_motion(json.loads(args.child))))
+        return
+
+    thresholds = {'joint_rmse': args.max_rmse, 'energy_drift': args.max_energy_drift,
+                  'penetration': args.max_penetration}
+    fixed = dict(urdf_path=args.urdf, motion=args.motion, backend=args.backend)
+
+    print(f"Reference run: {settings_label(solver_config(**REFERENCE_SETTINGS, **fixed))}")
+    reference = run_isolated(solver_config(**REFERENCE_SETTINGS, **fixed))
+    if reference['nan']:
+        raise RuntimeError("Reference run produced NaNs; use a smaller reference dt")
+
+    configs = solver_grid(args.timestep, args.solver, args.iterations, args.tolerance, **fixed)
+    results = []
+    for i, config in enumerate(configs):
+        print(f"[{i + 1}/{len(configs)}] {settings_label(config)}")
+        results.append(run_isolated(config))
+
+    rows = sweep_table(results, reference, thresholds)
+    print(f"\nAccuracy versus cost ({args.motion}, P = Pareto-optimal, ok = meets bar):")
+    print_table(rows)
+
+    best = cheapest_meeting_bar(rows)
+    if best:
+        print(f"\nCheapest setting meeting the bar: {settings_label(best['config'])}")
+    else:
+        print("\nNo setting meets the stability bar")
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(args.output, 'w') as f:
+        json.dump({'reference': reference['config'], 'thresholds': thresholds, 'rows': rows}, f, indent=1)
+    print(f"Table written to {args.output}")
@@ -0,0 +1,40 @@
+import json
+import os
+
+import torch
+
+from humanoid_learning.checkpoint import MANIFEST_NAME, CheckpointManager
+
+
+def save_steps(manager, steps):
+    for step in steps:
+        manager.save(step, {'weights': torch.full((2,), float(step))})
+    manager.wait()
+
+
+def test_keeps_last_checkpoints(tmp_path):
+    with CheckpointManager(str(tmp_path), keep_last=3, verbose=False) as manager:
+        save_steps(manager, range(1, 8))
+        assert manager.steps() == [5, 6, 7]
+        assert manager.latest() == manager.path(7)
+        assert manager.load()['trainer']['weights'][0].item() == 7.0
+
+
+def test_keep_every_retains_milestones(tmp_path):
+    with CheckpointManager(str(tmp_path), keep_last=2, keep_every=4, verbose=False) as manager:
+        save_steps(manager, range(1, 11))
+        assert manager.steps() == [4, 8, 9, 10]
+
+    with open(os.path.join(tmp_path, MANIFEST_NAME)) as f:
+        manifest = json.load(f)
+    assert manifest['latest_step'] == 10
+    assert manifest['checkpoints'] == [f"checkpoint_{step}.pt" for step in (4, 8, 9, 10)]
+
+
+def test_checkpoint_state_is_copied_at_save(tmp_path):
+    weights = torch.zeros(3)
+    with CheckpointManager(str(tmp_path), verbose=False) as manager:
+        manager.save(1, {'weights': weights})
+        weights.add_(1.0)
+        manager.wait()
+        assert torch.equal(manager.load()['trainer']['weights'], torch.zeros(3))
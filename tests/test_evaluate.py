@@ -0,0 +1,59 @@
+import json
+
+import pytest
+
+from humanoid_learning import evaluate
+from humanoid_learning.evaluate import evaluation_jobs, read_episodes, run_evaluation, summarize
+
+
+def episode(seed, value):
+    return {'policy': 'a.pt', 'robot': 'g1', 'terrain': 0.0, 'seed': seed,
+            'return': value, 'length_s': 1.0, 'fell': 0}
+
+
+def done(seed):
+    return {'policy': 'a.pt', 'robot': 'g1', 'terrain': 0.0, 'seed': seed, 'done': True, 'wall_time': 1.0}
+
+
+def test_read_episodes_ignores_interrupted_attempts(tmp_path):
+    path = tmp_path / "episodes.jsonl"
+    lines = [json.dumps(record) for record in (episode(0, 1.0), episode(0, 1.0), episode(1, 9.0))]
+    lines.append('{"policy": "a.pt", "rob')      # cut off by a crash
+    lines += [json.dumps(record) for record in (episode(0, 2.0), episode(0, 2.0), done(0),
+                                                episode(1, 3.0), done(1), episode(2, 5.0))]
+    path.write_text("\n".join(lines) + "\n")
+
+    completed, episodes = read_episodes(str(path))
+    assert completed == {evaluate.job_id(done(0)), evaluate.job_id(done(1))}
+    assert [record['return'] for record in episodes] == [2.0, 2.0, 3.0]
+    assert summarize(str(path))[0]['episodes'] == 3
+
+
+def test_retried_jobs_are_counted_once(tmp_path, monkeypatch):
+    attempts = {'failed': False}
+
+    def fake_group(group, on_record, timeout=0.0):
+        for job in group['jobs']:
+            for _ in range(3):
+                on_record(dict(job, **{'return': 1.0, 'length_s': 1.0, 'fell': 0}))
+            if job['seed'] == 1 and not attempts['failed']:
+                attempts['failed'] = True
+                raise RuntimeError("child crashed")
+            on_record(dict(job, done=True, wall_time=0.0))
+
+    monkeypatch.setattr(evaluate, 'run_group_isolated', fake_group)
+    path = str(tmp_path / "episodes.jsonl")
+    jobs = evaluation_jobs(['a.pt'], ['g1'], range(3), [0.0])
+
+    run_evaluation(jobs, path, workers=1, verbose=False)
+    assert len(read_episodes(path)[0]) == 1
+    run_evaluation(jobs, path, workers=1, verbose=False)
+    completed, episodes = read_episodes(path)
+    assert len(completed) == 3
+    assert len(episodes) == 9
+
+
+@pytest.mark.parametrize("successes, n", [(0, 50), (25, 50), (50, 50)])
+def test_rate_interval_contains_rate(successes, n):
+    interval = evaluate.rate_interval(successes, n)
+    assert 0.0 <= interval['low'] <= interval['mean'] <= interval['high'] <= 1.0
@@ -0,0 +1,52 @@
+import math
+
+import numpy as np
+import torch
+
+from humanoid_learning.motion import MotionLibrary, save_clip
+
+
+DOF_NAMES = ['hip', 'knee']
+
+
+def yaw_quat(angle):
+    return np.stack([np.cos(angle / 2), np.zeros_like(angle), np.zeros_like(angle), np.sin(angle / 2)], axis=-1)
+
+
+def make_library(tmp_path, loop=False):
+    # 2 s at 10 fps: hip moves linearly, knee is constant, base turns at 0.5 rad/s
+    times = np.arange(21) / 10.0
+    dof_pos = np.stack([0.3 * times, np.full_like(times, -0.2)], axis=-1)
+    # Columns stored in the opposite order to check the mapping by name
+    save_clip(str(tmp_path / "walk.npz"), fps=10.0, dof_pos=dof_pos[:, ::-1], dof_names=DOF_NAMES[::-1],
+              root_pos=np.stack([times, np.zeros_like(times), np.full_like(times, 0.8)], axis=-1),
+              root_rot=yaw_quat(0.5 * times), loop=loop)
+    return MotionLibrary(str(tmp_path), DOF_NAMES, dt=0.02, verbose=False)
+
+
+def test_get_interpolates_between_frames(tmp_path):
+    motions = make_library(tmp_path)
+    clip_ids = torch.zeros(3, dtype=torch.long)
+    times = torch.tensor([0.0, 0.73, 1.51])
+    ref = motions.get(clip_ids, times)
+
+    torch.testing.assert_close(ref['dof_pos'][:, 0], 0.3 * times, rtol=0, atol=1e-5)
+    torch.testing.assert_close(ref['dof_pos'][:, 1], torch.full((3,), -0.2), rtol=0, atol=1e-6)
+    torch.testing.assert_close(ref['dof_vel'][:, 0], torch.full((3,), 0.3), rtol=0, atol=1e-4)
+    torch.testing.assert_close(ref['root_pos'][:, 0], times, rtol=0, atol=1e-5)
+    expected_rot = torch.from_numpy(yaw_quat(0.5 * times.double().numpy())).float()
+    torch.testing.assert_close(ref['root_rot'], expected_rot, rtol=0, atol=1e-5)
+    torch.testing.assert_close(ref['root_ang_vel'][:, 2], torch.full((3,), 0.5), rtol=0, atol=1e-4)
+
+
+def test_non_looping_clip_holds_last_frame(tmp_path):
+    motions = make_library(tmp_path)
+    ref = motions.get(torch.zeros(2, dtype=torch.long), torch.tensor([2.0, 5.0]))
+    torch.testing.assert_close(ref['dof_pos'][:, 0], torch.full((2,), 0.6), rtol=0, atol=1e-5)
+
+
+def test_looping_clip_wraps_around(tmp_path):
+    motions = make_library(tmp_path, loop=True)
+    ref = motions.get(torch.zeros(1, dtype=torch.long), torch.tensor([2.5]))
+    torch.testing.assert_close(ref['dof_pos'][:, 0], torch.tensor([0.15]), rtol=0, atol=1e-5)
+    assert math.isclose(float(motions.duration[0]), 2.0, abs_tol=1e-6)
@@ -0,0 +1,49 @@
+import torch
+
+from humanoid_learning.normalizer import RunningNormalizer, combine_moments
+
+
+def test_combine_moments_matches_single_pass():
+    generator = torch.Generator().manual_seed(0)
+    x = torch.randn(300, 6, dtype=torch.float64, generator=generator) * 3.0 + 1.5
+    a, b = x[:120], x[120:]
+    var_a, mean_a = torch.var_mean(a, dim=0, correction=0)
+    var_b, mean_b = torch.var_mean(b, dim=0, correction=0)
+    count, mean, var = combine_moments(torch.tensor(120.0, dtype=torch.float64), mean_a, var_a,
+                                       torch.tensor(180.0, dtype=torch.float64), mean_b, var_b)
+    expected_var, expected_mean = torch.var_mean(x, dim=0, correction=0)
+    assert count.item() == 300
+    torch.testing.assert_close(mean, expected_mean, rtol=0, atol=1e-12)
+    torch.testing.assert_close(var, expected_var, rtol=0, atol=1e-12)
+
+
+def test_merged_workers_match_one_normalizer():
+    generator = torch.Generator().manual_seed(1)
+    batches = [torch.randn(n, 4, generator=generator) * 2.0 - 1.0 for n in (64, 7, 128, 33)]
+    single = RunningNormalizer(4)
+    workers = [RunningNormalizer(4), RunningNormalizer(4)]
+    for i, batch in enumerate(batches):
+        single.update(batch)
+        workers[i % 2].update(batch)
+    merged = RunningNormalizer.merged(workers)
+    torch.testing.assert_close(merged.count, single.count)
+    torch.testing.assert_close(merged.mean, single.mean, rtol=0, atol=1e-12)
+    torch.testing.assert_close(merged.var, single.var, rtol=0, atol=1e-12)
+
+
+def test_empty_batch_leaves_statistics_unchanged():
+    normalizer = RunningNormalizer(4)
+    normalizer.update(torch.randn(16, 4))
+    state = {key: value.clone() for key, value in normalizer.state_dict().items()}
+    normalizer.update(torch.zeros(0, 4))
+    for key, value in normalizer.state_dict().items():
+        assert torch.equal(value, state[key])
+    assert torch.isfinite(normalizer(torch.randn(3, 4))).all()
+
+
+def test_empty_first_batch_keeps_initial_statistics():
+    normalizer = RunningNormalizer(3)
+    normalizer.update(torch.zeros(0, 3))
+    assert normalizer.count.item() == 0
+    assert torch.equal(normalizer.mean, torch.zeros(3, dtype=torch.float64))
+    assert torch.equal(normalizer.var, torch.ones(3, dtype=torch.float64))
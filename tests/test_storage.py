@@ -0,0 +1,67 @@
+import torch
+
+from humanoid_learning.storage import PinnedRolloutBuffer, RolloutStorage, compute_gae
+
+
+def reference_gae(rewards, values, dones, last_values, gamma, lam):
+    """Textbook per-step GAE loop."""
+    num_steps = rewards.shape[0]
+    advantages = torch.zeros_like(values)
+    running = torch.zeros_like(last_values)
+    for t in reversed(range(num_steps)):
+        next_values = last_values if t == num_steps - 1 else values[t + 1]
+        not_done = 1.0 - dones[t].float()
+        delta = rewards[t] + gamma * next_values * not_done - values[t]
+        running = delta + gamma * lam * not_done * running
+        advantages[t] = running
+    return advantages + values, advantages
+
+
+def random_rollout(num_steps=24, num_envs=16, seed=0):
+    generator = torch.Generator().manual_seed(seed)
+    rewards = torch.randn(num_steps, num_envs, generator=generator)
+    values = torch.randn(num_steps, num_envs, generator=generator)
+    dones = torch.rand(num_steps, num_envs, generator=generator) < 0.1
+    last_values = torch.randn(num_envs, generator=generator)
+    return rewards, values, dones, last_values
+
+
+def test_compute_gae_matches_reference_loop():
+    rewards, values, dones, last_values = random_rollout()
+    returns, advantages = compute_gae(rewards, values, dones, last_values, gamma=0.99, lam=0.95)
+    expected_returns, expected_advantages = reference_gae(rewards, values, dones, last_values, 0.99, 0.95)
+    torch.testing.assert_close(advantages, expected_advantages, rtol=1e-5, atol=1e-6)
+    torch.testing.assert_close(returns, expected_returns, rtol=1e-5, atol=1e-6)
+
+
+def test_compute_gae_writes_into_out_buffers():
+    rewards, values, dones, last_values = random_rollout(seed=1)
+    out = (torch.empty_like(values), torch.empty_like(values))
+    returns, advantages = compute_gae(rewards, values, dones.float(), last_values, out=out)
+    assert returns is out[0] and advantages is out[1]
+    _, expected_advantages = reference_gae(rewards, values, dones, last_values, 0.99, 0.95)
+    torch.testing.assert_close(advantages, expected_advantages, rtol=1e-5, atol=1e-6)
+
+
+def fill(buffer, generator):
+    n, obs_dim, action_dim = buffer.num_envs, buffer.observations.shape[-1], buffer.actions.shape[-1]
+    for _ in range(buffer.num_steps):
+        buffer.observations[buffer.step].copy_(torch.randn(n, obs_dim, generator=generator))
+        buffer.add(None, torch.randn(n, action_dim, generator=generator), torch.randn(n, generator=generator),
+                   torch.zeros(n), torch.randn(n, generator=generator), torch.randn(n, generator=generator),
+                   torch.randn(n, action_dim, generator=generator), torch.ones(n, action_dim))
+
+
+def test_pinned_buffer_transfer_copies_every_field():
+    generator = torch.Generator().manual_seed(2)
+    buffer = PinnedRolloutBuffer(8, 4, 5, 2, pin_memory=False)
+    target = RolloutStorage(8, 4, 5, 2, 'cpu')
+    for _ in range(2):
+        fill(buffer, generator)
+        buffer.compute_returns(torch.zeros(4))
+        buffer.transfer(target)
+        for name in RolloutStorage.FIELDS:
+            torch.testing.assert_close(getattr(target, name), getattr(buffer, name))
+        assert target.step == buffer.num_steps
+        buffer.clear()
+        assert buffer.step == 0